@@ -1,4 +1,4 @@
 """CRUD package exporting resource modules."""
-from . import bookings, clients, trips, vehicles, maintenance, reminders
+from . import bookings, clients, trips, vehicles, maintenance, reminders, loading
 
-__all__ = ["bookings", "clients", "trips", "vehicles", "maintenance", "reminders"]
+__all__ = ["bookings", "clients", "trips", "vehicles", "maintenance", "reminders", "loading"]
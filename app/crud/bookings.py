@@ -1,18 +1,27 @@
 # app/crud/bookings.py
 from __future__ import annotations
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from .. import models, schemas
+from .loading import plan
+from .pagination import PAGE_SIZE, Page, paginate
 
 def list_bookings(db: Session) -> list[models.Booking]:
     return (
         db.query(models.Booking)
+        .options(*plan("bookings.list"))
         .order_by(models.Booking.created_at.desc())
         .all()
     )
 
+def page_bookings(db: Session, cursor: str | None = None, limit: int = PAGE_SIZE) -> Page:
+    stmt = select(models.Booking).options(*plan("bookings.list"))
+    return paginate(db, stmt, models.Booking, cursor, limit)
+
 def list_bookings_for_trip(db: Session, trip_id: int) -> list[models.Booking]:
     return (
         db.query(models.Booking)
+        .options(*plan("trips.bookings"))
         .filter(models.Booking.trip_id == trip_id)
         .all()
     )
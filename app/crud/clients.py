@@ -1,28 +1,89 @@
 # app/crud/clients.py
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
 
 from .. import models, schemas
+from ..services import dedupe, search
 from ..services.phone import normalize_phone
+from ..services.search import TYPEAHEAD_LIMIT
+from .loading import plan
+from .pagination import PAGE_SIZE, Page, paginate
 
+# Search results are ranked rather than paged; show at most this many.
+SEARCH_LIMIT = 200
 
-def list_clients(db: Session, q: str = ""):
-    query = db.query(models.Client)
+
+def _search_filter(q: str):
+    q_like = f"%{q.lower()}%"
+    return or_(
+        models.Client.first_name.ilike(q_like),
+        models.Client.last_name.ilike(q_like),
+        models.Client.email.ilike(q_like),
+        models.Client.phone.ilike(q_like),
+    )
+
+
+def list_clients(
+    db: Session, q: str = "", limit: int | None = None, view: str = "clients.list"
+):
+    """Clients matching ``q`` (best match first), or all clients newest first."""
+    if q and search.can_search(db, q):
+        hits = search.ranked_matches(q, limit)
+        stmt = (
+            select(models.Client)
+            .options(*plan(view))
+            .join(hits, models.Client.id == hits.c.id)
+            .order_by(hits.c.rank)
+        )
+        return db.execute(stmt).scalars().all()
+    query = db.query(models.Client).options(*plan(view))
     if q:
-        q_like = f"%{q.lower()}%"
-        query = query.filter(
-            or_(
-                models.Client.first_name.ilike(q_like),
-                models.Client.last_name.ilike(q_like),
-                models.Client.email.ilike(q_like),
-                models.Client.phone.ilike(q_like),
-            )
+        query = query.filter(_search_filter(q))
+    query = query.order_by(models.Client.created_at.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
+
+
+def page_clients(
+    db: Session, q: str = "", cursor: str | None = None, limit: int = PAGE_SIZE
+) -> Page:
+    if q:
+        return Page(items=list_clients(db, q, limit=SEARCH_LIMIT))
+    stmt = select(models.Client).options(*plan("clients.list"))
+    return paginate(db, stmt, models.Client, cursor, limit)
+
+
+def search_clients(db: Session, q: str = "", limit: int = TYPEAHEAD_LIMIT):
+    """Typeahead matches: full-text from 3 characters, name prefix below that.
+
+    An empty ``q`` returns the most recently created clients.
+    """
+    q = q.strip()
+    if q and search.can_search(db, q):
+        return list_clients(db, q, limit=limit, view="clients.options")
+    stmt = select(models.Client).options(*plan("clients.options"))
+    if not q:
+        stmt = stmt.order_by(models.Client.created_at.desc(), models.Client.id.desc())
+        return db.execute(stmt.limit(limit)).scalars().all()
+    pattern = search.prefix_pattern(q)
+    stmt = stmt.where(
+        or_(
+            models.Client.first_name.like(pattern, escape="\\"),
+            models.Client.last_name.like(pattern, escape="\\"),
         )
-    return query.order_by(models.Client.created_at.desc()).all()
+    )
+    clients = db.execute(stmt.limit(limit)).scalars().all()
+    return sorted(clients, key=lambda c: (c.last_name.lower(), c.first_name.lower()))
 
 
-def get_client(db: Session, client_id: int):
-    return db.query(models.Client).filter(models.Client.id == client_id).first()
+def get_client(db: Session, client_id: int, view: str = "clients.detail"):
+    return (
+        db.query(models.Client)
+        .options(*plan(view))
+        .filter(models.Client.id == client_id)
+        .first()
+    )
 
 
 def create_client(db: Session, client_in: schemas.ClientCreate):
@@ -35,6 +96,8 @@ def create_client(db: Session, client_in: schemas.ClientCreate):
         dob=client_in.dob,
     )
     db.add(client)
+    db.flush()
+    dedupe.index_client(db, client)
     db.commit()
     db.refresh(client)
     return client
@@ -0,0 +1,54 @@
+"""Per-view load plans.
+
+Every page names the relationships it renders and the columns it reads.
+The crud functions attach the matching plan, so rendering a page never
+lazy-loads row by row. Relationships that are many-to-one are joined into
+the same SELECT; collections use one extra ``selectin`` query. Columns a
+view does not show stay behind (``load_only``).
+
+When a template starts using another attribute, add it to the view's plan.
+``tests/test_load_plans.py`` fails when a page goes over its statement
+budget.
+"""
+from __future__ import annotations
+
+from sqlalchemy.orm import joinedload, load_only, selectinload, undefer
+from sqlalchemy.orm.interfaces import ORMOption
+
+from .. import models
+
+Client, Trip, Booking = models.Client, models.Trip, models.Booking
+
+_client_name = (Client.id, Client.first_name, Client.last_name)
+_trip_name = (Trip.id, Trip.name, Trip.destination, Trip.start_date)
+
+PLANS: dict[str, tuple[ORMOption, ...]] = {
+    # bookings/list.html, bookings/_rows.html
+    "bookings.list": (
+        joinedload(Booking.client).load_only(*_client_name),
+        joinedload(Booking.trip).load_only(*_trip_name),
+    ),
+    # trips/detail.html: one row per booking with the client's name
+    "trips.bookings": (joinedload(Booking.client).load_only(*_client_name),),
+    # clients/list.html, clients/_rows.html and the CSV export
+    "clients.list": (
+        load_only(
+            *_client_name, Client.email, Client.phone, Client.dob, Client.created_at
+        ),
+    ),
+    # clients/detail.html: the client's bookings and their trips
+    "clients.detail": (
+        selectinload(Client.bookings).joinedload(Booking.trip).load_only(*_trip_name),
+    ),
+    # trips/list.html, trips/_rows.html: dates plus the booking count badge
+    "trips.list": (load_only(*_trip_name, Trip.end_date), undefer(Trip.booking_count)),
+    # <select> options for picking a client or a trip
+    "clients.options": (load_only(*_client_name, Client.email, Client.phone),),
+    "trips.options": (load_only(*_trip_name),),
+}
+
+
+def plan(view: str) -> tuple[ORMOption, ...]:
+    """Loader options for ``view``. Raises ``KeyError`` for unknown views."""
+
+    return PLANS[view]
@@ -0,0 +1,67 @@
+"""Keyset (seek) pagination over ``(created_at, id)``.
+
+Cursors carry ``created_at`` exactly as SQLite stored it: server-default
+timestamps have no fractional seconds while ORM-written ones do, so comparing
+against a re-rendered datetime would skip or repeat rows.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Select, String, tuple_, type_coerce
+from sqlalchemy.orm import Session
+
+PAGE_SIZE = 50
+
+
+@dataclass
+class Page:
+    """One page of results plus the cursor for the next one (if any)."""
+
+    items: list[Any] = field(default_factory=list)
+    next_cursor: str | None = None
+
+
+def encode_cursor(created_at: str, row_id: int) -> str:
+    raw = json.dumps([created_at, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, int]:
+    """Decode an opaque cursor. Raises ``ValueError`` when it is malformed."""
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        if not isinstance(created_at, str):
+            raise ValueError(created_at)
+        return created_at, int(row_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def paginate(
+    db: Session, stmt: Select, model, cursor: str | None, limit: int = PAGE_SIZE
+) -> Page:
+    """Return the page of ``stmt`` (newest first) that follows ``cursor``.
+
+    ``stmt`` must select ``model`` and must not be ordered yet.
+    """
+
+    raw_ts = type_coerce(model.created_at, String)
+    if cursor:
+        stmt = stmt.where(tuple_(raw_ts, model.id) < tuple_(*decode_cursor(cursor)))
+    stmt = (
+        stmt.add_columns(raw_ts.label("cursor_ts"))
+        .order_by(model.created_at.desc(), model.id.desc())
+        .limit(limit + 1)
+    )
+    rows = db.execute(stmt).unique().all()
+    items = [row[0] for row in rows[:limit]]
+    if len(rows) <= limit:
+        return Page(items=items)
+    last_ts = rows[limit - 1][-1]
+    return Page(items=items, next_cursor=encode_cursor(last_ts, items[-1].id))
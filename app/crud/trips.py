@@ -1,10 +1,78 @@
 # app/crud/trips.py
 from __future__ import annotations
+from datetime import date, timedelta
+
+from sqlalchemy import or_, select
 from sqlalchemy.orm import Session
 from .. import models, schemas
+from ..services.search import TYPEAHEAD_LIMIT, prefix_pattern
+from .loading import plan
+from .pagination import PAGE_SIZE, Page, paginate
+
+def list_trips(db: Session, view: str = "trips.options") -> list[models.Trip]:
+    return (
+        db.query(models.Trip)
+        .options(*plan(view))
+        .order_by(models.Trip.created_at.desc())
+        .all()
+    )
+
+def upcoming_condition(today: date):
+    """Undated trips and those starting ``today`` or later."""
+    return or_(models.Trip.start_date.is_(None), models.Trip.start_date >= today)
+
+def page_trips(
+    db: Session, tab: str = "upcoming", cursor: str | None = None, limit: int = PAGE_SIZE
+) -> Page:
+    """Trips on the upcoming (undated or starting today or later) or past tab."""
+    today = date.today()
+    if tab == "past":
+        cond = models.Trip.start_date < today
+    else:
+        cond = upcoming_condition(today)
+    stmt = select(models.Trip).where(cond).options(*plan("trips.list"))
+    return paginate(db, stmt, models.Trip, cursor, limit)
+
+def _date_range(q: str) -> tuple[date, date] | None:
+    """``[start, end)`` for ``YYYY``, ``YYYY-MM`` or ``YYYY-MM-DD``, else ``None``."""
+    parts = q.split("-")
+    if not 1 <= len(parts) <= 3 or not all(p.isdigit() for p in parts) or len(parts[0]) != 4:
+        return None
+    try:
+        nums = [int(p) for p in parts] + [1] * (3 - len(parts))
+        start = date(*nums)
+    except ValueError:
+        return None
+    if len(parts) == 1:
+        return start, date(start.year + 1, 1, 1)
+    if len(parts) == 2:
+        return start, (start + timedelta(days=32)).replace(day=1)
+    return start, start + timedelta(days=1)
+
+def search_trips(db: Session, q: str = "", limit: int = TYPEAHEAD_LIMIT) -> list[models.Trip]:
+    """Typeahead matches: name or destination prefix, or a start-date period.
 
-def list_trips(db: Session) -> list[models.Trip]:
-    return db.query(models.Trip).order_by(models.Trip.created_at.desc()).all()
+    Each condition seeks its own index and the scan stops at ``limit``; an
+    empty ``q`` returns the most recently created trips.
+    """
+    q = q.strip()
+    stmt = select(models.Trip).options(*plan("trips.options"))
+    if not q:
+        stmt = stmt.order_by(models.Trip.created_at.desc(), models.Trip.id.desc())
+        return db.execute(stmt.limit(limit)).scalars().all()
+    pattern = prefix_pattern(q)
+    conds = [
+        models.Trip.name.like(pattern, escape="\\"),
+        models.Trip.destination.like(pattern, escape="\\"),
+    ]
+    period = _date_range(q)
+    if period:
+        conds.append(
+            (models.Trip.start_date >= period[0]) & (models.Trip.start_date < period[1])
+        )
+    # no ORDER BY: sorting every match would defeat the LIMIT
+    trips = db.execute(stmt.where(or_(*conds)).limit(limit)).scalars().all()
+    return sorted(trips, key=lambda t: (t.start_date is None, t.start_date, t.name.lower()))
 
 def get_trip(db: Session, trip_id: int) -> models.Trip | None:
     return db.get(models.Trip, trip_id)
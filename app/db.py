@@ -1,22 +1,250 @@
 # app/db.py
+"""Engine and session factories.
+
+Engines are built lazily from ``DB_PATH`` (default ``data/astraion.db``) the
+first time they are needed, so ``run_server --db`` and tests that set the
+variable before touching the database get the file they asked for. Each path
+gets a read-write engine and a read-only one (``mode=ro`` + ``query_only``)
+for GET routes, so list and report pages never queue behind writers for a
+connection.
+
+``engine``, ``read_engine`` and ``DATABASE_URL`` remain importable as module
+attributes and resolve to the current path.
+
+Async read routes depend on ``get_async_read_db``. With the optional
+``aiosqlite`` driver installed it yields an ``AsyncSession`` on a
+``sqlite+aiosqlite`` read-only engine. Without the driver it yields a
+``ThreadedReadSession``, which runs the same ``run_sync`` calls on a sync
+read session in a worker thread.
+"""
 from __future__ import annotations
+
+import functools
+import os
+import threading
 from pathlib import Path
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+
+import anyio
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker
+
+try:
+    import aiosqlite
+except ImportError:  # pragma: no cover - depends on environment
+    aiosqlite = None
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
-DATABASE_URL = f"sqlite:///{(DATA_DIR / 'astraion.db').as_posix()}"
+# PRAGMAs applied to every new SQLite connection, selected with DB_PROFILE.
+# "safe" fsyncs every commit (FULL), "balanced" fsyncs only at WAL
+# checkpoints (NORMAL; a power cut can lose the last commits but never
+# corrupts), "fast" never fsyncs. "none" leaves SQLite defaults.
+# foreign_keys stays off as before: inbound sync applies changes in chunks,
+# and compaction can deliver a booking before the client it points to.
+DB_PROFILES: dict[str, dict[str, str | int]] = {
+    "none": {},
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -32000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+DEFAULT_PROFILE = "balanced"
+
+
+def get_profile(name: str | None = None) -> dict[str, str | int]:
+    name = (name or os.getenv("DB_PROFILE") or DEFAULT_PROFILE).lower()
+    if name not in DB_PROFILES:
+        raise ValueError(
+            f"Unknown DB_PROFILE {name!r}; choose from {sorted(DB_PROFILES)}"
+        )
+    return DB_PROFILES[name]
+
+
+def apply_profile(engine: Engine, profile: dict[str, str | int]) -> None:
+    """Run the profile's PRAGMAs on every connection the engine opens."""
+
+    if not profile:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        for name, value in profile.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_sqlite_engine(
+    url: str, profile: str | None = None, *, read_only: bool = False
+) -> Engine:
+    engine = create_engine(
+        url,
+        future=True,
+        echo=False,
+        connect_args={"check_same_thread": False},
+    )
+    pragmas = dict(get_profile(profile))
+    if read_only:
+        # journal_mode is a write; the read-write engine has already set it
+        pragmas.pop("journal_mode", None)
+        pragmas["query_only"] = "ON"
+    apply_profile(engine, pragmas)
+    return engine
+
+
+def get_db_path() -> Path:
+    raw = os.getenv("DB_PATH")
+    return Path(raw).resolve() if raw else DATA_DIR / "astraion.db"
+
+
+def database_url(path: Path | None = None) -> str:
+    return f"sqlite:///{(path or get_db_path()).as_posix()}"
+
+
+_factories: dict[tuple[Path, bool], tuple[Engine, sessionmaker]] = {}
+_lock = threading.RLock()
+
+
+def _factory(read_only: bool) -> tuple[Engine, sessionmaker]:
+    path = get_db_path()
+    key = (path, read_only)
+    found = _factories.get(key)
+    if found is None:
+        with _lock:
+            found = _factories.get(key)
+            if found is None:
+                if read_only:
+                    # The read-write engine creates the file (and WAL) first.
+                    _factory(False)[0].connect().close()
+                    url = f"sqlite:///file:{path.as_posix()}?mode=ro&uri=true"
+                else:
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    url = database_url(path)
+                eng = create_sqlite_engine(url, read_only=read_only)
+                found = (
+                    eng,
+                    sessionmaker(
+                        bind=eng, autoflush=False, autocommit=False, future=True
+                    ),
+                )
+                _factories[key] = found
+    return found
+
+
+def get_engine() -> Engine:
+    return _factory(False)[0]
+
+
+def get_read_engine() -> Engine:
+    return _factory(True)[0]
+
+
+def SessionLocal() -> Session:
+    """Open a read-write session on the configured database."""
+    return _factory(False)[1]()
+
+
+def ReadSessionLocal() -> Session:
+    """Open a read-only session on the configured database."""
+    return _factory(True)[1]()
+
+
+def __getattr__(name: str):
+    if name == "engine":
+        return get_engine()
+    if name == "read_engine":
+        return get_read_engine()
+    if name == "DATABASE_URL":
+        return database_url()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_async_factories: dict[Path, tuple[AsyncEngine, async_sessionmaker]] = {}
+
+
+def _async_read_factory() -> tuple[AsyncEngine, async_sessionmaker]:
+    path = get_db_path()
+    found = _async_factories.get(path)
+    if found is None:
+        with _lock:
+            found = _async_factories.get(path)
+            if found is None:
+                _factory(False)[0].connect().close()
+                eng = create_async_engine(
+                    f"sqlite+aiosqlite:///file:{path.as_posix()}?mode=ro&uri=true"
+                )
+                pragmas = dict(get_profile())
+                pragmas.pop("journal_mode", None)
+                pragmas["query_only"] = "ON"
+                apply_profile(eng.sync_engine, pragmas)
+                found = (eng, async_sessionmaker(eng, expire_on_commit=False))
+                _async_factories[path] = found
+    return found
+
+
+def get_async_read_engine() -> AsyncEngine:
+    """The aiosqlite read-only engine. Needs the ``aiosqlite`` package."""
+    return _async_read_factory()[0]
+
+
+class ThreadedReadSession:
+    """``AsyncSession`` stand-in used when aiosqlite is not installed.
+
+    Only ``run_sync`` and ``close`` are provided; each call runs on a sync
+    read session in a worker thread.
+    """
+
+    def __init__(self) -> None:
+        self.sync_session = ReadSessionLocal()
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await anyio.to_thread.run_sync(
+            functools.partial(fn, self.sync_session, *args, **kwargs)
+        )
+
+    async def close(self) -> None:
+        # Returning the connection is quick. Doing it here, not in a thread,
+        # means a full threadpool cannot hold connections hostage.
+        self.sync_session.close()
+
+
+AsyncReadSession = AsyncSession | ThreadedReadSession
+
+
+def AsyncReadSessionLocal() -> AsyncReadSession:
+    """Open an async read-only session on the configured database."""
+    if aiosqlite is None:
+        return ThreadedReadSession()
+    return _async_read_factory()[1]()
 
-engine = create_engine(
-    DATABASE_URL,
-    future=True,
-    echo=False,
-    connect_args={"check_same_thread": False},
-)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
 def get_db():
     db = SessionLocal()
@@ -25,3 +253,18 @@ def get_db():
     finally:
         db.close()
 
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    db = AsyncReadSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
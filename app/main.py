@@ -4,6 +4,8 @@ from __future__ import annotations
 
 
 import argparse
+import asyncio
+from contextlib import asynccontextmanager
 import uvicorn
 import os
 import sys
@@ -18,13 +20,23 @@ from fastapi import Depends, FastAPI, Request
 from fastapi.responses import HTMLResponse, PlainTextResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import func
-from sqlalchemy.orm import Session
 
 from . import db, models, routes
-from .services import backups
+from .services import autosync, backups, dedupe, metrics, search, snapshots, stats, sync
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # AUTO_SYNC=true + API_URL: push/pull in the background while serving
+    worker = autosync.from_env()
+    task = asyncio.create_task(worker.run()) if worker else None
+    yield
+    if worker:
+        await worker.stop()
+        await task
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 # ----- resource paths that work in dev and PyInstaller one-file -----
@@ -46,10 +58,24 @@ templates = Jinja2Templates(directory=TEMPLATES_DIR)
 
 # ----- DB & models -----
 models.Base.metadata.create_all(bind=db.engine)
+# create_all skips existing tables, so add indexes introduced since they were built
+for _table in models.Base.metadata.sorted_tables:
+    for _index in _table.indexes:
+        _index.create(bind=db.engine, checkfirst=True)
+search.ensure_client_index(db.engine)
+with db.SessionLocal() as _session:
+    dedupe.ensure_blocking_index(_session)
 
 # ----- Scheduler -----
 scheduler = BackgroundScheduler()
-scheduler.add_job(backups.backup_db, "cron", hour=2, minute=30)
+# BACKUP_MODE=snapshot stores deduplicated chunks instead of whole-file copies
+_backup_job = (
+    snapshots.snapshot_db
+    if os.getenv("BACKUP_MODE", "file").lower() == "snapshot"
+    else backups.backup_db
+)
+scheduler.add_job(_backup_job, "cron", hour=2, minute=30)
+scheduler.add_job(sync.run_compaction, "cron", hour=3, minute=15)
 scheduler.start()
 
 @app.exception_handler(RequestValidationError)
@@ -65,32 +91,46 @@ async def validation_exception_handler(request, exc: RequestValidationError):
 
 # ----- Routes -----
 @app.get("/", response_class=HTMLResponse)
-def home(request: Request, db_session: Session = Depends(db.get_db)):
-    client_count = db_session.query(func.count(models.Client.id)).scalar() or 0
-    trip_count = db_session.query(func.count(models.Trip.id)).scalar() or 0
-    booking_count = db_session.query(func.count(models.Booking.id)).scalar() or 0
+async def home(request: Request, db_session: db.AsyncReadSession = Depends(db.get_async_read_db)):
+    dashboard = await db_session.run_sync(stats.get_stats)
     return templates.TemplateResponse(
         "home.html",
         {
             "request": request,
-            "client_count": client_count,
-            "trip_count": trip_count,
-            "booking_count": booking_count,
+            "stats": dashboard,
+            "client_count": dashboard.clients,
+            "trip_count": dashboard.trips,
+            "booking_count": dashboard.bookings,
         },
     )
 
 
 @app.post("/admin/backup-now", response_class=PlainTextResponse)
-def backup_now() -> str:
-    backups.backup_db()
-    return "Backup created"
+async def backup_now() -> str:
+    # Copying and compressing can take a while; keep it off the event loop.
+    path = await asyncio.to_thread(backups.backup_db)
+    return f"Backup created: {path.name}"
 
 
 app.include_router(routes.clients.router)
 app.include_router(routes.trips.router)
 app.include_router(routes.bookings.router)
+app.include_router(routes.exports.router)
 if os.getenv("DEV_SYNC") == "1":
     app.include_router(routes.sync.router)
+# PERF_METRICS=true: request/SQL/template timings at /admin/metrics and /admin/perf
+if metrics.enabled():
+    metrics.install(
+        app,
+        [
+            templates.env,
+            routes.clients.templates.env,
+            routes.trips.templates.env,
+            routes.bookings.templates.env,
+            routes.admin.templates.env,
+        ],
+    )
+    app.include_router(routes.admin.router)
 
 
 # ----- CLI entry (USB Start.bat passes --db, --port) -----
@@ -9,13 +9,16 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     UniqueConstraint,
     CheckConstraint,
     func,
+    select,
+    text,
 )
-from sqlalchemy.orm import DeclarativeBase, relationship
+from sqlalchemy.orm import DeclarativeBase, column_property, relationship
 
 
 class Base(DeclarativeBase):
@@ -38,6 +41,15 @@ class Client(Base):
     dob = Column(Date, nullable=True)
 
     bookings = relationship("Booking", back_populates="client")
+    __table_args__ = (
+        Index("ix_clients_created_at_id", "created_at", "id"),
+        # NOCASE so that typeahead prefix LIKEs can seek (see crud.clients.search_clients)
+        Index("ix_clients_first_name_nocase", text("first_name COLLATE NOCASE")),
+        Index("ix_clients_last_name_nocase", text("last_name COLLATE NOCASE")),
+    )
+    blocking_keys = relationship(
+        "ClientBlockingKey", back_populates="client", cascade="all, delete-orphan"
+    )
 
     @property
     def name(self) -> str:
@@ -46,8 +58,26 @@ class Client(Base):
     # IMPORTANT: do NOT also define @property normalized_phone here.
     # If you want a computed helper, name it something else, e.g.:
     # def normalized_phone_computed(self): ...
-    
-    
+
+
+class ClientBlockingKey(Base):
+    """Candidate-blocking keys used to narrow duplicate detection."""
+
+    __tablename__ = "client_blocking_keys"
+
+    id = Column(Integer, primary_key=True)
+    client_id = Column(Integer, ForeignKey("clients.id"), nullable=False, index=True)
+    kind = Column(String(16), nullable=False)
+    key = Column(String, nullable=False)
+
+    client = relationship("Client", back_populates="blocking_keys")
+
+    __table_args__ = (
+        UniqueConstraint("client_id", "kind", "key", name="uq_blocking_client_key"),
+        Index("ix_blocking_kind_key_client", "kind", "key", "client_id"),
+    )
+
+
 class Trip(Base):
     __tablename__ = "trips"
 
@@ -64,6 +94,14 @@ class Trip(Base):
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
+    __table_args__ = (
+        Index("ix_trips_created_at_id", "created_at", "id"),
+        Index("ix_trips_start_date", "start_date"),
+        # NOCASE so that typeahead prefix LIKEs can seek (see crud.trips.search_trips)
+        Index("ix_trips_name_nocase", text("name COLLATE NOCASE")),
+        Index("ix_trips_destination_nocase", text("destination COLLATE NOCASE")),
+    )
+
 class Booking(Base):
     __tablename__ = "bookings"
 
@@ -78,10 +116,26 @@ class Booking(Base):
     client = relationship("Client", back_populates="bookings")
     trip = relationship("Trip", back_populates="bookings")
 
-    __table_args__ = (UniqueConstraint("client_id", "trip_id", name="uq_booking_client_trip"),)
+    __table_args__ = (
+        UniqueConstraint("client_id", "trip_id", name="uq_booking_client_trip"),
+        Index("ix_bookings_created_at_id", "created_at", "id"),
+        # the unique constraint leads with client_id; lookups by trip need their own
+        Index("ix_bookings_trip_id", "trip_id"),
+    )
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
 
+
+# Counted in SQL (one index seek per trip) instead of loading the bookings;
+# deferred, so only views that ask for it (undefer) pay for it.
+Trip.booking_count = column_property(
+    select(func.count(Booking.id))
+    .where(Booking.trip_id == Trip.id)
+    .correlate_except(Booking)
+    .scalar_subquery(),
+    deferred=True,
+)
+
     
 class AuditLog(Base):
     """Simple audit log table capturing entity changes."""
@@ -115,6 +169,32 @@ class SyncOutbox(Base):
     )
 
 
+class SyncClock(Base):
+    """Next logical clock per synced entity, handed out by an atomic upsert."""
+
+    __tablename__ = "sync_clocks"
+
+    entity = Column(String, primary_key=True)
+    entity_id = Column(Integer, primary_key=True)
+    clock = Column(Integer, nullable=False)
+
+
+class SyncCheckpoint(Base):
+    """How far sync has progressed with a remote, per direction."""
+
+    __tablename__ = "sync_checkpoints"
+
+    id = Column(Integer, primary_key=True)
+    remote = Column(String, nullable=False)
+    direction = Column(String(8), nullable=False)  # "pull" or "push"
+    cursor = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("remote", "direction", name="uq_sync_checkpoint"),
+    )
+
+
 class Vehicle(Base):
     __tablename__ = "vehicles"
 
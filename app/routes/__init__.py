@@ -1,4 +1,4 @@
 """Application route modules."""
-from . import bookings, clients, trips, sync
+from . import admin, bookings, clients, exports, trips, sync
 
-__all__ = ["bookings", "clients", "trips", "sync"]
+__all__ = ["admin", "bookings", "clients", "exports", "trips", "sync"]
@@ -0,0 +1,34 @@
+"""Profiling pages, mounted only when ``PERF_METRICS`` is enabled."""
+from __future__ import annotations
+
+from fastapi import APIRouter, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from fastapi.templating import Jinja2Templates
+
+from ..services import metrics
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+templates = Jinja2Templates(directory="app/templates")
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(
+        metrics.render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
+
+@router.get("/perf", response_class=HTMLResponse)
+def perf_page(request: Request):
+    snap = metrics.snapshot()
+    routes = sorted(snap.routes.items(), key=lambda item: item[1].latency.total, reverse=True)
+    template_stats = sorted(snap.templates.items(), key=lambda item: item[1].total, reverse=True)
+    return templates.TemplateResponse(
+        "admin/perf.html",
+        {
+            "request": request,
+            "routes": routes,
+            "template_stats": template_stats,
+            "slow": snap.slow,
+        },
+    )
@@ -1,5 +1,5 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.exc import IntegrityError
@@ -11,15 +11,40 @@ from ..schemas import BookingCreate          # <-- concrete schema import
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
+def _bookings_page(db_session: Session, cursor: str | None):
+    try:
+        return crud.bookings.page_bookings(db_session, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/bookings", response_class=HTMLResponse)
-def list_bookings_page(request: Request, db_session: Session = Depends(db.get_db)):
-    bookings = crud.bookings.list_bookings(db_session)
-    return templates.TemplateResponse("bookings/list.html", {"request": request, "bookings": bookings})
+async def list_bookings_page(
+    request: Request, db_session: db.AsyncReadSession = Depends(db.get_async_read_db)
+):
+    page = await db_session.run_sync(_bookings_page, None)
+    return templates.TemplateResponse(
+        "bookings/list.html",
+        {"request": request, "bookings": page.items, "next_cursor": page.next_cursor},
+    )
+
+@router.get("/bookings/rows", response_class=HTMLResponse)
+async def list_bookings_rows(
+    request: Request, cursor: str, db_session: db.AsyncReadSession = Depends(db.get_async_read_db)
+):
+    page = await db_session.run_sync(_bookings_page, cursor)
+    return templates.TemplateResponse(
+        "bookings/_rows.html",
+        {"request": request, "bookings": page.items, "next_cursor": page.next_cursor},
+    )
+
+def _booking_options(db_session: Session):
+    return crud.clients.search_clients(db_session), crud.trips.search_trips(db_session)
 
 @router.get("/bookings/new", response_class=HTMLResponse)
-def new_booking_page(request: Request, db_session: Session = Depends(db.get_db)):
-    clients = crud.clients.list_clients(db_session)
-    trips = crud.trips.list_trips(db_session)
+async def new_booking_page(
+    request: Request, db_session: db.AsyncReadSession = Depends(db.get_async_read_db)
+):
+    clients, trips = await db_session.run_sync(_booking_options)
     return templates.TemplateResponse("bookings/new.html", {"request": request, "clients": clients, "trips": trips})
 
 @router.post("/bookings", response_class=HTMLResponse)
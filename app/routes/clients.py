@@ -1,47 +1,63 @@
+from datetime import datetime
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, status
+from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from .. import crud, db
 from ..schemas import ClientCreate            # <-- concrete schema import
-from ..services import dedupe, audit
-import csv
+from ..services import dedupe, audit, imports
+from .exports import export_response
 import io
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
 
-# CSV & Excell Exports
+# CSV & Excel exports (also parquet/arrow when pyarrow is installed)
 @router.get("/clients/export")
-def export_clients_csv(q: str = "", db_session: Session = Depends(db.get_db)):
-    rows = crud.clients.list_clients(db_session, q)
-
-    def generate():
-        buf = io.StringIO()
-        writer = csv.writer(buf)
-        writer.writerow(["id", "first_name", "last_name", "email", "phone", "dob"])
-        yield buf.getvalue(); buf.seek(0); buf.truncate(0)
-        for c in rows:
-            writer.writerow([
-                c.id,
-                c.first_name,
-                c.last_name,
-                c.email or "",
-                c.phone or "",
-                c.dob.isoformat() if c.dob else "",
-            ])
-            yield buf.getvalue(); buf.seek(0); buf.truncate(0)
-
-    headers = {"Content-Disposition": "attachment; filename=clients.csv"}
-    return StreamingResponse(generate(), media_type="text/csv", headers=headers)
+def export_clients(q: str = "", limit: int | None = None, format: str = "csv"):
+    return export_response("clients", format, q, limit)
+
+def _clients_page(db_session: Session, q: str, cursor: str | None):
+    try:
+        return crud.clients.page_clients(db_session, q, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.get("/clients", response_class=HTMLResponse)
-def list_clients_page(request: Request, q: str = "", db_session: Session = Depends(db.get_db)):
-    clients = crud.clients.list_clients(db_session, q)
-    return templates.TemplateResponse("clients/list.html", {"request": request, "clients": clients, "q": q})
+async def list_clients_page(
+    request: Request, q: str = "", db_session: db.AsyncReadSession = Depends(db.get_async_read_db)
+):
+    page = await db_session.run_sync(_clients_page, q, None)
+    return templates.TemplateResponse(
+        "clients/list.html",
+        {"request": request, "clients": page.items, "next_cursor": page.next_cursor, "q": q},
+    )
+
+@router.get("/clients/rows", response_class=HTMLResponse)
+async def list_clients_rows(
+    request: Request,
+    cursor: str,
+    q: str = "",
+    db_session: db.AsyncReadSession = Depends(db.get_async_read_db),
+):
+    page = await db_session.run_sync(_clients_page, q, cursor)
+    return templates.TemplateResponse(
+        "clients/_rows.html",
+        {"request": request, "clients": page.items, "next_cursor": page.next_cursor, "q": q},
+    )
+
+@router.get("/clients/search", response_class=HTMLResponse)
+async def search_clients_options(
+    request: Request, q: str = "", db_session: db.AsyncReadSession = Depends(db.get_async_read_db)
+):
+    """``<option>`` fragment for the client typeahead picker."""
+    clients = await db_session.run_sync(crud.clients.search_clients, q)
+    return templates.TemplateResponse(
+        "clients/_options.html", {"request": request, "clients": clients}
+    )
 
 @router.get("/clients/new", response_class=HTMLResponse)
 def new_client_page(request: Request):
@@ -73,13 +89,43 @@ def create_client(
 
     return RedirectResponse(url=f"/clients/{client.id}", status_code=status.HTTP_303_SEE_OTHER)
 
-@router.get("/clients/{client_id}", response_class=HTMLResponse)
-def client_detail_page(request: Request, client_id: int, db_session: Session = Depends(db.get_db)):
+@router.get("/clients/import", response_class=HTMLResponse)
+def import_clients_page(request: Request):
+    return templates.TemplateResponse("clients/import.html", {"request": request})
+
+@router.post("/clients/import", response_class=HTMLResponse)
+def import_clients(
+    request: Request,
+    file: UploadFile = File(...),
+    fuzzy: bool = Form(False),
+    db_session: Session = Depends(db.get_db),
+):
+    ts = datetime.now().strftime("%Y%m%d-%H%M%S")
+    report = db.DATA_DIR / "imports" / f"{ts}-errors.csv"
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    result = imports.import_clients(
+        db_session,
+        stream,
+        fmt=imports.detect_format(file.filename),
+        report_path=report,
+        fuzzy=fuzzy,
+    )
+    return templates.TemplateResponse(
+        "clients/import.html", {"request": request, "result": result}
+    )
+
+def _client_detail(db_session: Session, client_id: int):
     client = crud.clients.get_client(db_session, client_id)
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
-    trips = crud.trips.list_trips(db_session)
-    timeline = audit.get_timeline_for_client(db_session, client_id)
+    trips = crud.trips.search_trips(db_session)
+    return client, trips, audit.get_timeline_for_client(db_session, client_id)
+
+@router.get("/clients/{client_id}", response_class=HTMLResponse)
+async def client_detail_page(
+    request: Request, client_id: int, db_session: db.AsyncReadSession = Depends(db.get_async_read_db)
+):
+    client, trips, timeline = await db_session.run_sync(_client_detail, client_id)
     return templates.TemplateResponse(
         "clients/detail.html",
         {"request": request, "client": client, "trips": trips, "timeline": timeline},
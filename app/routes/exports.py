@@ -0,0 +1,38 @@
+"""Streaming exports (see :mod:`app.services.exports`)."""
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from .. import db
+from ..services import exports
+
+router = APIRouter(tags=["exports"])
+
+
+def _stream(dataset: str, fmt: str, q: str, limit: int | None):
+    # The response body outlives the request scope; hold our own connection.
+    with db.get_read_engine().connect() as conn:
+        yield from exports.export(conn, dataset, fmt, q=q, limit=limit)
+
+
+def export_response(dataset: str, fmt: str = "csv", q: str = "", limit: int | None = None):
+    try:
+        spec = exports.check(dataset, fmt)
+    except exports.ExportError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    filename = f"{dataset}-{datetime.now():%Y%m%d}.{spec.extension}"
+    return StreamingResponse(
+        _stream(dataset, fmt, q, limit),
+        media_type=spec.media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@router.get("/exports/{dataset}")
+def export_dataset(dataset: str, format: str = "csv", q: str = "", limit: int | None = None):
+    """``clients``, ``trips`` or ``bookings`` as csv, xlsx, parquet or arrow."""
+
+    return export_response(dataset, format, q, limit)
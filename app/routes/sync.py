@@ -1,32 +1,136 @@
 """Development-only sync routes."""
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
-from sqlalchemy import select
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from .. import db, models
+from .. import db
+from ..schemas import RecordsRequest, TreeRequest
+from ..services import reconcile, wire
 from ..services import sync as sync_service
 
 router = APIRouter(prefix="/sync", tags=["sync"])
 
 
-@router.post("/push")
-def push(payload: dict, db_session: Session = Depends(db.get_db)) -> dict:
-    changes = payload.get("changes", [])
-    sync_service.apply_inbound_changes(db_session, changes)
+def _respond(request: Request, document: dict):
+    """Encode ``document`` in the format and compression the client accepts."""
+
+    media, encoding = wire.negotiate(
+        request.headers.get("accept"), request.headers.get("accept-encoding")
+    )
+    if media == wire.JSON and encoding is None:
+        return document
+    headers = (
+        {"Content-Encoding": encoding, "Vary": "Accept, Accept-Encoding"}
+        if encoding
+        else {}
+    )
+    return Response(
+        wire.compress(wire.encode(document, media), encoding),
+        media_type=media,
+        headers=headers,
+    )
+
+
+def _apply(db_session: Session, changes: list[dict]) -> int:
+    applied = sync_service.apply_inbound_changes(db_session, changes)
     db_session.commit()
-    return {"status": "ok"}
+    return applied
+
+
+@router.post("/push")
+async def push(request: Request, db_session: Session = Depends(db.get_db)):
+    """Apply pushed changes; ``ack`` is the last outbox id received.
+
+    Bodies may be in any :mod:`wire` format and compression; others get 415.
+    """
+
+    try:
+        body = wire.decompress(
+            await request.body(), request.headers.get("content-encoding")
+        )
+        document = wire.decode(body, request.headers.get("content-type"))
+        changes = document.get("changes", [])
+    except wire.UnsupportedFormat as exc:
+        raise HTTPException(status_code=415, detail=str(exc)) from exc
+    applied = await run_in_threadpool(_apply, db_session, changes)
+    return _respond(
+        request,
+        {
+            "status": "ok",
+            "applied": applied,
+            "ack": changes[-1].get("id") if changes else None,
+        },
+    )
+
+
+def _ndjson(after_clock: int):
+    # The request's session is closed before the body streams; use our own.
+    with db.ReadSessionLocal() as session:
+        for change in sync_service.iter_outbox_since(session, after_clock):
+            yield json.dumps(change, separators=(",", ":")) + "\n"
 
 
 @router.get("/pull")
-def pull(after_clock: int = 0, db_session: Session = Depends(db.get_db)) -> dict:
-    stmt = (
-        select(models.SyncOutbox)
-        .where(models.SyncOutbox.id > after_clock)
-        .order_by(models.SyncOutbox.id)
+def pull(
+    request: Request,
+    after_clock: int = 0,
+    limit: int = Query(
+        sync_service.PULL_PAGE_SIZE, ge=1, le=sync_service.MAX_PULL_PAGE_SIZE
+    ),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db_session: Session = Depends(db.get_read_db),
+):
+    """Outbox entries after ``after_clock``.
+
+    ``format=json`` returns one page of at most ``limit`` changes plus
+    ``next_cursor``/``has_more``, encoded as negotiated from ``Accept`` and
+    ``Accept-Encoding`` (plain JSON by default); ``format=ndjson`` streams
+    every remaining change, one JSON object per line.
+    """
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _ndjson(after_clock), media_type="application/x-ndjson"
+        )
+    return _respond(
+        request, sync_service.get_outbox_page(db_session, after_clock, limit)
     )
-    entries = db_session.execute(stmt).scalars().all()
-    return {"changes": [sync_service.serialize_outbox(e) for e in entries]}
 
 
+# ----- anti-entropy (see services.reconcile) -----
+
+
+@router.post("/tree")
+def tree(body: TreeRequest, db_session: Session = Depends(db.get_read_db)):
+    """Leaf count and the child hashes of each requested tree node."""
+
+    state = reconcile.tree_state(db_session)
+    nodes = state.nodes(body.depth) if body.prefixes else {}
+    return {
+        "count": len(state.leaves),
+        "nodes": reconcile.children(nodes, body.prefixes),
+    }
+
+
+@router.post("/leaves")
+def leaves(body: TreeRequest, db_session: Session = Depends(db.get_read_db)):
+    """``[entity, entity_id, clock, updated_at, alive]`` per leaf in the buckets."""
+
+    state = reconcile.tree_state(db_session)
+    return {"leaves": reconcile.bucket_leaves(state.leaves, body.depth, body.prefixes)}
+
+
+@router.post("/records")
+def records(
+    request: Request,
+    body: RecordsRequest,
+    db_session: Session = Depends(db.get_read_db),
+):
+    """Current state of the requested keys as inbound changes."""
+
+    return _respond(request, {"changes": reconcile.records(db_session, body.keys)})
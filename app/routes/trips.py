@@ -1,42 +1,73 @@
 # app/routes/trips.py
 from typing import Annotated
-from datetime import date
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session
 
-from .. import crud, db, models
+from .. import crud, db
 from ..schemas import TripCreate  # concrete schema
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
 
+def _trips_page(db_session: Session, tab: str, cursor: str | None):
+    try:
+        return crud.trips.page_trips(db_session, tab, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/trips", response_class=HTMLResponse)
-def list_trips_page(request: Request, db_session: Session = Depends(db.get_db)):
-    today = date.today()
-    trips = (
-        db_session.query(models.Trip)
-        .options(selectinload(models.Trip.bookings))
-        .order_by(models.Trip.created_at.desc())
-        .all()
-    )
-    upcoming = [t for t in trips if t.start_date is None or t.start_date >= today]
-    past = [t for t in trips if t.start_date is not None and t.start_date < today]
-    tab = request.query_params.get("tab", "upcoming")
+async def list_trips_page(
+    request: Request,
+    tab: str = "upcoming",
+    db_session: db.AsyncReadSession = Depends(db.get_async_read_db),
+):
+    page = await db_session.run_sync(_trips_page, tab, None)
     return templates.TemplateResponse(
         "trips/list.html",
         {
             "request": request,
-            "upcoming": upcoming,
-            "past": past,
+            "trips": page.items,
+            "next_cursor": page.next_cursor,
             "tab": tab,
         },
     )
 
 
+@router.get("/trips/rows", response_class=HTMLResponse)
+async def list_trips_rows(
+    request: Request,
+    cursor: str,
+    tab: str = "upcoming",
+    db_session: db.AsyncReadSession = Depends(db.get_async_read_db),
+):
+    page = await db_session.run_sync(_trips_page, tab, cursor)
+    return templates.TemplateResponse(
+        "trips/_rows.html",
+        {
+            "request": request,
+            "trips": page.items,
+            "next_cursor": page.next_cursor,
+            "tab": tab,
+        },
+    )
+
+
+@router.get("/trips/search", response_class=HTMLResponse)
+async def search_trips_options(
+    request: Request, q: str = "", db_session: db.AsyncReadSession = Depends(db.get_async_read_db)
+):
+    """``<option>`` fragment for the trip typeahead picker."""
+    trips = await db_session.run_sync(crud.trips.search_trips, q)
+    return templates.TemplateResponse(
+        "trips/_options.html", {"request": request, "trips": trips}
+    )
+
+
 @router.get("/trips/new", response_class=HTMLResponse)
 def new_trip_page(request: Request):
     return templates.TemplateResponse("trips/new.html", {"request": request})
@@ -52,16 +83,20 @@ def create_trip(
     return RedirectResponse(url="/trips", status_code=status.HTTP_303_SEE_OTHER)
 
 
-@router.get("/trips/{trip_id}", response_class=HTMLResponse)
-def trip_detail_page(
-    request: Request, trip_id: int, db_session: Session = Depends(db.get_db)
-):
+def _trip_detail(db_session: Session, trip_id: int):
     trip = crud.trips.get_trip(db_session, trip_id)
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
-
     bookings = crud.bookings.list_bookings_for_trip(db_session, trip_id)
+    return trip, bookings, crud.clients.search_clients(db_session)
+
+
+@router.get("/trips/{trip_id}", response_class=HTMLResponse)
+async def trip_detail_page(
+    request: Request, trip_id: int, db_session: db.AsyncReadSession = Depends(db.get_async_read_db)
+):
+    trip, bookings, clients = await db_session.run_sync(_trip_detail, trip_id)
     return templates.TemplateResponse(
         "trips/detail.html",
-        {"request": request, "trip": trip, "bookings": bookings},
+        {"request": request, "trip": trip, "bookings": bookings, "clients": clients},
     )
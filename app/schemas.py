@@ -1,7 +1,7 @@
 # app/schemas.py
 from datetime import date, datetime
 from fastapi import Form
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from pydantic import ConfigDict
 from sqlalchemy import String
 
@@ -117,4 +117,15 @@ class BookingCreate(BookingBase):
 class BookingRead(ORMModel, BookingBase):
     id: int
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+
+# -------------------------
+# Sync reconciliation
+# -------------------------
+class TreeRequest(BaseModel):
+    depth: int = Field(1, ge=1, le=5)
+    prefixes: list[str] = []
+
+
+class RecordsRequest(BaseModel):
+    keys: list[tuple[str, int]]
@@ -0,0 +1,166 @@
+"""Background push/pull against ``API_URL`` while the app is running.
+
+Enabled with ``AUTO_SYNC=true``. One ``httpx.AsyncClient`` is kept for the
+life of the worker, so requests reuse pooled keep-alive connections. Database
+work runs in worker threads via ``asyncio.to_thread`` and never blocks the
+event loop serving requests.
+
+The interval adapts: after a round that moved changes the next one follows
+after ``SYNC_MIN_INTERVAL`` seconds; idle rounds and failures (remote
+offline) double it up to ``SYNC_MAX_INTERVAL``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+
+import httpx
+
+from .. import db
+from . import sync, wire
+
+logger = logging.getLogger(__name__)
+
+MIN_INTERVAL = 5.0
+MAX_INTERVAL = 300.0
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+class SyncWorker:
+    def __init__(
+        self,
+        api: str,
+        *,
+        min_interval: float = MIN_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
+        self.remote = api.rstrip("/")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.format = sync.push_format()
+        self.client = client or httpx.AsyncClient(
+            base_url=self.remote,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2),
+        )
+        self._stop = asyncio.Event()
+
+    # -- database work (runs in threads) --
+
+    def _push_page(self, batch_size: int) -> dict:
+        with db.SessionLocal() as session:
+            cursor = sync.get_checkpoint(session, self.remote, "push")
+            return sync.get_outbox_page(session, cursor, batch_size)
+
+    def _push_checkpoint(self, cursor: int) -> None:
+        with db.SessionLocal() as session:
+            sync.set_checkpoint(session, self.remote, "push", cursor)
+            session.commit()
+
+    def _pull_cursor(self) -> int:
+        with db.SessionLocal() as session:
+            return sync.get_checkpoint(session, self.remote, "pull")
+
+    def _apply_page(self, page: dict) -> int:
+        with db.SessionLocal() as session:
+            return sync.apply_pull_page(session, self.remote, page)
+
+    # -- network --
+
+    async def _post(self, batch: list[dict]) -> None:
+        attempt = sync.PushAttempt(batch, self.format)
+        while True:
+            try:
+                delay = attempt.outcome(await self.client.post("/sync/push", **attempt.request()))
+            except httpx.TransportError as exc:
+                delay = attempt.outcome(exc=exc)
+            self.format = attempt.fmt
+            if delay is None:
+                return
+            if delay:
+                await asyncio.sleep(delay)
+
+    async def push(self) -> int:
+        pushed = 0
+        while True:
+            page = await asyncio.to_thread(self._push_page, sync.PUSH_BATCH_SIZE)
+            for batch in sync.size_bounded(page["changes"], sync.PUSH_BATCH_BYTES):
+                await self._post(batch)
+                await asyncio.to_thread(self._push_checkpoint, batch[-1]["id"])
+                pushed += len(batch)
+            if not page["has_more"]:
+                return pushed
+
+    async def pull(self) -> int:
+        applied = 0
+        while True:
+            cursor = await asyncio.to_thread(self._pull_cursor)
+            resp = await self.client.get(
+                "/sync/pull",
+                params={"after_clock": cursor, "limit": sync.PULL_PAGE_SIZE},
+                headers={"Accept": wire.accept_header()},
+            )
+            resp.raise_for_status()
+            page = sync.read_document(resp)
+            applied += await asyncio.to_thread(self._apply_page, page)
+            if not page.get("has_more") or not page.get("changes"):
+                return applied
+
+    # -- scheduling --
+
+    async def run_once(self) -> int:
+        """One push and pull round; returns the number of changes moved."""
+
+        return await self.push() + await self.pull()
+
+    def _next_interval(self, moved: int | None) -> float:
+        if moved:
+            return self.min_interval
+        # idle or failed: back off, with jitter so devices do not align
+        backed_off = min(self.interval * 2, self.max_interval)
+        return backed_off * random.uniform(0.9, 1.1)
+
+    async def run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                moved: int | None = await self.run_once()
+            except (httpx.HTTPError, sync.PushError) as exc:
+                logger.warning("Auto-sync with %s failed: %s", self.remote, exc)
+                moved = None
+            except Exception:  # keep the worker alive; the next round retries
+                logger.exception("Auto-sync round crashed")
+                moved = None
+            self.interval = self._next_interval(moved)
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self) -> None:
+        self._stop.set()
+        await self.client.aclose()
+
+
+def from_env() -> SyncWorker | None:
+    """A worker for ``API_URL`` when ``AUTO_SYNC`` is on, else ``None``."""
+
+    enabled = os.getenv("AUTO_SYNC", "false").lower() in ("1", "true", "yes", "on")
+    api = os.getenv("API_URL", "").strip()
+    if not enabled:
+        return None
+    if not api:
+        logger.warning("AUTO_SYNC is on but API_URL is empty; auto-sync disabled")
+        return None
+    return SyncWorker(
+        api,
+        min_interval=_env_float("SYNC_MIN_INTERVAL", MIN_INTERVAL),
+        max_interval=_env_float("SYNC_MAX_INTERVAL", MAX_INTERVAL),
+    )
@@ -1,19 +1,146 @@
 # app/services/backups.py
-"""Database backup utilities."""
+"""Database backup utilities.
+
+Backups use SQLite's online backup API rather than copying the file: pages
+are copied a step at a time with the source lock released in between, so
+writers are not blocked, and the copy includes whatever still lives in the
+``-wal`` file. Output can be gzip- or zstd-compressed, and old backups are
+pruned to a daily/weekly retention window.
+"""
 from __future__ import annotations
 
+import gzip
 import os
+import re
 import shutil
+import sqlite3
 from datetime import datetime
 from pathlib import Path
 
-def backup_db() -> Path:
-    db_path = Path(os.getenv("DB_PATH", "./data/astraion.db")).resolve()
+from .. import db
+
+try:  # optional: pip install zstandard
+    import zstandard
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
+
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.005
+COMPRESSIONS = ("none", "gzip", "zstd")
+_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+_NAME_RE = re.compile(r"^(\d{8}-\d{4})\.db(\.gz|\.zst)?$")
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def online_copy(source: Path, target: Path, pages: int = PAGES_PER_STEP) -> None:
+    """Copy a live database to ``target`` with the SQLite backup API."""
+
+    src = sqlite3.connect(f"file:{source.as_posix()}?mode=ro", uri=True)
+    try:
+        dst = sqlite3.connect(target)
+        try:
+            src.backup(dst, pages=pages, sleep=STEP_SLEEP)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+
+def _compress(source: Path, target: Path, method: str) -> None:
+    with open(source, "rb") as fin:
+        if method == "gzip":
+            with gzip.open(target, "wb", compresslevel=6) as fout:
+                shutil.copyfileobj(fin, fout, 1024 * 1024)
+        else:
+            if zstandard is None:
+                raise RuntimeError("zstd compression requires the 'zstandard' package")
+            with open(target, "wb") as raw:
+                with zstandard.ZstdCompressor(level=10).stream_writer(raw) as fout:
+                    shutil.copyfileobj(fin, fout, 1024 * 1024)
+
+
+def backup_db(
+    db_path: Path | str | None = None,
+    backup_dir: Path | str | None = None,
+    *,
+    compress: str | None = None,
+    keep_daily: int | None = None,
+    keep_weekly: int | None = None,
+) -> Path:
+    """Write a consistent backup of the database and prune old ones.
+
+    Defaults come from ``DB_PATH``, ``BACKUP_COMPRESSION`` (none/gzip/zstd),
+    ``BACKUP_KEEP_DAILY`` and ``BACKUP_KEEP_WEEKLY``.
+    """
+
+    db_path = Path(db_path).resolve() if db_path else db.get_db_path()
     if not db_path.exists():
         raise FileNotFoundError(f"Database not found at {db_path}")
-    backups_dir = db_path.parent / "backups"
+    backups_dir = Path(backup_dir) if backup_dir else db_path.parent / "backups"
     backups_dir.mkdir(parents=True, exist_ok=True)
+    method = (compress or os.getenv("BACKUP_COMPRESSION") or "none").lower()
+    if method not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression {method!r}; choose from {COMPRESSIONS}")
+
     ts = datetime.now().strftime("%Y%m%d-%H%M")
-    backup_path = backups_dir / f"{ts}.db"
-    shutil.copy(db_path, backup_path)
+    backup_path = backups_dir / f"{ts}.db{_SUFFIXES[method]}"
+    partial = backups_dir / f".{ts}.db.part"
+    try:
+        online_copy(db_path, partial)
+        if method == "none":
+            partial.replace(backup_path)
+        else:
+            staged = backups_dir / f".{backup_path.name}.part"
+            _compress(partial, staged, method)
+            staged.replace(backup_path)
+    finally:
+        for leftover in backups_dir.glob(f".{ts}.db*.part"):
+            leftover.unlink()
+
+    prune_backups(
+        backups_dir,
+        keep_daily=env_int("BACKUP_KEEP_DAILY", 7) if keep_daily is None else keep_daily,
+        keep_weekly=env_int("BACKUP_KEEP_WEEKLY", 4) if keep_weekly is None else keep_weekly,
+    )
     return backup_path
+
+
+def retained(
+    dated: list[tuple[datetime, Path]], *, keep_daily: int, keep_weekly: int
+) -> set[Path]:
+    """Paths to keep: the newest of each of the last ``keep_daily`` days and of
+    each of the last ``keep_weekly`` ISO weeks, plus the newest overall."""
+
+    dated = sorted(dated, reverse=True)
+    keep: set[Path] = {dated[0][1]} if dated else set()
+    days: set = set()
+    weeks: set = set()
+    for when, path in dated:
+        day, week = when.date(), when.isocalendar()[:2]
+        if day not in days and len(days) < keep_daily:
+            days.add(day)
+            keep.add(path)
+        if week not in weeks and len(weeks) < keep_weekly:
+            weeks.add(week)
+            keep.add(path)
+    return keep
+
+
+def prune_backups(backups_dir: Path, *, keep_daily: int, keep_weekly: int) -> list[Path]:
+    """Apply the retention policy to ``backups_dir``. Returns the deleted paths."""
+
+    found: list[tuple[datetime, Path]] = []
+    for path in backups_dir.iterdir():
+        match = _NAME_RE.match(path.name)
+        if match:
+            found.append((datetime.strptime(match.group(1), "%Y%m%d-%H%M"), path))
+
+    keep = retained(found, keep_daily=keep_daily, keep_weekly=keep_weekly)
+    removed = [path for _, path in found if path not in keep]
+    for path in removed:
+        path.unlink()
+    return removed
@@ -1,11 +1,14 @@
 """Duplicate detection and merging utilities."""
 from __future__ import annotations
 
-from datetime import date
-from typing import List, Tuple
+import math
+from functools import lru_cache
+from typing import Iterable, Iterator, Sequence
 
+import numpy as np
+from rapidfuzz import process
 from rapidfuzz.fuzz import token_sort_ratio
-from sqlalchemy import select
+from sqlalchemy import and_, delete, func, or_, select, union
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
@@ -29,26 +32,336 @@ def normalized_email(email: str) -> str:
 def _full_name(first: str | None, last: str | None) -> str:
     return " ".join([first or "", last or ""]).strip()
 
+
+# ---------------------------------------------------------------------------
+# Candidate blocking
+# ---------------------------------------------------------------------------
+NAME_THRESHOLD = 0.85
+_GRAM_START = "\x02"
+_GRAM_END = "\x03"
+
+
+def _sorted_name(name: str) -> str:
+    """Token-sorted form of a name, as compared by ``token_sort_ratio``."""
+
+    return " ".join(sorted(name.split()))
+
+
+def _name_grams(name: str) -> list[str]:
+    """Padded bigrams of the token-sorted name (may contain repeats)."""
+
+    padded = f"{_GRAM_START}{_sorted_name(name)}{_GRAM_END}"
+    return [padded[i : i + 2] for i in range(len(padded) - 1)]
+
+
+def _phone_key(normalized: str | None) -> str | None:
+    """The whole normalized number without its ``+``.
+
+    The phone rule only matches equal normalized numbers, so the full number
+    blocks exactly; a shorter suffix key would only add candidates to reject.
+    """
+
+    return normalized.lstrip("+") if normalized else None
+
+
+@lru_cache(maxsize=512)
+def _min_shared_grams(length: int) -> int:
+    """Lower bound on bigrams shared with any name scoring >= NAME_THRESHOLD.
+
+    Two strings with Indel distance ``d`` and total length ``S`` have a common
+    subsequence of ``(S - d) / 2`` characters, and every unmatched character
+    breaks at most one of the padded bigrams along it, so at least
+    ``(S - 3d) / 2 + 1`` bigrams are shared. The bound is minimised over every
+    other-length that could still reach the threshold.
+    """
+
+    best: float | None = None
+    for other in range(2 * length + 3):
+        total = length + other
+        max_dist = math.floor((1 - NAME_THRESHOLD) * total + 1e-9)
+        if abs(length - other) > max_dist:
+            continue
+        bound = (total - 3 * max_dist) / 2 + 1
+        best = bound if best is None else min(best, bound)
+    return max(1, math.ceil(best)) if best is not None else 1
+
+
+def blocking_keys(
+    first_name: str | None,
+    last_name: str | None,
+    email: str | None,
+    normalized_phone: str | None,
+) -> set[tuple[str, str]]:
+    """Return the ``(kind, key)`` pairs a client is indexed under."""
+
+    keys = {("gram", g) for g in _name_grams(_full_name(first_name, last_name))}
+    if email:
+        keys.add(("email", email.lower()))
+    phone = _phone_key(normalized_phone)
+    if phone:
+        keys.add(("phone", phone))
+    return keys
+
+
+def index_client(db: Session, client: models.Client) -> None:
+    """Synchronise a client's blocking keys with its current fields.
+
+    The client must have an id (flush first). The caller commits.
+    """
+
+    wanted = blocking_keys(
+        client.first_name, client.last_name, client.email, client.normalized_phone
+    )
+    current = {(k.kind, k.key): k for k in client.blocking_keys}
+    for pair, row in current.items():
+        if pair not in wanted:
+            client.blocking_keys.remove(row)
+    for kind, key in wanted - current.keys():
+        client.blocking_keys.append(models.ClientBlockingKey(kind=kind, key=key))
+
+
+def reindex_clients(
+    db: Session, clients: Iterable[tuple[int, str | None, str | None, str | None, str | None]]
+) -> None:
+    """Replace the blocking keys of many clients with two bulk statements.
+
+    ``clients`` yields ``(id, first_name, last_name, email, normalized_phone)``.
+    Session-side ``blocking_keys`` collections are not refreshed.
+    """
+
+    rows = list(clients)
+    if not rows:
+        return
+    db.execute(
+        delete(models.ClientBlockingKey).where(
+            models.ClientBlockingKey.client_id.in_([row[0] for row in rows])
+        )
+    )
+    keys = [
+        {"client_id": cid, "kind": kind, "key": key}
+        for cid, first, last, email, phone in rows
+        for kind, key in blocking_keys(first, last, email, phone)
+    ]
+    if keys:
+        db.execute(models.ClientBlockingKey.__table__.insert(), keys)
+
+
+def rebuild_blocking_index(db: Session, batch_size: int = 1000) -> int:
+    """Recreate the blocking index for every client. Returns clients indexed."""
+
+    db.execute(delete(models.ClientBlockingKey))
+    table = models.ClientBlockingKey.__table__
+    stmt = select(
+        models.Client.id,
+        models.Client.first_name,
+        models.Client.last_name,
+        models.Client.email,
+        models.Client.normalized_phone,
+    ).execution_options(yield_per=batch_size)
+    count = 0
+    for partition in db.execute(stmt).partitions():
+        rows = [
+            {"client_id": cid, "kind": kind, "key": key}
+            for cid, first, last, email, phone in partition
+            for kind, key in blocking_keys(first, last, email, phone)
+        ]
+        if rows:
+            db.execute(table.insert(), rows)
+        count += len(partition)
+    db.commit()
+    return count
+
+
+def ensure_blocking_index(db: Session) -> None:
+    """Build the index for databases created before it existed."""
+
+    has_keys = db.execute(select(models.ClientBlockingKey.id).limit(1)).first()
+    has_clients = db.execute(select(models.Client.id).limit(1)).first()
+    if has_clients and not has_keys:
+        rebuild_blocking_index(db)
+
+
+def _candidate_ids(cand_email: str, cand_phone: str | None, cand_name: str):
+    """Subquery of client ids that could score >= NAME_THRESHOLD."""
+
+    Key = models.ClientBlockingKey
+    grams = _name_grams(cand_name)
+    distinct = set(grams)
+    needed = max(
+        1, _min_shared_grams(len(_sorted_name(cand_name))) - (len(grams) - len(distinct))
+    )
+    by_name = (
+        select(Key.client_id)
+        .where(Key.kind == "gram", Key.key.in_(distinct))
+        .group_by(Key.client_id)
+        .having(func.count() >= needed)
+    )
+    exact = []
+    if cand_email:
+        exact.append(and_(Key.kind == "email", Key.key == cand_email))
+    phone = _phone_key(cand_phone)
+    if phone:
+        exact.append(and_(Key.kind == "phone", Key.key == phone))
+    if not exact:
+        return by_name
+    return union(by_name, select(Key.client_id).where(or_(*exact)))
+
+
+def _score(
+    client: models.Client, cand_email: str, cand_phone: str | None, cand_name: str
+) -> float:
+    # Exact email = certain duplicate
+    if client.email and cand_email and client.email.lower() == cand_email:
+        return 1.0
+    score = 0.0
+    if cand_phone and client.normalized_phone and cand_phone == client.normalized_phone:
+        score = 0.9
+    name_score = (
+        token_sort_ratio(cand_name, _full_name(client.first_name, client.last_name))
+        / 100.0
+    )
+    return max(score, name_score)
+
+
 def find_potential_duplicates(db: Session, candidate: schemas.ClientCreate):
     cand_email = (candidate.email or "").lower()
     cand_phone = normalize_phone(candidate.phone)
     cand_name  = _full_name(candidate.first_name, candidate.last_name)
 
+    ids = _candidate_ids(cand_email, cand_phone, cand_name)
+    stmt = (
+        select(models.Client)
+        .where(models.Client.id.in_(ids))
+        .order_by(models.Client.id)
+    )
     results: list[tuple[models.Client, float]] = []
-    for c in db.execute(select(models.Client)).scalars():
-        score = 0.0
-        # Exact email = certain duplicate
-        if c.email and cand_email and c.email.lower() == cand_email:
-            score = 1.0
-        else:
-            if cand_phone and c.normalized_phone and cand_phone == c.normalized_phone:
-                score = max(score, 0.9)
-            name_score = token_sort_ratio(cand_name, _full_name(c.first_name, c.last_name)) / 100.0
-            score = max(score, name_score)
-
-        if score >= 0.85:
+    for c in db.execute(stmt).scalars():
+        score = _score(c, cand_email, cand_phone, cand_name)
+        if score >= NAME_THRESHOLD:
             results.append((c, score))
     return sorted(results, key=lambda x: x[1], reverse=True)
+
+
+# ---------------------------------------------------------------------------
+# Batch scoring
+# ---------------------------------------------------------------------------
+# Upper bound on candidate x corpus cells scored per cdist call (~64 MB float64).
+_BATCH_CELLS = 8_000_000
+
+
+def find_duplicates_batch(
+    db: Session,
+    candidates: Sequence[schemas.ClientCreate],
+    *,
+    threshold: float = NAME_THRESHOLD,
+    limit: int | None = None,
+) -> list[list[tuple[int, float]]]:
+    """Score many candidates against every client in one vectorised pass.
+
+    Name similarity comes from ``process.cdist`` over all cores; the exact
+    email (1.0) and phone (0.9) rules are fused in as boolean masks. Returns,
+    per candidate, ``(client_id, score)`` pairs ranked best first, with the
+    same scores and tie order as ``find_potential_duplicates``.
+    """
+
+    if not candidates:
+        return []
+    rows = db.execute(
+        select(
+            models.Client.id,
+            models.Client.first_name,
+            models.Client.last_name,
+            models.Client.email,
+            models.Client.normalized_phone,
+        ).order_by(models.Client.id)
+    ).all()
+    if not rows:
+        return [[] for _ in candidates]
+
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    corpus = [_full_name(r[1], r[2]) for r in rows]
+    emails = np.array([(r[3] or "").lower() for r in rows], dtype=object)
+    phones = np.array([r[4] or "" for r in rows], dtype=object)
+
+    cand_names = [_full_name(c.first_name, c.last_name) for c in candidates]
+    cand_emails = np.array([(c.email or "").lower() for c in candidates], dtype=object)
+    cand_phones = np.array([normalize_phone(c.phone) or "" for c in candidates], dtype=object)
+
+    results: list[list[tuple[int, float]]] = []
+    step = max(1, _BATCH_CELLS // len(rows))
+    for start in range(0, len(candidates), step):
+        stop = start + step
+        scores = process.cdist(
+            cand_names[start:stop],
+            corpus,
+            scorer=token_sort_ratio,
+            dtype=np.float64,
+            workers=-1,
+        ) / 100.0
+        ce = cand_emails[start:stop, None]
+        cp = cand_phones[start:stop, None]
+        phone_hit = (cp != "") & (cp == phones[None, :])
+        email_hit = (ce != "") & (ce == emails[None, :])
+        scores = np.where(phone_hit, np.maximum(scores, 0.9), scores)
+        scores = np.where(email_hit, 1.0, scores)
+
+        for row in scores:
+            hits = np.flatnonzero(row >= threshold)
+            order = hits[np.argsort(-row[hits], kind="stable")]
+            if limit is not None:
+                order = order[:limit]
+            results.append([(int(ids[i]), float(row[i])) for i in order])
+    return results
+
+
+_CANDIDATE_FIELDS = {"first_name", "last_name", "email", "phone", "dob"}
+
+
+def _read_candidates(path: str) -> Iterator[schemas.ClientCreate]:
+    import csv
+    import json
+
+    with open(path, newline="", encoding="utf-8") as fh:
+        if path.endswith((".jsonl", ".ndjson")):
+            records = (json.loads(line) for line in fh if line.strip())
+        else:
+            records = csv.DictReader(fh)
+        for record in records:
+            yield schemas.ClientCreate(
+                **{k: (v or None) for k, v in record.items() if k in _CANDIDATE_FIELDS}
+            )
+
+
+def main() -> None:
+    """CLI: check a CSV/JSONL file of clients against the client table."""
+
+    import argparse
+    import json
+
+    from .. import db as _db
+
+    parser = argparse.ArgumentParser(description="Batch duplicate check")
+    parser.add_argument("path", help="CSV or JSONL file of candidate clients")
+    parser.add_argument("--threshold", type=float, default=NAME_THRESHOLD)
+    parser.add_argument("--limit", type=int, default=5, help="Matches per candidate")
+    args = parser.parse_args()
+
+    candidates = list(_read_candidates(args.path))
+    with _db.SessionLocal() as session:
+        matches = find_duplicates_batch(
+            session, candidates, threshold=args.threshold, limit=args.limit
+        )
+    for row, ranked in enumerate(matches, start=1):
+        print(
+            json.dumps(
+                {
+                    "row": row,
+                    "matches": [{"id": cid, "score": round(score, 4)} for cid, score in ranked],
+                }
+            )
+        )
+
+
 def _name_preference(n1: str | None, n2: str | None) -> str | None:
     """Choose better name preferring non-empty and longer tokenized strings."""
 
@@ -102,6 +415,7 @@ def merge_clients(db: Session, a: models.Client, b: models.Client) -> models.Cli
         booking.client = survivor
 
     db.delete(duplicate)
+    index_client(db, survivor)
     audit.log_action(
         db,
         action="merge",
@@ -113,3 +427,7 @@ def merge_clients(db: Session, a: models.Client, b: models.Client) -> models.Cli
     db.commit()
     db.refresh(survivor)
     return survivor
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry
+    main()
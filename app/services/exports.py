@@ -0,0 +1,386 @@
+"""Streaming exports of clients, trips and bookings.
+
+Rows come from a Core ``select`` executed with ``stream_results`` and
+``yield_per``, so no ORM objects or identity map are involved and only one
+batch of rows is in memory at a time. Writers buffer their output and hand
+it on in chunks of about ``CHUNK_SIZE`` bytes, which keeps memory flat for
+exports of any length.
+
+Formats:
+
+* ``csv``: UTF-8, header row first.
+* ``xlsx``: a single-sheet workbook written with :mod:`zipfile`, with inline
+  strings and no styles. The zip is streamed, so it needs no temporary file.
+* ``parquet`` and ``arrow`` (Arrow IPC stream): one record batch per row
+  batch. Both need the optional ``pyarrow`` package.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Callable, Iterable, Iterator
+from xml.sax.saxutils import escape
+
+from sqlalchemy import Date, DateTime, Integer, Select, select
+from sqlalchemy.engine import Connection
+
+from .. import models
+from . import search
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depends on environment
+    pa = pq = None
+
+CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 2000
+
+
+class ExportError(ValueError):
+    """Unknown dataset or format, or a format whose dependency is missing."""
+
+
+# ----- datasets -----
+
+
+def _clients(conn: Connection, q: str = "", limit: int | None = None) -> Select:
+    c = models.Client
+    stmt = select(
+        c.id, c.first_name, c.last_name, c.email, c.phone, c.dob, c.created_at
+    )
+    if q and search.can_search(conn, q):
+        hits = search.ranked_matches(q, limit)
+        return stmt.join(hits, c.id == hits.c.id).order_by(hits.c.rank)
+    if q:
+        pattern = f"%{q.lower()}%"
+        stmt = stmt.where(
+            c.first_name.ilike(pattern)
+            | c.last_name.ilike(pattern)
+            | c.email.ilike(pattern)
+            | c.phone.ilike(pattern)
+        )
+    return stmt.order_by(c.created_at.desc(), c.id.desc()).limit(limit)
+
+
+def _trips(conn: Connection, q: str = "", limit: int | None = None) -> Select:
+    t = models.Trip
+    return (
+        select(
+            t.id, t.name, t.destination, t.start_date, t.end_date, t.notes, t.created_at
+        )
+        .order_by(t.created_at.desc(), t.id.desc())
+        .limit(limit)
+    )
+
+
+def _bookings(conn: Connection, q: str = "", limit: int | None = None) -> Select:
+    b, c, t = models.Booking, models.Client, models.Trip
+    return (
+        select(
+            b.id,
+            b.client_id,
+            (c.first_name + " " + c.last_name).label("client_name"),
+            b.trip_id,
+            t.name.label("trip_name"),
+            b.status,
+            b.notes,
+            b.created_at,
+        )
+        .join(c, c.id == b.client_id)
+        .join(t, t.id == b.trip_id)
+        .order_by(b.created_at.desc(), b.id.desc())
+        .limit(limit)
+    )
+
+
+DATASETS: dict[str, Callable[..., Select]] = {
+    "clients": _clients,
+    "trips": _trips,
+    "bookings": _bookings,
+}
+
+
+def iter_batches(
+    conn: Connection, stmt: Select, batch_size: int = BATCH_SIZE
+) -> Iterator[list]:
+    """Rows of ``stmt`` as plain tuples, ``batch_size`` at a time.
+
+    The rows come from a streaming cursor.
+    """
+
+    result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+        stmt
+    )
+    for partition in result.partitions():
+        yield [tuple(row) for row in partition]
+
+
+# ----- writers -----
+
+
+class _Sink:
+    """Write-only, unseekable file object that collects bytes until they are taken."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+        self.position = 0
+
+    def write(self, data) -> int:
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def take(self, at_least: int = 0) -> bytes | None:
+        if len(self.buffer) < max(at_least, 1):
+            return None
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def write_csv(columns: list[str], batches: Iterable[list]) -> Iterator[bytes]:
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    for batch in batches:
+        for row in batch:
+            writer.writerow([_cell(v) for v in row])
+            if text.tell() >= CHUNK_SIZE:
+                yield text.getvalue().encode()
+                text.seek(0)
+                text.truncate(0)
+    if text.tell():
+        yield text.getvalue().encode()
+
+
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+_PKG = "http://schemas.openxmlformats.org/package/2006"
+_DOC_RELS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_SHEET_ML = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        f'{_XML_DECL}<Types xmlns="{_PKG}/content-types">'
+        '<Default Extension="rels" '
+        'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        f'ContentType="{_SHEET_ML}.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        f'ContentType="{_SHEET_ML}.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        f'{_XML_DECL}<Relationships xmlns="{_PKG}/relationships">'
+        f'<Relationship Id="rId1" Type="{_DOC_RELS}/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        f'{_XML_DECL}<Relationships xmlns="{_PKG}/relationships">'
+        f'<Relationship Id="rId1" Type="{_DOC_RELS}/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+
+def _xlsx_workbook(sheet: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{escape(sheet[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    )
+
+
+def _xlsx_row(values: Iterable[Any]) -> str:
+    cells = []
+    for value in values:
+        if value is None:
+            cells.append("<c/>")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f"<c><v>{value}</v></c>")
+        else:
+            cells.append(f'<c t="inlineStr"><is><t>{escape(_cell(value))}</t></is></c>')
+    return "<row>" + "".join(cells) + "</row>"
+
+
+def write_xlsx(
+    columns: list[str], batches: Iterable[list], sheet: str = "Export"
+) -> Iterator[bytes]:
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, body in _XLSX_STATIC.items():
+            zf.writestr(name, body)
+        zf.writestr("xl/workbook.xml", _xlsx_workbook(sheet))
+        with zf.open("xl/worksheets/sheet1.xml", "w") as part:
+            part.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b"<sheetData>"
+            )
+            part.write(_xlsx_row(columns).encode())
+            for batch in batches:
+                part.write("".join(_xlsx_row(row) for row in batch).encode())
+                if (chunk := sink.take(CHUNK_SIZE)) is not None:
+                    yield chunk
+            part.write(b"</sheetData></worksheet>")
+    if (chunk := sink.take()) is not None:
+        yield chunk
+
+
+def _arrow_schema(stmt: Select):
+    fields = []
+    for col in stmt.selected_columns:
+        if isinstance(col.type, Integer):
+            kind = pa.int64()
+        elif isinstance(col.type, DateTime):
+            kind = pa.timestamp("us")
+        elif isinstance(col.type, Date):
+            kind = pa.date32()
+        else:
+            kind = pa.string()
+        fields.append(pa.field(col.name, kind))
+    return pa.schema(fields)
+
+
+def _write_arrow(stmt: Select, batches: Iterable[list], open_writer) -> Iterator[bytes]:
+    if pa is None:
+        raise ExportError("parquet and arrow exports need the 'pyarrow' package")
+    schema = _arrow_schema(stmt)
+    sink = _Sink()
+    writer = open_writer(sink, schema)
+    for batch in batches:
+        columns = list(zip(*batch)) or [[] for _ in schema]
+        writer.write_batch(pa.record_batch([list(c) for c in columns], schema=schema))
+        if (chunk := sink.take(CHUNK_SIZE)) is not None:
+            yield chunk
+    writer.close()
+    if (chunk := sink.take()) is not None:
+        yield chunk
+
+
+@dataclass(frozen=True)
+class Format:
+    media_type: str
+    extension: str
+
+
+FORMATS = {
+    "csv": Format("text/csv", "csv"),
+    "xlsx": Format(
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"
+    ),
+    "parquet": Format("application/vnd.apache.parquet", "parquet"),
+    "arrow": Format("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+
+def formats() -> list[str]:
+    """Formats this install can write."""
+
+    return [name for name in FORMATS if pa is not None or name in ("csv", "xlsx")]
+
+
+def check(dataset: str, fmt: str) -> Format:
+    """The :class:`Format` for ``fmt``.
+
+    Raises :class:`ExportError` if ``dataset`` cannot be exported as ``fmt``.
+    """
+
+    if dataset not in DATASETS:
+        raise ExportError(f"unknown dataset {dataset!r}")
+    if fmt not in FORMATS:
+        raise ExportError(f"unknown format {fmt!r}")
+    if fmt not in formats():
+        raise ExportError(f"{fmt} exports need the 'pyarrow' package")
+    return FORMATS[fmt]
+
+
+def export(
+    conn: Connection,
+    dataset: str,
+    fmt: str = "csv",
+    *,
+    q: str = "",
+    limit: int | None = None,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[bytes]:
+    """Chunks of ``dataset`` encoded as ``fmt``.
+
+    ``conn`` must stay open while iterating.
+    """
+
+    check(dataset, fmt)
+    stmt = DATASETS[dataset](conn, q, limit)
+    columns = [col.name for col in stmt.selected_columns]
+    batches = iter_batches(conn, stmt, batch_size)
+    if fmt == "csv":
+        return write_csv(columns, batches)
+    if fmt == "xlsx":
+        return write_xlsx(columns, batches, sheet=dataset)
+    if fmt == "parquet":
+        return _write_arrow(
+            stmt, batches, lambda sink, schema: pq.ParquetWriter(sink, schema)
+        )
+    return _write_arrow(
+        stmt, batches, lambda sink, schema: pa.ipc.new_stream(sink, schema)
+    )
+
+
+def main() -> None:
+    """CLI entry point: export a dataset to a file for reporting jobs."""
+
+    import argparse
+
+    from .. import db
+
+    parser = argparse.ArgumentParser(description="Export clients, trips or bookings")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("--format", default="csv", choices=sorted(FORMATS))
+    parser.add_argument("-o", "--output", help="Output path (default: <dataset>.<ext>)")
+    parser.add_argument("-q", default="", help="Filter clients by search text")
+    parser.add_argument("--limit", type=int)
+    args = parser.parse_args()
+
+    try:
+        spec = check(args.dataset, args.format)
+    except ExportError as exc:
+        parser.error(str(exc))
+    output = args.output or f"{args.dataset}.{spec.extension}"
+    written = 0
+    with db.get_read_engine().connect() as conn, open(output, "wb") as fh:
+        for chunk in export(
+            conn, args.dataset, args.format, q=args.q, limit=args.limit
+        ):
+            fh.write(chunk)
+            written += len(chunk)
+    print(f"Wrote {written} bytes to {output}")
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry
+    main()
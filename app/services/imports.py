@@ -0,0 +1,263 @@
+"""Bulk client import from CSV or JSONL files."""
+from __future__ import annotations
+
+import csv
+import json
+import uuid
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from . import dedupe, sync
+from .phone import normalize_phone
+
+CLIENT_FIELDS = ("first_name", "last_name", "email", "phone", "dob")
+
+
+@dataclass
+class ImportResult:
+    """Summary of an import run."""
+
+    total: int = 0
+    inserted: int = 0
+    failed: int = 0
+    report_path: Path | None = None
+
+
+def detect_format(filename: str | None) -> str:
+    name = (filename or "").lower()
+    return "jsonl" if name.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def iter_records(stream: TextIO, fmt: str = "csv") -> Iterator[tuple[int, dict]]:
+    """Yield ``(line_number, record)`` pairs without reading the whole file."""
+
+    if fmt == "jsonl":
+        for lineno, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield lineno, {"__error__": f"invalid JSON: {exc.msg}"}
+                continue
+            yield lineno, record if isinstance(record, dict) else {"__error__": "not an object"}
+    else:
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    it = iter(items)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+class _Report:
+    """Lazily-opened CSV file collecting rejected rows."""
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self._fh = None
+        self._writer = None
+
+    def add(self, lineno: int, error: str, record: dict) -> None:
+        if self.path is None:
+            return
+        if self._writer is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._fh)
+            self._writer.writerow(["line", "error", "record"])
+        clean = {k: v for k, v in record.items() if k != "__error__"}
+        self._writer.writerow([lineno, error, json.dumps(clean, default=str)])
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+
+
+def _validate(lineno: int, record: dict) -> schemas.ClientCreate | str:
+    if "__error__" in record:
+        return record["__error__"]
+    data = {k: (record.get(k) or None) for k in CLIENT_FIELDS}
+    try:
+        return schemas.ClientCreate.model_validate(data)
+    except ValidationError as exc:
+        return "; ".join(
+            f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" for e in exc.errors()
+        )
+
+
+def _existing(db: Session, column, values: set[str]) -> set[str]:
+    found: set[str] = set()
+    for chunk in _chunks(values, 500):
+        found.update(db.execute(select(column).where(column.in_(chunk))).scalars())
+    return found
+
+
+def import_clients(
+    db: Session,
+    stream: TextIO,
+    *,
+    fmt: str = "csv",
+    report_path: Path | None = None,
+    chunk_size: int = 10_000,
+    fuzzy: bool = False,
+) -> ImportResult:
+    """Validate, de-duplicate and bulk insert clients from ``stream``.
+
+    Rows are handled ``chunk_size`` at a time, one transaction per chunk.
+    Rows whose email or phone already exist (in the table or earlier in the
+    file) are rejected; with ``fuzzy`` the name-similarity check from
+    ``dedupe.find_duplicates_batch`` is applied as well. Rejected rows are
+    written to ``report_path``.
+    """
+
+    result = ImportResult(report_path=report_path)
+    report = _Report(report_path)
+    seen_emails: set[str] = set()
+    seen_phones: set[str] = set()
+    try:
+        for chunk in _chunks(iter_records(stream, fmt), chunk_size):
+            result.total += len(chunk)
+            valid: list[tuple[int, dict, schemas.ClientCreate, str | None, str | None]] = []
+            for lineno, record in chunk:
+                parsed = _validate(lineno, record)
+                if isinstance(parsed, str):
+                    report.add(lineno, parsed, record)
+                    continue
+                email = parsed.email.lower() if parsed.email else None
+                phone = normalize_phone(parsed.phone)
+                valid.append((lineno, record, parsed, email, phone))
+
+            taken_emails = _existing(
+                db, models.Client.email, {v[3] for v in valid if v[3]}
+            )
+            taken_phones = _existing(
+                db, models.Client.normalized_phone, {v[4] for v in valid if v[4]}
+            )
+            accepted = []
+            for item in valid:
+                lineno, record, parsed, email, phone = item
+                if email and (email in taken_emails or email in seen_emails):
+                    report.add(lineno, f"duplicate email {email}", record)
+                elif phone and (phone in taken_phones or phone in seen_phones):
+                    report.add(lineno, f"duplicate phone {parsed.phone}", record)
+                else:
+                    if email:
+                        seen_emails.add(email)
+                    if phone:
+                        seen_phones.add(phone)
+                    accepted.append(item)
+
+            if fuzzy and accepted:
+                matches = dedupe.find_duplicates_batch(
+                    db, [item[2] for item in accepted], limit=1
+                )
+                kept = []
+                for item, ranked in zip(accepted, matches):
+                    if ranked:
+                        client_id, score = ranked[0]
+                        report.add(
+                            item[0],
+                            f"possible duplicate of client {client_id} (score {score:.2f})",
+                            item[1],
+                        )
+                    else:
+                        kept.append(item)
+                accepted = kept
+
+            result.inserted += _insert_chunk(db, accepted)
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        report.close()
+    result.failed = result.total - result.inserted
+    return result
+
+
+def _insert_chunk(db: Session, accepted: list) -> int:
+    if not accepted:
+        return 0
+    rows = [
+        {
+            "uuid": str(uuid.uuid4()),
+            "first_name": parsed.first_name,
+            "last_name": parsed.last_name,
+            "email": email,
+            "phone": parsed.phone,
+            "normalized_phone": phone,
+            "dob": parsed.dob,
+        }
+        for _, _, parsed, email, phone in accepted
+    ]
+    clients = models.Client.__table__
+    stmt = clients.insert().returning(clients.c.id, sort_by_parameter_order=True)
+    ids = db.execute(stmt, rows).scalars().all()
+    keys = [
+        {"client_id": client_id, "kind": kind, "key": key}
+        for client_id, row in zip(ids, rows)
+        for kind, key in dedupe.blocking_keys(
+            row["first_name"], row["last_name"], row["email"], row["normalized_phone"]
+        )
+    ]
+    db.execute(models.ClientBlockingKey.__table__.insert(), keys)
+    sync.enqueue_many(
+        db,
+        (
+            {
+                "entity": "client",
+                "entity_id": client_id,
+                "op": "create",
+                "payload": sync.to_payload({"id": client_id, **row}),
+            }
+            for client_id, row in zip(ids, rows)
+        ),
+    )
+    return len(ids)
+
+
+def main() -> None:
+    """CLI entry point for importing clients from a file."""
+
+    import argparse
+
+    from .. import db as _db
+
+    parser = argparse.ArgumentParser(description="Import clients from CSV/JSONL")
+    parser.add_argument("path", help="CSV or JSONL file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Override detection")
+    parser.add_argument("--report", help="Where to write rejected rows (CSV)")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument(
+        "--fuzzy", action="store_true", help="Also reject fuzzy name matches"
+    )
+    args = parser.parse_args()
+
+    report = Path(args.report) if args.report else Path(args.path).with_suffix(".errors.csv")
+    with open(args.path, newline="", encoding="utf-8-sig") as fh, _db.SessionLocal() as session:
+        result = import_clients(
+            session,
+            fh,
+            fmt=args.format or detect_format(args.path),
+            report_path=report,
+            chunk_size=args.chunk_size,
+            fuzzy=args.fuzzy,
+        )
+    print(f"{result.inserted}/{result.total} imported, {result.failed} rejected")
+    if result.failed:
+        print(f"Report: {report}")
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry
+    main()
@@ -0,0 +1,368 @@
+"""Request timing and SQL profiling, exposed at ``/admin/metrics``.
+
+Enabled with ``PERF_METRICS=true``. Nothing is installed otherwise: no
+middleware, no engine events, no template subclass. Disabled pages therefore
+pay nothing beyond one environment lookup at startup.
+
+When enabled, :func:`install` adds:
+
+* an ASGI middleware that times every request into a latency histogram per
+  method and route template (``/clients/{client_id}``, not the raw path);
+* ``before_cursor_execute``/``after_cursor_execute`` hooks on every
+  ``Engine``, counting statements and their time against the request that
+  issued them. SELECTs slower than ``PERF_SLOW_MS`` (default 100) are kept
+  with their ``EXPLAIN QUERY PLAN``;
+* a timed ``jinja2.Template`` class, so page renders are measured per
+  template.
+
+The request is tracked in a context variable. Starlette copies the context
+into threadpool workers, so sync handlers and ``run_sync`` work are counted
+too.
+"""
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import jinja2
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Prometheus' default buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_SLOW_MS = 100.0
+SLOW_KEEP = 50
+_EXPLAINABLE = ("SELECT", "WITH")
+
+
+def enabled() -> bool:
+    return os.getenv("PERF_METRICS", "").lower() in {"1", "true", "yes", "on"}
+
+
+def _slow_threshold() -> float:
+    value = os.getenv("PERF_SLOW_MS")
+    return (float(value) if value else DEFAULT_SLOW_MS) / 1000
+
+
+@dataclass
+class Histogram:
+    counts: list[int] = field(default_factory=lambda: [0] * len(BUCKETS))
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def cumulative(self) -> list[int]:
+        out, running = [], 0
+        for n in self.counts:
+            running += n
+            out.append(running)
+        return out
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+
+        if not self.count:
+            return 0.0
+        for bound, n in zip(BUCKETS, self.cumulative()):
+            if n >= q * self.count:
+                return bound
+        return self.max
+
+
+@dataclass
+class RouteStats:
+    latency: Histogram = field(default_factory=Histogram)
+    statuses: dict[int, int] = field(default_factory=dict)
+    queries: int = 0
+    sql_seconds: float = 0.0
+    render_seconds: float = 0.0
+
+
+@dataclass
+class SlowQuery:
+    route: str
+    seconds: float
+    statement: str
+    plan: list[str]
+    at: float = field(default_factory=time.time)
+
+
+@dataclass
+class _Request:
+    queries: int = 0
+    sql_seconds: float = 0.0
+    render_seconds: float = 0.0
+    scope: dict = field(default_factory=dict)
+
+
+_lock = threading.Lock()
+_routes: dict[tuple[str, str], RouteStats] = {}
+_templates: dict[str, Histogram] = {}
+_slow: deque[SlowQuery] = deque(maxlen=SLOW_KEEP)
+_current: contextvars.ContextVar[_Request | None] = contextvars.ContextVar(
+    "perf_request", default=None
+)
+_installed = False
+
+
+def reset() -> None:
+    """Forget everything recorded so far."""
+
+    with _lock:
+        _routes.clear()
+        _templates.clear()
+        _slow.clear()
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # mounts (static files) set root_path; anything else did not match
+    return scope.get("root_path") or "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; streamed bodies are timed until the last chunk."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        current = _Request(scope=scope)
+        token = _current.set(current)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            key = (scope["method"], _route_label(scope))
+            with _lock:
+                stats = _routes.get(key)
+                if stats is None:
+                    stats = _routes[key] = RouteStats()
+                stats.latency.observe(elapsed)
+                stats.statuses[status] = stats.statuses.get(status, 0) + 1
+                stats.queries += current.queries
+                stats.sql_seconds += current.sql_seconds
+                stats.render_seconds += current.render_seconds
+
+
+# ----- SQL -----
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("perf_started", []).append(time.perf_counter())
+
+
+def _explain(conn, statement: str, parameters) -> list[str]:
+    # a second cursor on the same DBAPI connection; going through ``conn``
+    # would fire these hooks again
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception as exc:  # the plan is a diagnostic; never fail the query
+        return [f"(no plan: {exc})"]
+    finally:
+        cursor.close()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("perf_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    current = _current.get()
+    if current is not None:
+        current.queries += 1
+        current.sql_seconds += elapsed
+    if elapsed < _slow_threshold():
+        return
+    if executemany or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        plan = []
+    else:
+        plan = _explain(conn, statement, parameters)
+    slow = SlowQuery(
+        _route_label(current.scope) if current else "", elapsed, statement, plan
+    )
+    with _lock:
+        _slow.appendleft(slow)
+
+
+# ----- templates -----
+
+
+class TimedTemplate(jinja2.Template):
+    """Records how long each top-level ``render`` takes."""
+
+    def render(self, *args, **kwargs) -> str:
+        start = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            current = _current.get()
+            if current is not None:
+                current.render_seconds += elapsed
+            with _lock:
+                hist = _templates.get(self.name or "<string>")
+                if hist is None:
+                    hist = _templates[self.name or "<string>"] = Histogram()
+                hist.observe(elapsed)
+
+
+def instrument_templates(*environments: jinja2.Environment) -> None:
+    """Time renders from these environments (call before templates load)."""
+
+    for env in environments:
+        env.template_class = TimedTemplate
+        if env.cache is not None:
+            env.cache.clear()
+
+
+def install(app, environments=()) -> None:
+    """Add the middleware to ``app`` and hook every engine and ``environments``."""
+
+    global _installed
+    app.add_middleware(MetricsMiddleware)
+    instrument_templates(*environments)
+    if not _installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _installed = True
+
+
+# ----- reporting -----
+
+
+@dataclass
+class Snapshot:
+    routes: dict[tuple[str, str], RouteStats]
+    templates: dict[str, Histogram]
+    slow: list[SlowQuery]
+
+
+def snapshot() -> Snapshot:
+    """A consistent copy of the recorded figures."""
+
+    with _lock:
+        routes = {
+            key: RouteStats(
+                Histogram(
+                    list(s.latency.counts),
+                    s.latency.count,
+                    s.latency.total,
+                    s.latency.max,
+                ),
+                dict(s.statuses),
+                s.queries,
+                s.sql_seconds,
+                s.render_seconds,
+            )
+            for key, s in _routes.items()
+        }
+        templates = {
+            name: Histogram(list(h.counts), h.count, h.total, h.max)
+            for name, h in _templates.items()
+        }
+        return Snapshot(routes, templates, list(_slow))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _histogram(lines: list[str], name: str, hist: Histogram, **labels: str) -> None:
+    for bound, n in zip(BUCKETS, hist.cumulative()):
+        lines.append(f"{name}_bucket{_labels(**labels, le=repr(bound))} {n}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {hist.count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {hist.total:.6f}")
+    lines.append(f"{name}_count{_labels(**labels)} {hist.count}")
+
+
+def render_prometheus(snap: Snapshot | None = None) -> str:
+    """The figures in the Prometheus text exposition format."""
+
+    snap = snap or snapshot()
+    lines = [
+        "# HELP http_request_duration_seconds Request latency by route.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, route), stats in sorted(snap.routes.items()):
+        _histogram(
+            lines,
+            "http_request_duration_seconds",
+            stats.latency,
+            method=method,
+            route=route,
+        )
+    lines += [
+        "# HELP http_requests_total Requests by route and status.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (method, route), stats in sorted(snap.routes.items()):
+        for status, n in sorted(stats.statuses.items()):
+            labels = _labels(method=method, route=route, status=str(status))
+            lines.append(f"http_requests_total{labels} {n}")
+    for name, kind, help_text, attr in (
+        ("db_queries_total", "counter", "SQL statements issued by route.", "queries"),
+        (
+            "db_query_seconds_total",
+            "counter",
+            "Time spent in SQL by route.",
+            "sql_seconds",
+        ),
+        (
+            "template_render_seconds_total",
+            "counter",
+            "Time spent rendering by route.",
+            "render_seconds",
+        ),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for (method, route), stats in sorted(snap.routes.items()):
+            value = getattr(stats, attr)
+            value = f"{value:.6f}" if isinstance(value, float) else value
+            lines.append(f"{name}{_labels(method=method, route=route)} {value}")
+    lines += [
+        "# HELP template_render_duration_seconds Render time by template.",
+        "# TYPE template_render_duration_seconds histogram",
+    ]
+    for name, hist in sorted(snap.templates.items()):
+        _histogram(lines, "template_render_duration_seconds", hist, template=name)
+    lines += [
+        "# HELP db_slow_queries_recent Slow statements currently kept for /admin/perf.",
+        "# TYPE db_slow_queries_recent gauge",
+        f"db_slow_queries_recent {len(snap.slow)}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,177 @@
+"""Client search backed by an SQLite FTS5 trigram index.
+
+``clients_fts`` is an external-content FTS5 table mirroring the searchable
+client columns. Triggers keep it in step with every write to ``clients``
+(ORM, bulk import or sync), and it is created alongside ``clients`` by
+``create_all``. Databases that predate it are indexed by
+``ensure_client_index`` at startup.
+"""
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import Float, Integer, event, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from .. import models
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "clients_fts"
+FTS_COLUMNS = ("first_name", "last_name", "email", "phone")
+# The trigram tokenizer cannot match anything shorter than this.
+MIN_QUERY_LENGTH = 3
+# Options returned to a typeahead picker per keystroke.
+TYPEAHEAD_LIMIT = 20
+
+_cols = ", ".join(FTS_COLUMNS)
+_new = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+_old = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+
+_DROP = [
+    "DROP TRIGGER IF EXISTS clients_fts_ai",
+    "DROP TRIGGER IF EXISTS clients_fts_ad",
+    "DROP TRIGGER IF EXISTS clients_fts_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+_CREATE = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"{_cols}, content='clients', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER clients_fts_ai AFTER INSERT ON clients BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_cols}) VALUES (new.id, {_new}); END",
+    f"CREATE TRIGGER clients_fts_ad AFTER DELETE ON clients BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_cols}) "
+    f"VALUES ('delete', old.id, {_old}); END",
+    f"CREATE TRIGGER clients_fts_au AFTER UPDATE OF {_cols} ON clients BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_cols}) "
+    f"VALUES ('delete', old.id, {_old}); "
+    f"INSERT INTO {FTS_TABLE}(rowid, {_cols}) VALUES (new.id, {_new}); END",
+]
+
+
+def create_client_index(conn: Connection) -> bool:
+    """(Re)create the FTS table and triggers, and index existing clients.
+
+    Returns ``False`` when this SQLite build lacks FTS5 or the trigram
+    tokenizer; search then falls back to ``LIKE``.
+    """
+
+    for stmt in _DROP:
+        conn.exec_driver_sql(stmt)
+    try:
+        for stmt in _CREATE:
+            conn.exec_driver_sql(stmt)
+    except OperationalError as exc:
+        logger.warning("FTS5 trigram index unavailable: %s", exc.orig)
+        for stmt in _DROP:
+            conn.exec_driver_sql(stmt)
+        return False
+    conn.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def drop_client_index(conn: Connection) -> None:
+    for stmt in _DROP:
+        conn.exec_driver_sql(stmt)
+
+
+def has_client_index(db: Session | Connection) -> bool:
+    bind = db.get_bind() if isinstance(db, Session) else db
+    if bind.dialect.name != "sqlite":
+        return False
+    return (
+        db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        is not None
+    )
+
+
+def ensure_client_index(engine: Engine) -> None:
+    """Build the index for databases created before it existed."""
+
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        if not has_client_index(conn):
+            create_client_index(conn)
+
+
+def rebuild_client_index(db: Session) -> None:
+    """Re-derive the index contents from ``clients``."""
+
+    db.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    db.commit()
+
+
+def prefix_pattern(q: str) -> str:
+    """``LIKE`` pattern (escape ``\\``) for values starting with ``q``.
+
+    Against a ``COLLATE NOCASE`` index SQLite turns it into a range seek.
+    """
+
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def can_search(db: Session, q: str) -> bool:
+    return len(q) >= MIN_QUERY_LENGTH and has_client_index(db)
+
+
+def ranked_matches(q: str, limit: int | None = None):
+    """Subquery of ``(id, rank)`` for clients matching ``q`` as a substring."""
+
+    phrase = '"' + q.replace('"', '""') + '"'
+    return (
+        text(
+            f"SELECT rowid AS id, rank FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH :phrase ORDER BY rank LIMIT :limit"
+        )
+        .bindparams(phrase=phrase, limit=-1 if limit is None else limit)
+        .columns(id=Integer, rank=Float)
+        .subquery("fts_hits")
+    )
+
+
+def _after_create(target, connection, **kw) -> None:
+    if connection.dialect.name == "sqlite":
+        create_client_index(connection)
+
+
+def _before_drop(target, connection, **kw) -> None:
+    if connection.dialect.name == "sqlite":
+        drop_client_index(connection)
+
+
+event.listen(models.Client.__table__, "after_create", _after_create)
+event.listen(models.Client.__table__, "before_drop", _before_drop)
+
+
+def main() -> None:
+    """CLI entry point: rebuild the client search index."""
+
+    import argparse
+
+    from .. import db as _db
+
+    parser = argparse.ArgumentParser(description="Client search index")
+    parser.add_argument(
+        "--recreate", action="store_true", help="Drop and recreate the FTS table"
+    )
+    args = parser.parse_args()
+
+    if args.recreate:
+        with _db.engine.begin() as conn:
+            create_client_index(conn)
+    else:
+        ensure_client_index(_db.engine)
+        with _db.SessionLocal() as session:
+            rebuild_client_index(session)
+    print("Client search index rebuilt.")
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry
+    main()
@@ -0,0 +1,353 @@
+"""Content-addressed, deduplicated database snapshots.
+
+A snapshot splits the database file into fixed-size chunks (a whole number
+of SQLite pages), stores each chunk once under ``chunks/<ab>/<sha256>``
+(zlib-compressed) and records the ordered list of chunk hashes in a small
+JSON manifest under ``manifests/``. Chunks unchanged since an earlier
+snapshot are not written again, so each snapshot costs disk space and
+writes in proportion to the pages that changed.
+
+When it is safe, the live file is read in place under a read transaction
+(rollback journal, or WAL with nothing left to checkpoint); otherwise a
+consistent copy is first taken into the system temp directory with the
+online backup API.
+
+Store layout::
+
+    <store>/chunks/3f/3fa4...   zlib(chunk bytes), named by sha256 of the raw bytes
+    <store>/manifests/20240601-023000.json
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from .. import db
+from . import backups
+
+CHUNK_SIZE = 64 * 1024
+MANIFEST_VERSION = 1
+_TS_FORMAT = "%Y%m%d-%H%M%S"
+
+
+@dataclass
+class SnapshotResult:
+    manifest: Path
+    size: int
+    chunks: int
+    new_chunks: int
+    new_bytes: int
+
+
+def default_store(db_path: Path | None = None) -> Path:
+    raw = os.getenv("SNAPSHOT_DIR")
+    if raw:
+        return Path(raw)
+    return (db_path or db.get_db_path()).parent / "snapshots"
+
+
+def _chunk_path(store: Path, digest: str) -> Path:
+    return store / "chunks" / digest[:2] / digest
+
+
+def _manifests(store: Path) -> Path:
+    return store / "manifests"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f".{path.name}.part")
+    with open(partial, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    partial.replace(path)
+
+
+@contextmanager
+def _consistent_source(db_path: Path) -> Iterator[tuple[BinaryIO, int, int]]:
+    """Yield ``(file, size, page_size)`` for a consistent image of the database."""
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        wal = conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+        if wal:
+            busy, *_ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        conn.execute("BEGIN")
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        wal_file = Path(f"{db_path}-wal")
+        # With an empty WAL our read snapshot is exactly the main file, and no
+        # checkpoint can write to it until the transaction ends.
+        in_place = not wal or (
+            busy == 0 and (not wal_file.exists() or wal_file.stat().st_size == 0)
+        )
+        if in_place:
+            with open(db_path, "rb") as fh:
+                yield fh, page_count * page_size, page_size
+            return
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    fd, tmp = tempfile.mkstemp(prefix="astraion-snapshot-", suffix=".db")
+    os.close(fd)
+    tmp_path = Path(tmp)
+    try:
+        backups.online_copy(db_path, tmp_path)
+        with open(tmp_path, "rb") as fh:
+            yield fh, tmp_path.stat().st_size, page_size
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def create_snapshot(
+    db_path: Path | str | None = None,
+    store: Path | str | None = None,
+    *,
+    chunk_size: int = CHUNK_SIZE,
+) -> SnapshotResult:
+    """Store a snapshot of the database, writing only chunks not already stored."""
+
+    db_path = Path(db_path).resolve() if db_path else db.get_db_path()
+    if not db_path.exists():
+        raise FileNotFoundError(f"Database not found at {db_path}")
+    store = Path(store) if store else default_store(db_path)
+
+    chunks: list[str] = []
+    whole = hashlib.sha256()
+    new_chunks = new_bytes = 0
+    with _consistent_source(db_path) as (fh, size, page_size):
+        # Keep chunk boundaries on page boundaries so a changed page touches one chunk.
+        step = max(page_size, chunk_size - chunk_size % page_size)
+        remaining = size
+        while remaining > 0:
+            data = fh.read(min(step, remaining))
+            if not data:
+                raise OSError(f"{db_path} is shorter than its page count")
+            remaining -= len(data)
+            whole.update(data)
+            digest = hashlib.sha256(data).hexdigest()
+            chunks.append(digest)
+            target = _chunk_path(store, digest)
+            if not target.exists():
+                packed = zlib.compress(data, 6)
+                _write_atomic(target, packed)
+                new_chunks += 1
+                new_bytes += len(packed)
+
+    now = datetime.now()
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created": now.isoformat(timespec="seconds"),
+        "source": str(db_path),
+        "size": size,
+        "chunk_size": step,
+        "sha256": whole.hexdigest(),
+        "chunks": chunks,
+    }
+    path = _manifests(store) / f"{now.strftime(_TS_FORMAT)}.json"
+    _write_atomic(path, json.dumps(manifest, separators=(",", ":")).encode())
+    return SnapshotResult(path, size, len(chunks), new_chunks, new_bytes)
+
+
+def load_manifest(path: Path | str) -> dict:
+    manifest = json.loads(Path(path).read_text())
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version in {path}")
+    return manifest
+
+
+def list_snapshots(store: Path | str | None = None) -> list[Path]:
+    """Manifest paths in the store, oldest first."""
+
+    folder = _manifests(Path(store) if store else default_store())
+    if not folder.exists():
+        return []
+    return sorted(folder.glob("*.json"))
+
+
+def _read_chunk(store: Path, digest: str) -> bytes:
+    data = zlib.decompress(_chunk_path(store, digest).read_bytes())
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"chunk {digest} is corrupt")
+    return data
+
+
+def restore_snapshot(
+    manifest_path: Path | str,
+    target: Path | str,
+    *,
+    store: Path | str | None = None,
+    overwrite: bool = False,
+) -> Path:
+    """Rebuild the database file recorded by ``manifest_path`` at ``target``."""
+
+    manifest_path = Path(manifest_path)
+    manifest = load_manifest(manifest_path)
+    store = Path(store) if store else manifest_path.parent.parent
+    target = Path(target)
+    if target.exists() and not overwrite:
+        raise FileExistsError(f"{target} exists; pass overwrite=True to replace it")
+
+    partial = target.with_name(f".{target.name}.part")
+    whole = hashlib.sha256()
+    try:
+        with open(partial, "wb") as fh:
+            for digest in manifest["chunks"]:
+                data = _read_chunk(store, digest)
+                whole.update(data)
+                fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        if whole.hexdigest() != manifest["sha256"]:
+            raise ValueError(f"restored image does not match {manifest_path.name}")
+        partial.replace(target)
+        for suffix in ("-wal", "-shm"):
+            Path(f"{target}{suffix}").unlink(missing_ok=True)
+    finally:
+        partial.unlink(missing_ok=True)
+    return target
+
+
+def verify_snapshot(
+    manifest_path: Path | str, *, store: Path | str | None = None
+) -> list[str]:
+    """Check that every chunk exists and hashes correctly.
+
+    Returns the problems found; an empty list means the snapshot is sound.
+    """
+
+    manifest_path = Path(manifest_path)
+    manifest = load_manifest(manifest_path)
+    store = Path(store) if store else manifest_path.parent.parent
+    problems: list[str] = []
+    whole = hashlib.sha256()
+    size = 0
+    for index, digest in enumerate(manifest["chunks"]):
+        try:
+            data = _read_chunk(store, digest)
+        except FileNotFoundError:
+            problems.append(f"chunk {index} ({digest}) is missing")
+            continue
+        except (ValueError, zlib.error):
+            problems.append(f"chunk {index} ({digest}) is corrupt")
+            continue
+        whole.update(data)
+        size += len(data)
+    if not problems:
+        if size != manifest["size"]:
+            problems.append(
+                f"size {size} does not match manifest size {manifest['size']}"
+            )
+        elif whole.hexdigest() != manifest["sha256"]:
+            problems.append("database checksum does not match the manifest")
+    return problems
+
+
+def collect_garbage(store: Path | str | None = None) -> int:
+    """Delete chunks no manifest refers to. Returns the number removed."""
+
+    store = Path(store) if store else default_store()
+    live: set[str] = set()
+    for path in list_snapshots(store):
+        live.update(load_manifest(path)["chunks"])
+    removed = 0
+    for chunk in (store / "chunks").glob("*/*"):
+        if chunk.name not in live:
+            chunk.unlink()
+            removed += 1
+    return removed
+
+
+def prune_snapshots(
+    store: Path | str | None = None, *, keep_daily: int, keep_weekly: int
+) -> list[Path]:
+    """Apply the backup retention policy to manifests, then drop orphaned chunks."""
+
+    store = Path(store) if store else default_store()
+    dated = [(datetime.strptime(p.stem, _TS_FORMAT), p) for p in list_snapshots(store)]
+    keep = backups.retained(dated, keep_daily=keep_daily, keep_weekly=keep_weekly)
+    removed = [path for _, path in dated if path not in keep]
+    for path in removed:
+        path.unlink()
+    if removed:
+        collect_garbage(store)
+    return removed
+
+
+def snapshot_db() -> SnapshotResult:
+    """Scheduled job: snapshot the configured database and apply retention."""
+
+    result = create_snapshot()
+    prune_snapshots(
+        result.manifest.parent.parent,
+        keep_daily=backups.env_int("BACKUP_KEEP_DAILY", 7),
+        keep_weekly=backups.env_int("BACKUP_KEEP_WEEKLY", 4),
+    )
+    return result
+
+
+def main() -> None:
+    """CLI entry point for the snapshot store."""
+
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Deduplicated database snapshots")
+    parser.add_argument(
+        "--store", help="Snapshot store directory (default: SNAPSHOT_DIR)"
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+    create = sub.add_parser("create", help="Take a snapshot")
+    create.add_argument("--db", help="Database path (default: DB_PATH)")
+    sub.add_parser("list", help="List snapshots")
+    verify = sub.add_parser("verify", help="Check a snapshot's chunks")
+    verify.add_argument("manifest", nargs="?", help="Manifest (default: all)")
+    restore = sub.add_parser("restore", help="Rebuild a database file")
+    restore.add_argument("manifest")
+    restore.add_argument("target")
+    restore.add_argument("--force", action="store_true", help="Overwrite target")
+    sub.add_parser("gc", help="Delete unreferenced chunks")
+    args = parser.parse_args()
+
+    store = Path(args.store) if args.store else None
+    if args.command == "create":
+        result = create_snapshot(args.db, store)
+        print(
+            f"{result.manifest.name}: {result.chunks} chunks, "
+            f"{result.new_chunks} new ({result.new_bytes} bytes written)"
+        )
+    elif args.command == "list":
+        for path in list_snapshots(store):
+            manifest = load_manifest(path)
+            print(
+                f"{path.stem}  {manifest['size']:>12}  {len(manifest['chunks'])} chunks"
+            )
+    elif args.command == "verify":
+        paths = [Path(args.manifest)] if args.manifest else list_snapshots(store)
+        failed = False
+        for path in paths:
+            problems = verify_snapshot(path, store=store)
+            print(f"{path.stem}: {'OK' if not problems else '; '.join(problems)}")
+            failed = failed or bool(problems)
+        raise SystemExit(1 if failed else 0)
+    elif args.command == "restore":
+        target = restore_snapshot(
+            args.manifest, args.target, store=store, overwrite=args.force
+        )
+        print(f"Restored to {target}")
+    elif args.command == "gc":
+        print(f"Removed {collect_garbage(store)} chunks")
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI entry
+    main()
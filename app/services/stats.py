@@ -0,0 +1,139 @@
+"""Dashboard figures for the home page, cached in-process.
+
+SQLite answers ``COUNT(*)`` by scanning, so the figures are computed once and
+then served from memory. The cache is dropped when a transaction that wrote
+to a counted table commits, whether it wrote through ORM flushes or through
+Core bulk statements on a Session. ``DASHBOARD_TTL`` seconds (default 60)
+bound staleness for writes made by other processes, such as CLI imports or a
+second instance on the same file.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from .. import models
+from ..crud.trips import upcoming_condition
+
+DEFAULT_TTL = 60.0
+_WRITTEN = "stats_dirty"
+_COUNTED = (models.Client, models.Trip, models.Booking, models.Reminder)
+_TABLES = {Model.__tablename__ for Model in _COUNTED}
+
+
+@dataclass
+class DashboardStats:
+    clients: int = 0
+    trips: int = 0
+    bookings: int = 0
+    upcoming_trips: int = 0
+    overdue_reminders: int = 0
+    bookings_by_status: dict[str, int] = field(default_factory=dict)
+    day: date | None = None
+
+
+_lock = threading.Lock()
+_cache: dict[str, tuple[float, DashboardStats]] = {}
+_generation = 0
+
+
+def _ttl() -> float:
+    value = os.getenv("DASHBOARD_TTL")
+    return float(value) if value else DEFAULT_TTL
+
+
+def invalidate() -> None:
+    """Forget every cached figure."""
+
+    global _generation
+    with _lock:
+        _generation += 1
+        _cache.clear()
+
+
+def _count(Model, *criteria):
+    return select(func.count()).select_from(Model).where(*criteria).scalar_subquery()
+
+
+def compute_stats(db: Session, today: date) -> DashboardStats:
+    """Read the figures from the database: one row of counts, one status group."""
+
+    counts = db.execute(
+        select(
+            _count(models.Client),
+            _count(models.Trip),
+            _count(models.Booking),
+            _count(models.Trip, upcoming_condition(today)),
+            _count(
+                models.Reminder,
+                models.Reminder.done_at.is_(None),
+                models.Reminder.due_date < today,
+            ),
+        )
+    ).one()
+    by_status = {
+        status or "unknown": n
+        for status, n in db.execute(
+            select(models.Booking.status, func.count())
+            .group_by(models.Booking.status)
+            .order_by(func.count().desc())
+        )
+    }
+    return DashboardStats(*counts, bookings_by_status=by_status, day=today)
+
+
+def get_stats(db: Session, today: date | None = None) -> DashboardStats:
+    """Cached :func:`compute_stats` for ``db``'s database."""
+
+    today = today or date.today()
+    key = str(db.get_bind().url)
+    with _lock:
+        hit = _cache.get(key)
+        generation = _generation
+    if hit and hit[0] > time.monotonic() and hit[1].day == today:
+        return hit[1]
+    stats = compute_stats(db, today)
+    with _lock:
+        # a commit that landed while we were counting makes these stale
+        if generation == _generation:
+            _cache[key] = (time.monotonic() + _ttl(), stats)
+    return stats
+
+
+# ----- invalidation -----
+# Writes mark the session; the cache is dropped only once they commit, so a
+# concurrent reader cannot re-cache figures from before the commit.
+
+def _mark_flush(session: Session, _flush_context) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _COUNTED):
+            session.info[_WRITTEN] = True
+            return
+
+
+def _mark_execute(state) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        table = getattr(state.statement, "table", None)
+        if table is not None and table.name in _TABLES:
+            state.session.info[_WRITTEN] = True
+
+
+def _after_commit(session: Session) -> None:
+    if session.info.pop(_WRITTEN, False):
+        invalidate()
+
+
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_WRITTEN, None)
+
+
+event.listen(Session, "after_flush", _mark_flush)
+event.listen(Session, "do_orm_execute", _mark_execute)
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_rollback", _after_rollback)
@@ -1,14 +1,39 @@
 """Synchronization utilities and CLI."""
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Iterable
+import json
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import islice
+from typing import Any, Iterable, Iterator, Mapping
 
 import httpx
-from sqlalchemy import Select, func, select
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Select,
+    and_,
+    bindparam,
+    delete,
+    event,
+    func,
+    insert,
+    inspect,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
 from .. import models
+from . import dedupe, wire
+
+logger = logging.getLogger(__name__)
 
 # Mapping of entity names to model classes
 ENTITY_MODELS = {
@@ -18,6 +43,77 @@ ENTITY_MODELS = {
 }
 
 
+def batched(items: Iterable, size: int) -> Iterator[tuple]:
+    """Yield successive tuples of at most ``size`` items."""
+
+    iterator = iter(items)
+    while chunk := tuple(islice(iterator, size)):
+        yield chunk
+
+
+def to_payload(values: Mapping[str, Any]) -> dict:
+    """JSON-safe copy of column values (dates and datetimes as ISO strings)."""
+
+    return {
+        key: value.isoformat() if isinstance(value, (date, datetime)) else value
+        for key, value in values.items()
+    }
+
+
+def model_payload(obj) -> dict:
+    """Every table column of a mapped instance, ready for an outbox payload."""
+
+    table = inspect(obj).mapper.local_table
+    return to_payload({column.key: getattr(obj, column.key) for column in table.columns})
+
+
+def _from_payload(Model, payload: dict) -> dict:
+    """Turn ISO strings in a payload back into dates for Date/DateTime columns."""
+
+    columns = Model.__table__.columns
+    values = {}
+    for key, value in payload.items():
+        if isinstance(value, str) and key in columns:
+            kind = columns[key].type
+            if isinstance(kind, DateTime):
+                value = datetime.fromisoformat(value)
+            elif isinstance(kind, Date):
+                value = date.fromisoformat(value)
+        values[key] = value
+    return values
+
+
+def _is_full_row(Model, values: dict) -> bool:
+    return values.keys() >= set(Model.__table__.columns.keys())
+
+
+_clocks = models.SyncClock.__table__
+# Databases created before sync_clocks existed: start after the outbox's clocks.
+_seed = (
+    select(func.coalesce(func.max(models.SyncOutbox.logical_clock), 0))
+    .where(
+        models.SyncOutbox.entity == bindparam("e"),
+        models.SyncOutbox.entity_id == bindparam("eid"),
+    )
+    .scalar_subquery()
+)
+_reserve = (
+    sqlite_insert(_clocks)
+    .values(entity=bindparam("e"), entity_id=bindparam("eid"), clock=_seed + bindparam("n"))
+    .on_conflict_do_update(
+        index_elements=[_clocks.c.entity, _clocks.c.entity_id],
+        set_={"clock": _clocks.c.clock + bindparam("n")},
+    )
+)
+_advance = sqlite_insert(_clocks).values(
+    entity=bindparam("e"), entity_id=bindparam("eid"), clock=bindparam("c")
+)
+_advance = _advance.on_conflict_do_update(
+    index_elements=[_clocks.c.entity, _clocks.c.entity_id],
+    set_={"clock": func.max(_clocks.c.clock, _advance.excluded.clock)},
+)
+
+
 def enqueue_outbox(
     db: Session,
     *,
@@ -26,19 +122,19 @@ def enqueue_outbox(
     op: str,
     payload: dict | None,
 ) -> models.SyncOutbox:
-    """Append an entry to the sync outbox with an incrementing logical clock."""
+    """Append an entry to the sync outbox with an incrementing logical clock.
 
-    max_clock = db.execute(
-        select(func.max(models.SyncOutbox.logical_clock)).where(
-            models.SyncOutbox.entity == entity,
-            models.SyncOutbox.entity_id == entity_id,
-        )
-    ).scalar()
-    next_clock = (max_clock or 0) + 1
+    The clock comes from ``sync_clocks`` in a single upsert, so concurrent
+    writers can never hand out the same clock twice.
+    """
+
+    clock = db.execute(
+        _reserve.returning(_clocks.c.clock), {"e": entity, "eid": entity_id, "n": 1}
+    ).scalar_one()
     entry = models.SyncOutbox(
         entity=entity,
         entity_id=entity_id,
-        logical_clock=next_clock,
+        logical_clock=clock,
         op=op,
         payload=payload,
         updated_at=datetime.utcnow(),
@@ -47,6 +143,48 @@ def enqueue_outbox(
     return entry
 
 
+def enqueue_many(db: Session, entries: Iterable[dict], chunk_size: int = 1000) -> int:
+    """Append many ``{entity, entity_id, op, payload}`` entries in bulk.
+
+    Entries for the same entity get consecutive clocks in the order given.
+    Each chunk costs three statements: reserve the clocks, read them back,
+    insert the outbox rows. The caller commits. Returns the entries queued.
+    """
+
+    queued = 0
+    now = datetime.utcnow()
+    for chunk in batched(entries, chunk_size):
+        counts = Counter((e["entity"], e["entity_id"]) for e in chunk)
+        db.execute(
+            _reserve, [{"e": e, "eid": eid, "n": n} for (e, eid), n in counts.items()]
+        )
+        last = dict(
+            ((e, eid), clock)
+            for e, eid, clock in db.execute(
+                select(_clocks.c.entity, _clocks.c.entity_id, _clocks.c.clock).where(
+                    tuple_(_clocks.c.entity, _clocks.c.entity_id).in_(list(counts))
+                )
+            )
+        )
+        rows = []
+        for entry in chunk:
+            key = (entry["entity"], entry["entity_id"])
+            counts[key] -= 1
+            rows.append(
+                {
+                    "entity": key[0],
+                    "entity_id": key[1],
+                    "logical_clock": last[key] - counts[key],
+                    "op": entry["op"],
+                    "payload": entry.get("payload"),
+                    "updated_at": now,
+                }
+            )
+        db.execute(insert(models.SyncOutbox), rows)
+        queued += len(rows)
+    return queued
+
+
 def serialize_outbox(entry: models.SyncOutbox) -> dict:
     """Convert an outbox entry to a serializable dict."""
 
@@ -61,20 +199,130 @@ def serialize_outbox(entry: models.SyncOutbox) -> dict:
     }
 
 
-def get_outbox_since(db: Session, after_clock: int) -> list[dict]:
-    """Return serialized outbox entries after a given global clock."""
+PULL_PAGE_SIZE = 1000
+MAX_PULL_PAGE_SIZE = 10_000
 
-    stmt: Select[tuple[models.SyncOutbox]] = (
+
+def _outbox_after(after_clock: int) -> Select[tuple[models.SyncOutbox]]:
+    return (
         select(models.SyncOutbox)
         .where(models.SyncOutbox.id > after_clock)
         .order_by(models.SyncOutbox.id)
     )
-    entries = db.execute(stmt).scalars().all()
-    return [serialize_outbox(e) for e in entries]
 
 
-def apply_inbound_changes(db: Session, changes: Iterable[dict]) -> None:
-    """Apply inbound changes using a last-write-wins policy."""
+def get_outbox_page(db: Session, after_clock: int, limit: int = PULL_PAGE_SIZE) -> dict:
+    """One page of outbox entries after ``after_clock``.
+
+    ``next_cursor`` is the ``after_clock`` for the following page; it is
+    ``None`` once the end of the outbox is reached.
+    """
+
+    entries = db.execute(_outbox_after(after_clock).limit(limit + 1)).scalars().all()
+    has_more = len(entries) > limit
+    changes = [serialize_outbox(e) for e in entries[:limit]]
+    return {
+        "changes": changes,
+        "next_cursor": changes[-1]["id"] if has_more else None,
+        "has_more": has_more,
+    }
+
+
+def iter_outbox_since(
+    db: Session, after_clock: int, batch_size: int = PULL_PAGE_SIZE
+) -> Iterator[dict]:
+    """Stream serialized outbox entries after ``after_clock`` from a server-side cursor."""
+
+    stmt = _outbox_after(after_clock).execution_options(yield_per=batch_size)
+    for entry in db.execute(stmt).scalars():
+        yield serialize_outbox(entry)
+
+
+def get_checkpoint(db: Session, remote: str, direction: str) -> int:
+    cursor = db.execute(
+        select(models.SyncCheckpoint.cursor).where(
+            models.SyncCheckpoint.remote == remote,
+            models.SyncCheckpoint.direction == direction,
+        )
+    ).scalar()
+    return cursor or 0
+
+
+def set_checkpoint(db: Session, remote: str, direction: str, cursor: int) -> None:
+    """Record sync progress with ``remote``. The caller commits."""
+
+    row = db.execute(
+        select(models.SyncCheckpoint).where(
+            models.SyncCheckpoint.remote == remote,
+            models.SyncCheckpoint.direction == direction,
+        )
+    ).scalar_one_or_none()
+    if row is None:
+        db.add(models.SyncCheckpoint(remote=remote, direction=direction, cursor=cursor))
+    else:
+        row.cursor = cursor
+
+
+APPLY_CHUNK_SIZE = 1000
+
+
+def latest_clocks(
+    db: Session, keys: set[tuple[str, int]] | None
+) -> dict[tuple[str, int], tuple[int, datetime, int]]:
+    """Latest ``(logical_clock, updated_at, id)`` per ``(entity, entity_id)``.
+
+    ``keys=None`` returns it for every entity in the outbox.
+    """
+
+    if keys is not None and not keys:
+        return {}
+    outbox = models.SyncOutbox
+    newest = select(
+        outbox.entity,
+        outbox.entity_id,
+        func.max(outbox.logical_clock).label("clock"),
+    )
+    if keys is not None:
+        newest = newest.where(tuple_(outbox.entity, outbox.entity_id).in_(list(keys)))
+    newest = newest.group_by(outbox.entity, outbox.entity_id).subquery()
+    rows = db.execute(
+        select(outbox.entity, outbox.entity_id, outbox.logical_clock, outbox.updated_at, outbox.id)
+        .join(
+            newest,
+            and_(
+                outbox.entity == newest.c.entity,
+                outbox.entity_id == newest.c.entity_id,
+                outbox.logical_clock == newest.c.clock,
+            ),
+        )
+    )
+    return {(e, eid): (clock, ts, row_id) for e, eid, clock, ts, row_id in rows}
+
+
+def _load_targets(db: Session, changes: list[dict]) -> dict[tuple[str, int], object]:
+    """Load every existing target row of the batch, one query per entity type."""
+
+    wanted: dict[str, set[int]] = {}
+    for change in changes:
+        if change["entity"] in ENTITY_MODELS:
+            wanted.setdefault(change["entity"], set()).add(change["entity_id"])
+    loaded: dict[tuple[str, int], object] = {}
+    for entity, ids in wanted.items():
+        Model = ENTITY_MODELS[entity]
+        for obj in db.execute(select(Model).where(Model.id.in_(ids))).scalars():
+            loaded[(entity, obj.id)] = obj
+    return loaded
+
+
+def _apply_chunk(db: Session, changes: list[dict]) -> int:
+    latest = latest_clocks(db, {(c["entity"], c["entity_id"]) for c in changes})
+    targets = _load_targets(db, changes)
+    entries: dict[tuple[str, int, int], dict] = {}
+    superseded: list[int] = []
+    redeleted: dict[tuple[str, int], int] = {}
+    created: dict[tuple[str, int], dict] = {}
+    touched_clients: set[tuple[str, int]] = set()
+    applied = 0
 
     for change in changes:
         entity = change["entity"]
@@ -83,66 +331,542 @@ def apply_inbound_changes(db: Session, changes: Iterable[dict]) -> None:
         updated_at = datetime.fromisoformat(change["updated_at"])
         op = change["op"]
         payload = change.get("payload")
+        key = (entity, entity_id)
 
-        last = db.execute(
-            select(models.SyncOutbox.logical_clock, models.SyncOutbox.updated_at)
-            .where(
-                models.SyncOutbox.entity == entity,
-                models.SyncOutbox.entity_id == entity_id,
-            )
-            .order_by(models.SyncOutbox.logical_clock.desc())
-            .limit(1)
-        ).first()
-
+        last = latest.get(key)
+        replaces = None
         if last:
-            local_clock, local_updated_at = last
+            local_clock, local_updated_at, last_id = last
             if (clock, updated_at) <= (local_clock, local_updated_at):
                 continue
+            if clock == local_clock:
+                # same clock, newer timestamp: the stored entry is replaced
+                replaces = last_id
 
         Model = ENTITY_MODELS.get(entity)
         if not Model:
             continue
 
-        obj = db.get(Model, entity_id)
+        values = _from_payload(Model, payload or {})
+        obj = targets.get(key)
+        if op == "update" and obj is None and not _is_full_row(Model, values):
+            # Updates carry only the changed columns. Without a row to patch
+            # there is nothing to apply, and inserting the fragment would
+            # violate NOT NULL columns. If the row was deleted here, the
+            # delete is re-issued above the update's clock so the remote
+            # converges too; rows never seen are left to reconcile.
+            if last:
+                redeleted[key] = max(clock, redeleted.get(key, 0))
+            continue
+        if replaces is not None:
+            superseded.append(replaces)
         if op == "delete":
-            if obj:
+            if isinstance(obj, dict):
+                created.pop(key)
+            elif obj in db.new:
+                db.expunge(obj)
+            elif obj is not None:
                 db.delete(obj)
+            targets.pop(key, None)
         else:
-            if obj:
-                for k, v in (payload or {}).items():
+            if isinstance(obj, dict):
+                obj.update({k: v for k, v in values.items() if k != "id"})
+            elif obj is not None:
+                for k, v in values.items():
                     if k != "id":
                         setattr(obj, k, v)
+                if Model is models.Client:
+                    touched_clients.add(key)
+            elif "id" in values:
+                # new rows are bulk-inserted after the loop
+                obj = created[key] = values
+                targets[key] = obj
             else:
-                db.add(Model(**(payload or {})))
-
-        db.add(
-            models.SyncOutbox(
-                entity=entity,
-                entity_id=entity_id,
-                logical_clock=clock,
-                op=op,
-                payload=payload,
-                updated_at=updated_at,
+                obj = Model(**values)
+                db.add(obj)
+                targets[key] = obj
+
+        applied += 1
+        latest[key] = (clock, updated_at, None)
+        entries[(entity, entity_id, clock)] = {
+            "entity": entity,
+            "entity_id": entity_id,
+            "logical_clock": clock,
+            "op": op,
+            "payload": payload,
+            "updated_at": updated_at,
+        }
+
+    db.flush()
+    for entity, Model in ENTITY_MODELS.items():
+        rows = [row for (e, _), row in created.items() if e == entity]
+        if rows:
+            db.execute(insert(Model), rows)
+    reindex = [
+        (row["id"], row.get("first_name"), row.get("last_name"), row.get("email"),
+         row.get("normalized_phone"))
+        for (entity, _), row in created.items()
+        if entity == "client"
+    ]
+    for key in touched_clients:
+        client = targets.get(key)
+        if isinstance(client, models.Client):
+            reindex.append(
+                (client.id, client.first_name, client.last_name, client.email,
+                 client.normalized_phone)
             )
+            db.expire(client, ["blocking_keys"])
+    dedupe.reindex_clients(db, reindex)
+    if superseded:
+        db.execute(delete(models.SyncOutbox).where(models.SyncOutbox.id.in_(superseded)))
+    if entries:
+        db.execute(insert(models.SyncOutbox), list(entries.values()))
+        # keep local clocks ahead of everything accepted from remotes
+        db.execute(
+            _advance,
+            [{"e": e, "eid": eid, "c": clock} for e, eid, clock in entries],
+        )
+    if redeleted:
+        db.execute(
+            _advance,
+            [{"e": e, "eid": eid, "c": clock} for (e, eid), clock in redeleted.items()],
         )
+        enqueue_many(
+            db,
+            [{"entity": e, "entity_id": eid, "op": "delete"} for e, eid in redeleted],
+        )
+    return applied
+
 
+def apply_inbound_changes(
+    db: Session, changes: Iterable[dict], *, chunk_size: int = APPLY_CHUNK_SIZE
+) -> int:
+    """Apply inbound changes using a last-write-wins policy.
 
-def push_outbox(db: Session, api: str, post_fn=httpx.post) -> None:
-    """Push local outbox entries to a remote API."""
+    A change wins when its ``(logical_clock, updated_at)`` is greater than the
+    newest outbox entry for the same entity, including entries applied earlier
+    in the same call. Changes are applied in chunks: one grouped query fetches
+    the newest clocks of a chunk, one query per entity type loads its rows,
+    new rows are bulk-inserted and the chunk is committed as one transaction.
+    An update for a row that does not exist here is skipped unless it carries
+    every column; when the row was deleted here, a new tombstone above the
+    update's clock is queued instead. Returns the number of changes applied.
+    """
 
-    changes = get_outbox_since(db, 0)
-    post_fn(f"{api}/sync/push", json={"changes": changes})
+    applied = 0
+    skipping = db.info.get(SKIP_CAPTURE)
+    db.info[SKIP_CAPTURE] = True
+    try:
+        for chunk in batched(changes, chunk_size):
+            applied += _apply_chunk(db, list(chunk))
+            db.commit()
+    finally:
+        db.info[SKIP_CAPTURE] = skipping
+    return applied
 
 
-def pull_updates(db: Session, api: str, get_fn=httpx.get) -> None:
-    """Pull remote changes and apply them locally."""
+PUSH_BATCH_SIZE = 1000
+PUSH_BATCH_BYTES = 512 * 1024
+PUSH_RETRIES = 4
+PUSH_BACKOFF = 0.5
 
-    after = db.execute(select(func.max(models.SyncOutbox.id))).scalar() or 0
-    resp = get_fn(f"{api}/sync/pull", params={"after_clock": after})
-    payload = resp.json()
-    changes = payload.get("changes", [])
-    apply_inbound_changes(db, changes)
+
+class PushError(RuntimeError):
+    """The remote did not acknowledge a push batch."""
+
+
+def size_bounded(changes: list[dict], max_bytes: int) -> Iterator[list[dict]]:
+    """Split ``changes`` into runs whose encoded size stays under ``max_bytes``.
+
+    A single change larger than the bound is sent on its own.
+    """
+
+    batch: list[dict] = []
+    size = 0
+    for change in changes:
+        encoded = len(json.dumps(change, separators=(",", ":"), default=str))
+        if batch and size + encoded > max_bytes:
+            yield batch
+            batch, size = [], 0
+        batch.append(change)
+        size += encoded
+    if batch:
+        yield batch
+
+
+def push_headers(media: str = wire.JSON, encoding: str | None = "gzip") -> dict:
+    headers = {"Content-Type": media}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return headers
+
+
+def encode_push(
+    batch: list[dict], media: str = wire.JSON, encoding: str | None = "gzip"
+) -> bytes:
+    """Request body for ``/sync/push`` in the given wire format and compression."""
+
+    return wire.compress(wire.encode({"changes": batch}, media), encoding)
+
+
+def push_format() -> tuple[str, str]:
+    """The most compact ``(media type, encoding)`` this side can produce."""
+
+    return wire.media_types()[0], wire.encodings()[0]
+
+
+FALLBACK_FORMAT = (wire.JSON, "gzip")
+
+
+def check_push_response(resp, batch: list[dict]) -> str | None:
+    """``None`` when the remote acknowledged ``batch``, else a retryable error.
+
+    Raises :class:`PushError` for rejections that retrying will not fix.
+    """
+
+    if resp.status_code < 300:
+        ack = read_document(resp).get("ack")
+        if ack != batch[-1]["id"]:
+            raise PushError(f"remote acknowledged {ack!r}, expected {batch[-1]['id']}")
+        return None
+    if resp.status_code != 429 and resp.status_code < 500:
+        raise PushError(f"remote rejected push: HTTP {resp.status_code}")
+    return f"HTTP {resp.status_code}"
+
+
+def read_document(resp) -> dict:
+    """Decode a sync response in whichever wire format the remote chose."""
+
+    return wire.decode(resp.content, resp.headers.get("content-type"))
+
+
+class PushAttempt:
+    """Retry policy for one push batch, shared by the sync and async pushers.
+
+    The caller sends :meth:`request` and reports what happened through
+    :meth:`outcome`, which returns ``None`` once the remote acknowledged the
+    batch, or the seconds to wait before sending again. Transient failures
+    (transport errors, 429, 5xx) back off exponentially, ``retries`` times at
+    most. A remote answering 415 gets the JSON/gzip fallback straight away.
+    """
+
+    def __init__(
+        self, batch: list[dict], fmt: tuple[str, str], *,
+        retries: int = PUSH_RETRIES, backoff: float = PUSH_BACKOFF,
+    ) -> None:
+        self.batch = batch
+        self.fmt = fmt
+        self.retries = retries
+        self.backoff = backoff
+        self.attempt = 0
+
+    def request(self) -> dict:
+        """``content`` and ``headers`` for the next POST."""
+
+        return {"content": encode_push(self.batch, *self.fmt), "headers": push_headers(*self.fmt)}
+
+    def outcome(self, resp=None, exc: Exception | None = None) -> float | None:
+        if exc is not None:
+            error = str(exc)
+        elif resp.status_code == 415 and self.fmt != FALLBACK_FORMAT:
+            self.fmt = FALLBACK_FORMAT
+            return 0.0
+        else:
+            error = check_push_response(resp, self.batch)
+            if error is None:
+                return None
+        if self.attempt >= self.retries:
+            raise PushError(f"push failed after {self.retries + 1} attempts: {error}")
+        delay = self.backoff * 2**self.attempt
+        self.attempt += 1
+        return delay
+
+
+def _post_batch(
+    post_fn, url: str, batch: list[dict], *, fmt: tuple[str, str], retries: int,
+    backoff: float, sleep,
+) -> tuple[str, str]:
+    """POST one batch under :class:`PushAttempt`; returns the format that worked."""
+
+    attempt = PushAttempt(batch, fmt, retries=retries, backoff=backoff)
+    while True:
+        try:
+            delay = attempt.outcome(post_fn(url, **attempt.request()))
+        except httpx.TransportError as exc:
+            delay = attempt.outcome(exc=exc)
+        if delay is None:
+            return attempt.fmt
+        if delay:
+            sleep(delay)
+
+
+def push_outbox(
+    db: Session,
+    api: str,
+    post_fn=httpx.post,
+    *,
+    batch_size: int = PUSH_BATCH_SIZE,
+    max_bytes: int = PUSH_BATCH_BYTES,
+    retries: int = PUSH_RETRIES,
+    backoff: float = PUSH_BACKOFF,
+    sleep=time.sleep,
+) -> int:
+    """Push outbox entries the remote has not acknowledged yet.
+
+    Entries above the per-remote push checkpoint are sent as compressed
+    batches (see :mod:`.wire`) of at most ``batch_size`` entries and about
+    ``max_bytes`` of JSON. The
+    checkpoint advances only after the remote acknowledges a batch, so a
+    failed push is resumed rather than repeated. Returns the entries pushed.
+    """
+
+    remote = api.rstrip("/")
+    cursor = get_checkpoint(db, remote, "push")
+    fmt = push_format()
+    pushed = 0
+    while True:
+        page = get_outbox_page(db, cursor, batch_size)
+        for batch in size_bounded(page["changes"], max_bytes):
+            fmt = _post_batch(
+                post_fn, f"{remote}/sync/push", batch,
+                fmt=fmt, retries=retries, backoff=backoff, sleep=sleep,
+            )
+            cursor = batch[-1]["id"]
+            set_checkpoint(db, remote, "push", cursor)
+            db.commit()
+            pushed += len(batch)
+        if not page["has_more"]:
+            return pushed
+
+
+def apply_pull_page(db: Session, remote: str, page: dict) -> int:
+    """Apply one ``/sync/pull`` page and checkpoint past it. Returns changes applied."""
+
+    changes = page.get("changes", [])
+    applied = apply_inbound_changes(db, changes)
+    if changes:
+        set_checkpoint(db, remote, "pull", changes[-1]["id"])
     db.commit()
+    return applied
+
+
+def pull_updates(
+    db: Session, api: str, get_fn=httpx.get, *, page_size: int = PULL_PAGE_SIZE
+) -> int:
+    """Pull remote changes page by page and apply them locally.
+
+    Progress is checkpointed per remote after every page, so an interrupted
+    pull resumes where it stopped; re-applying a page is harmless because
+    last-write-wins skips changes already seen. Returns the changes applied.
+    """
+
+    remote = api.rstrip("/")
+    applied = 0
+    while True:
+        resp = get_fn(
+            f"{remote}/sync/pull",
+            params={"after_clock": get_checkpoint(db, remote, "pull"), "limit": page_size},
+            headers={"Accept": wire.accept_header()},
+        )
+        page = read_document(resp)
+        applied += apply_pull_page(db, remote, page)
+        if not page.get("has_more") or not page.get("changes"):
+            return applied
+
+
+# ----- change capture -----
+# Every ORM flush that touches an ENTITY_MODELS instance queues the matching
+# outbox entries (one bulk enqueue per flush): the full row for inserts, only
+# the changed columns for updates, a tombstone for deletes. Sessions applying
+# inbound changes set ``info[SKIP_CAPTURE]`` so remote edits are not echoed
+# as local ones. Core bulk inserts bypass the ORM and enqueue explicitly.
+SKIP_CAPTURE = "sync_skip_capture"
+_ENTITY_NAMES = {Model: name for name, Model in ENTITY_MODELS.items()}
+
+
+def _loaded_columns(obj) -> dict:
+    state = inspect(obj)
+    return {
+        attr.key: state.dict[attr.key]
+        for attr in state.mapper.column_attrs
+        if attr.key in state.dict
+    }
+
+
+def _changed_columns(obj) -> dict:
+    state = inspect(obj)
+    changed = {
+        attr.key: state.dict.get(attr.key)
+        for attr in state.mapper.column_attrs
+        if state.attrs[attr.key].history.has_changes()
+    }
+    if changed:
+        changed["id"] = obj.id
+    return changed
+
+
+def _capture_changes(session: Session, _flush_context) -> None:
+    if session.info.get(SKIP_CAPTURE):
+        return
+    entries = []
+    for obj in session.new:
+        entity = _ENTITY_NAMES.get(type(obj))
+        if entity:
+            entries.append({
+                "entity": entity, "entity_id": obj.id, "op": "create",
+                "payload": to_payload(_loaded_columns(obj)),
+            })
+    for obj in session.dirty:
+        entity = _ENTITY_NAMES.get(type(obj))
+        if entity and obj not in session.deleted:
+            changed = _changed_columns(obj)
+            if changed:
+                entries.append({
+                    "entity": entity, "entity_id": obj.id, "op": "update",
+                    "payload": to_payload(changed),
+                })
+    for obj in session.deleted:
+        entity = _ENTITY_NAMES.get(type(obj))
+        if entity:
+            entries.append({"entity": entity, "entity_id": obj.id, "op": "delete", "payload": None})
+    if entries:
+        enqueue_many(session, entries)
+
+
+event.listen(Session, "after_flush", _capture_changes)
+
+
+COMPACT_CHUNK_SIZE = 500
+
+
+@dataclass
+class CompactionResult:
+    keys: int = 0
+    removed: int = 0
+
+
+def acknowledged_watermark(db: Session) -> int:
+    """Highest outbox id every known remote has acknowledged.
+
+    Without push checkpoints nothing is waiting for a remote, so the whole
+    outbox counts as acknowledged.
+    """
+
+    lowest = db.execute(
+        select(func.min(models.SyncCheckpoint.cursor)).where(
+            models.SyncCheckpoint.direction == "push"
+        )
+    ).scalar()
+    if lowest is not None:
+        return lowest
+    return db.execute(select(func.max(models.SyncOutbox.id))).scalar() or 0
+
+
+def _fold(history: list[models.SyncOutbox]) -> tuple[str, dict | None]:
+    """Replay one entity's history (in clock order) into its final op and payload."""
+
+    op, state = "update", None
+    for entry in history:
+        if entry.op == "delete":
+            op, state = "delete", None
+        elif state is None:
+            op, state = entry.op, dict(entry.payload or {})
+        else:
+            state.update(entry.payload or {})
+    return op, state
+
+
+def compact_outbox(
+    db: Session, *, upto: int | None = None, chunk_size: int = COMPACT_CHUNK_SIZE
+) -> CompactionResult:
+    """Collapse acknowledged outbox history to one entry per entity.
+
+    For every ``(entity, entity_id)`` with superseded entries at or below
+    ``upto`` (default: :func:`acknowledged_watermark`), the entry with the
+    highest ``logical_clock`` is kept and rewritten to the folded state of
+    the whole history (a tombstone if the entity was deleted), and the
+    superseded entries at or below ``upto`` are removed. Because the newest
+    ``(logical_clock, updated_at)`` per key survives unchanged,
+    :func:`apply_inbound_changes` accepts and rejects exactly what it did
+    before.
+    """
+
+    outbox = models.SyncOutbox
+    upto = acknowledged_watermark(db) if upto is None else upto
+    keys = db.execute(
+        select(outbox.entity, outbox.entity_id)
+        .group_by(outbox.entity, outbox.entity_id)
+        .having(func.count() > 1, func.min(outbox.id) <= upto)
+    ).all()
+
+    result = CompactionResult()
+    for chunk in batched(keys, chunk_size):
+        histories: dict[tuple[str, int], list[models.SyncOutbox]] = {}
+        rows = db.execute(
+            select(outbox)
+            .where(tuple_(outbox.entity, outbox.entity_id).in_(list(chunk)))
+            .order_by(outbox.entity, outbox.entity_id, outbox.logical_clock)
+        ).scalars()
+        for entry in rows:
+            histories.setdefault((entry.entity, entry.entity_id), []).append(entry)
+
+        removed: list[int] = []
+        rewritten: list[dict] = []
+        for history in histories.values():
+            latest = history[-1]
+            stale = [e.id for e in history[:-1] if e.id <= upto]
+            if not stale:
+                continue
+            op, payload = _fold(history)
+            rewritten.append({"id": latest.id, "op": op, "payload": payload})
+            removed.extend(stale)
+        db.expunge_all()
+        if rewritten:
+            db.execute(update(outbox), rewritten)
+            db.execute(delete(outbox).where(outbox.id.in_(removed)))
+        db.commit()
+        result.keys += len(rewritten)
+        result.removed += len(removed)
+    return result
+
+
+def reclaim_space(engine: Engine, *, full: bool = False) -> None:
+    """Return free pages to the filesystem after compaction.
+
+    Databases start with ``auto_vacuum`` off, where ``incremental_vacuum`` does
+    nothing. The first call on such a database switches it to ``INCREMENTAL``
+    and runs a complete ``VACUUM`` (rewrites the file; needs free disk space
+    of the same size). Later calls only run ``incremental_vacuum``. ``full``
+    forces the complete ``VACUUM``.
+    """
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        incremental = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+        if full or not incremental:
+            if not incremental:
+                logger.info(
+                    "Switching %s to auto_vacuum=INCREMENTAL (one-time VACUUM)",
+                    engine.url.database,
+                )
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        else:
+            # sqlite3's execute() steps the pragma once, freeing a single page;
+            # executescript() runs it to completion
+            sqlite = conn.connection.driver_connection
+            sqlite.executescript("PRAGMA incremental_vacuum;")
+
+
+def run_compaction(full_vacuum: bool = False) -> CompactionResult:
+    """Scheduled job: compact the outbox of the configured database."""
+
+    from .. import db as _db
+
+    with _db.SessionLocal() as session:
+        result = compact_outbox(session)
+    if result.removed or full_vacuum:
+        reclaim_space(_db.get_engine(), full=full_vacuum)
+    return result
 
 
 def main() -> None:
@@ -152,17 +876,41 @@ def main() -> None:
     from .. import db as _db
 
     parser = argparse.ArgumentParser(description="Sync CLI")
-    parser.add_argument("--api", required=True, help="Base API URL")
+    parser.add_argument("--api", help="Base API URL")
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("--push", action="store_true", help="Push local changes")
     group.add_argument("--pull", action="store_true", help="Pull remote changes")
+    group.add_argument(
+        "--reconcile", action="store_true", help="Compare hash trees and exchange differences"
+    )
+    group.add_argument(
+        "--compact", action="store_true", help="Compact acknowledged outbox history"
+    )
+    parser.add_argument(
+        "--vacuum", action="store_true", help="With --compact: full VACUUM afterwards"
+    )
     args = parser.parse_args()
+    if not args.compact and not args.api:
+        parser.error("--api is required for --push, --pull and --reconcile")
+
+    if args.compact:
+        result = run_compaction(full_vacuum=args.vacuum)
+        print(f"Compacted {result.keys} entities, removed {result.removed} entries")
+        return
 
     with _db.SessionLocal() as session:
         if args.push:
-            push_outbox(session, args.api)
+            print(f"Pushed {push_outbox(session, args.api)} changes")
+        elif args.reconcile:
+            from .reconcile import reconcile
+
+            result = reconcile(session, args.api)
+            print(
+                f"Reconciled {result.buckets} buckets: pulled {result.pulled}, "
+                f"pushed {result.pushed} ({result.requests} requests)"
+            )
         else:
-            pull_updates(session, args.api)
+            print(f"Applied {pull_updates(session, args.api)} changes")
 
 
 if __name__ == "__main__":  # pragma: no cover - CLI entry
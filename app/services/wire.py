@@ -0,0 +1,203 @@
+"""Wire formats for sync payloads.
+
+Besides plain JSON (``{"changes": [...]}``), batches can travel in a compact
+form. It keeps dictionaries of entity names, ops and payload field names, and
+writes each change as a positional row whose ids and timestamps are deltas
+from the previous row. The compact form is framed as msgpack when the optional
+``msgpack`` package is installed, otherwise as JSON. Bodies are compressed
+with zstd (optional ``zstandard``) or gzip.
+
+Peers negotiate through ``Accept``/``Content-Type`` for the format and
+``Accept-Encoding``/``Content-Encoding`` for compression. JSON with gzip is
+always understood.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+from datetime import datetime, timedelta
+
+try:  # optional: pip install msgpack
+    import msgpack
+except ImportError:  # pragma: no cover - depends on environment
+    msgpack = None
+
+try:  # optional: pip install zstandard
+    import zstandard
+except ImportError:  # pragma: no cover - depends on environment
+    zstandard = None
+
+JSON = "application/json"
+COMPACT_JSON = "application/vnd.astraion.sync+json"
+COMPACT_MSGPACK = "application/vnd.astraion.sync+msgpack"
+FORMAT_VERSION = 1
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class UnsupportedFormat(ValueError):
+    """A body's Content-Type or Content-Encoding is not understood here."""
+
+
+def media_types() -> list[str]:
+    """Formats this side can read and write, most preferred first."""
+
+    preferred = [COMPACT_MSGPACK] if msgpack is not None else []
+    return preferred + [COMPACT_JSON, JSON]
+
+
+def encodings() -> list[str]:
+    """Compressions this side can read and write, most preferred first."""
+
+    return (["zstd"] if zstandard is not None else []) + ["gzip"]
+
+
+def _ranked(header: str | None) -> list[str]:
+    """Items of an Accept-style header, highest ``q`` first (stable)."""
+
+    items = []
+    for position, part in enumerate((header or "").split(",")):
+        value, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if value and q > 0:
+            items.append((-q, position, value.lower()))
+    return [value for _, _, value in sorted(items)]
+
+
+def negotiate(accept: str | None, accept_encoding: str | None) -> tuple[str, str | None]:
+    """Pick the response format and compression for a request's headers."""
+
+    offered = _ranked(accept)
+    media = next((m for m in offered if m in media_types()), JSON)
+    encoding = next((e for e in _ranked(accept_encoding) if e in encodings()), None)
+    return media, encoding
+
+
+def accept_header() -> str:
+    return ", ".join(
+        m if i == 0 else f"{m};q={0.9 - i / 10:.1f}" for i, m in enumerate(media_types())
+    )
+
+
+# ----- compact encoding -----
+
+
+def pack(changes: list[dict]) -> dict:
+    """Dictionary- and delta-encode a batch of serialized outbox changes."""
+
+    entities: dict[str, int] = {}
+    ops: dict[str, int] = {}
+    fields: dict[str, int] = {}
+    rows = []
+    prev_id = prev_ts = 0
+    for change in changes:
+        ts = (datetime.fromisoformat(change["updated_at"]) - _EPOCH) // _MICROSECOND
+        payload = change.get("payload")
+        if payload is None:
+            flat = None
+        else:
+            flat = []
+            for key, value in payload.items():
+                flat.append(fields.setdefault(key, len(fields)))
+                flat.append(value)
+        rows.append(
+            [
+                change["id"] - prev_id,
+                entities.setdefault(change["entity"], len(entities)),
+                change["entity_id"],
+                change["logical_clock"],
+                ops.setdefault(change["op"], len(ops)),
+                ts - prev_ts,
+                flat,
+            ]
+        )
+        prev_id, prev_ts = change["id"], ts
+    return {
+        "v": FORMAT_VERSION,
+        "entities": list(entities),
+        "ops": list(ops),
+        "fields": list(fields),
+        "rows": rows,
+    }
+
+
+def unpack(packed: dict) -> list[dict]:
+    if packed.get("v") != FORMAT_VERSION:
+        raise UnsupportedFormat(f"compact format version {packed.get('v')!r}")
+    entities, ops, fields = packed["entities"], packed["ops"], packed["fields"]
+    changes = []
+    row_id = ts = 0
+    for d_id, entity, entity_id, clock, op, d_ts, flat in packed["rows"]:
+        row_id += d_id
+        ts += d_ts
+        payload = None
+        if flat is not None:
+            payload = {fields[flat[i]]: flat[i + 1] for i in range(0, len(flat), 2)}
+        changes.append(
+            {
+                "id": row_id,
+                "entity": entities[entity],
+                "entity_id": entity_id,
+                "logical_clock": clock,
+                "op": ops[op],
+                "payload": payload,
+                "updated_at": (_EPOCH + ts * _MICROSECOND).isoformat(),
+            }
+        )
+    return changes
+
+
+# ----- bodies -----
+
+
+def compress(body: bytes, encoding: str | None) -> bytes:
+    if encoding is None or encoding == "identity":
+        return body
+    if encoding == "gzip":
+        return gzip.compress(body, 6)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=6).compress(body)
+    raise UnsupportedFormat(f"Content-Encoding {encoding!r}")
+
+
+def decompress(body: bytes, encoding: str | None) -> bytes:
+    if encoding is None or encoding == "identity":
+        return body
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    raise UnsupportedFormat(f"Content-Encoding {encoding!r}")
+
+
+def encode(document: dict, media: str) -> bytes:
+    """Serialize ``{"changes": [...], ...}``; other keys pass through as-is."""
+
+    if media == JSON:
+        return json.dumps(document, separators=(",", ":"), default=str).encode()
+    framed = dict(document, changes=pack(document.get("changes", [])))
+    if media == COMPACT_JSON:
+        return json.dumps(framed, separators=(",", ":"), default=str).encode()
+    if media == COMPACT_MSGPACK and msgpack is not None:
+        return msgpack.packb(framed, use_bin_type=True, default=str)
+    raise UnsupportedFormat(f"Content-Type {media!r}")
+
+
+def decode(body: bytes, media: str | None) -> dict:
+    media = (media or JSON).split(";")[0].strip().lower()
+    if media == JSON:
+        return json.loads(body or b"{}")
+    if media == COMPACT_JSON:
+        document = json.loads(body)
+    elif media == COMPACT_MSGPACK and msgpack is not None:
+        document = msgpack.unpackb(body, raw=False)
+    else:
+        raise UnsupportedFormat(f"Content-Type {media!r}")
+    return dict(document, changes=unpack(document["changes"]))
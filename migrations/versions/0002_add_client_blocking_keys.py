@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "client_blocking_keys",
+        sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column(
+            "client_id", sa.Integer(), sa.ForeignKey("clients.id"), nullable=False
+        ),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.UniqueConstraint("client_id", "kind", "key", name="uq_blocking_client_key"),
+    )
+    op.create_index(
+        "ix_client_blocking_keys_client_id", "client_blocking_keys", ["client_id"]
+    )
+    op.create_index(
+        "ix_blocking_kind_key_client",
+        "client_blocking_keys",
+        ["kind", "key", "client_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_blocking_kind_key_client", table_name="client_blocking_keys")
+    op.drop_index(
+        "ix_client_blocking_keys_client_id", table_name="client_blocking_keys"
+    )
+    op.drop_table("client_blocking_keys")
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_clients_created_at_id", "clients", ["created_at", "id"])
+    op.create_index("ix_trips_created_at_id", "trips", ["created_at", "id"])
+    op.create_index("ix_bookings_created_at_id", "bookings", ["created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_created_at_id", table_name="bookings")
+    op.drop_index("ix_trips_created_at_id", table_name="trips")
+    op.drop_index("ix_clients_created_at_id", table_name="clients")
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_checkpoints",
+        sa.Column("id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("remote", sa.String(), nullable=False),
+        sa.Column("direction", sa.String(length=8), nullable=False),
+        sa.Column("cursor", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.func.now(), nullable=False
+        ),
+        sa.UniqueConstraint("remote", "direction", name="uq_sync_checkpoint"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sync_checkpoints")
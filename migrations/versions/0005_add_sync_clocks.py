@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sync_clocks",
+        sa.Column("entity", sa.String(), primary_key=True, nullable=False),
+        sa.Column("entity_id", sa.Integer(), primary_key=True, nullable=False),
+        sa.Column("clock", sa.Integer(), nullable=False),
+    )
+    op.execute(
+        "INSERT INTO sync_clocks (entity, entity_id, clock) "
+        "SELECT entity, entity_id, max(logical_clock) FROM sync_outbox "
+        "GROUP BY entity, entity_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("sync_clocks")
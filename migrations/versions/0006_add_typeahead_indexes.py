@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_trips_start_date", "trips", ["start_date"])
+    op.create_index("ix_trips_name_nocase", "trips", [sa.text("name COLLATE NOCASE")])
+    op.create_index(
+        "ix_trips_destination_nocase", "trips", [sa.text("destination COLLATE NOCASE")]
+    )
+    op.create_index(
+        "ix_clients_first_name_nocase", "clients", [sa.text("first_name COLLATE NOCASE")]
+    )
+    op.create_index(
+        "ix_clients_last_name_nocase", "clients", [sa.text("last_name COLLATE NOCASE")]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_clients_last_name_nocase", table_name="clients")
+    op.drop_index("ix_clients_first_name_nocase", table_name="clients")
+    op.drop_index("ix_trips_destination_nocase", table_name="trips")
+    op.drop_index("ix_trips_name_nocase", table_name="trips")
+    op.drop_index("ix_trips_start_date", table_name="trips")
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_bookings_trip_id", "bookings", ["trip_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_bookings_trip_id", table_name="bookings")
@@ -0,0 +1,216 @@
+# scripts/bench_async_routes.py
+"""Compare latency and throughput of the sync and async read paths.
+
+Usage:
+    python scripts/bench_async_routes.py [--rows 5000] [--requests 2000]
+                                         [--concurrency 32]
+
+Seeds a temporary database, then fires bursts of concurrent GETs at the hot
+pages twice. The first run goes through sync ``def`` handlers on
+``db.get_read_db``, as the routes were written before. Those run in
+Starlette's threadpool, 40 threads by default. The second run goes through
+the app's ``async def`` handlers on ``db.get_async_read_db``. The async path
+only avoids the threadpool when aiosqlite is installed; without it, the
+fallback session runs the same work in threads. The header line says which
+one ran. Requests go in-process through ``httpx.ASGITransport``, so the
+numbers measure the app, not the network.
+
+Keep --concurrency below 40 when comparing. Past the threadpool size, the
+sync path can stall: sessions keep their pooled connection until the
+dependency teardown, and the teardown itself waits for a free thread. It
+then fails with QueuePool timeouts.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+PATHS = ["/", "/clients", "/trips", "/bookings", "/clients/1", "/trips/1"]
+
+
+def seed(rows: int) -> None:
+    from sqlalchemy import insert
+
+    from app import db, models
+    from app.services import sync
+
+    with db.SessionLocal() as session:
+        session.info[sync.SKIP_CAPTURE] = True
+        session.execute(
+            insert(models.Client),
+            [
+                {
+                    "first_name": f"First{i}",
+                    "last_name": f"Last{i}",
+                    "email": f"c{i}@example.com",
+                }
+                for i in range(rows)
+            ],
+        )
+        session.execute(
+            insert(models.Trip),
+            [{"name": f"Trip {i}", "destination": "Lisbon"} for i in range(rows // 10)],
+        )
+        session.execute(
+            insert(models.Booking),
+            [
+                {"client_id": i + 1, "trip_id": i % (rows // 10) + 1}
+                for i in range(rows)
+            ],
+        )
+        session.commit()
+
+
+def sync_app():
+    """The hot pages as sync handlers on the sync read session."""
+
+    from fastapi import Depends, FastAPI, Request
+    from fastapi.responses import HTMLResponse
+
+    from app import db
+    from app.main import templates
+    from app.routes import bookings, clients, trips
+    from app.services import stats
+
+    bench = FastAPI()
+
+    @bench.get("/", response_class=HTMLResponse)
+    def home(request: Request, s=Depends(db.get_read_db)):
+        d = stats.get_stats(s)
+        return templates.TemplateResponse("home.html", {"request": request, "stats": d})
+
+    @bench.get("/clients", response_class=HTMLResponse)
+    def clients_page(request: Request, s=Depends(db.get_read_db)):
+        page = clients._clients_page(s, "", None)
+        return clients.templates.TemplateResponse(
+            "clients/list.html",
+            {
+                "request": request,
+                "clients": page.items,
+                "next_cursor": page.next_cursor,
+                "q": "",
+            },
+        )
+
+    @bench.get("/trips", response_class=HTMLResponse)
+    def trips_page(request: Request, s=Depends(db.get_read_db)):
+        page = trips._trips_page(s, "upcoming", None)
+        return trips.templates.TemplateResponse(
+            "trips/list.html",
+            {
+                "request": request,
+                "trips": page.items,
+                "next_cursor": page.next_cursor,
+                "tab": "upcoming",
+            },
+        )
+
+    @bench.get("/bookings", response_class=HTMLResponse)
+    def bookings_page(request: Request, s=Depends(db.get_read_db)):
+        page = bookings._bookings_page(s, None)
+        return bookings.templates.TemplateResponse(
+            "bookings/list.html",
+            {
+                "request": request,
+                "bookings": page.items,
+                "next_cursor": page.next_cursor,
+            },
+        )
+
+    @bench.get("/clients/{client_id}", response_class=HTMLResponse)
+    def client_detail(request: Request, client_id: int, s=Depends(db.get_read_db)):
+        client, trip_options, timeline = clients._client_detail(s, client_id)
+        return clients.templates.TemplateResponse(
+            "clients/detail.html",
+            {
+                "request": request,
+                "client": client,
+                "trips": trip_options,
+                "timeline": timeline,
+            },
+        )
+
+    @bench.get("/trips/{trip_id}", response_class=HTMLResponse)
+    def trip_detail(request: Request, trip_id: int, s=Depends(db.get_read_db)):
+        trip, trip_bookings, client_options = trips._trip_detail(s, trip_id)
+        return trips.templates.TemplateResponse(
+            "trips/detail.html",
+            {
+                "request": request,
+                "trip": trip,
+                "bookings": trip_bookings,
+                "clients": client_options,
+            },
+        )
+
+    return bench
+
+
+async def load(asgi_app, requests: int, concurrency: int) -> tuple[list[float], float]:
+    import httpx
+
+    latencies: list[float] = []
+    queue = iter(range(requests))
+    transport = httpx.ASGITransport(app=asgi_app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def worker():
+            for i in queue:
+                start = time.perf_counter()
+                resp = await client.get(PATHS[i % len(PATHS)])
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, requests / elapsed
+
+
+def report(label: str, latencies: list[float], rps: float) -> None:
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{label:<8} {cuts[49] * 1000:>9.1f} {cuts[98] * 1000:>9.1f} {rps:>9.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        from app import db
+        from app.main import app, scheduler
+
+        scheduler.shutdown(wait=False)
+        seed(args.rows)
+        driver = (
+            "aiosqlite"
+            if db.aiosqlite
+            else "threaded fallback (aiosqlite not installed)"
+        )
+        print(
+            f"async path: {driver}; "
+            f"{args.requests} requests, concurrency {args.concurrency}"
+        )
+        print(f"{'path':<8} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+        for label, asgi_app in (("sync", sync_app()), ("async", app)):
+            asyncio.run(
+                load(asgi_app, min(200, args.requests), args.concurrency)
+            )  # warm up
+            report(label, *asyncio.run(load(asgi_app, args.requests, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# scripts/bench_db_profiles.py
+"""Compare write/read throughput of the SQLite connection profiles.
+
+Usage: python scripts/bench_db_profiles.py [--rows 2000] [--dir PATH]
+
+Writes go through the ORM with one commit per row, like the CRUD layer.
+Pass --dir to benchmark on the USB stick itself; fsync cost is what the
+profiles trade off, so numbers from a laptop SSD understate the gap.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import models  # noqa: E402
+from app.db import DB_PROFILES, create_sqlite_engine  # noqa: E402
+
+
+def bench(profile: str, path: str, rows: int) -> tuple[float, float]:
+    engine = create_sqlite_engine(f"sqlite:///{path}", profile)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    start = time.perf_counter()
+    with Session() as session:
+        for i in range(rows):
+            session.add(models.Trip(name=f"Trip {i}", destination="Somewhere"))
+            session.commit()
+    writes = rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with Session() as session:
+        for i in range(rows):
+            session.execute(select(models.Trip).where(models.Trip.id == i + 1)).scalar_one()
+    reads = rows / (time.perf_counter() - start)
+    engine.dispose()
+    return writes, reads
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--dir", default=None, help="Directory for the test databases")
+    args = parser.parse_args()
+
+    print(f"{'profile':<10} {'writes/s':>10} {'reads/s':>10}")
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for profile in DB_PROFILES:
+            writes, reads = bench(profile, os.path.join(tmp, f"{profile}.db"), args.rows)
+            print(f"{profile:<10} {writes:>10.0f} {reads:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
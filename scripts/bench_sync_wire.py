@@ -0,0 +1,131 @@
+# scripts/bench_sync_wire.py
+"""Compare sync wire formats: bytes on the wire and encode/decode time.
+
+Usage: python scripts/bench_sync_wire.py [--changes 5000] [--batch 1000]
+
+Builds a realistic mix of client/trip/booking changes (full rows for
+creates, one or two columns for updates, tombstones for deletes) and
+encodes it in batches with every format/compression this install supports.
+msgpack and zstd rows only appear when those optional packages are present.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from app.services import wire  # noqa: E402
+
+
+def make_changes(count: int) -> list[dict]:
+    rng = random.Random(42)
+    start = datetime(2024, 6, 1, 9, 0)
+    changes = []
+    for i in range(1, count + 1):
+        entity = rng.choice(["client", "client", "trip", "booking"])
+        entity_id = rng.randint(1, count // 3 or 1)
+        op = rng.choices(["create", "update", "delete"], weights=[3, 6, 1])[0]
+        if op == "delete":
+            payload = None
+        elif entity == "client":
+            full = {
+                "id": entity_id,
+                "uuid": f"{rng.getrandbits(128):032x}",
+                "first_name": rng.choice(["Anna", "Luca", "Maria", "John"]),
+                "last_name": rng.choice(["Rossi", "Smith", "Garcia", "Novak"]),
+                "email": f"user{entity_id}@example.com",
+                "phone": f"+3933{rng.randint(10**7, 10**8 - 1)}",
+                "normalized_phone": f"+3933{rng.randint(10**7, 10**8 - 1)}",
+                "dob": "1980-04-02",
+                "created_at": "2024-06-01T09:00:00",
+            }
+            payload = (
+                full if op == "create" else {"id": entity_id, "phone": full["phone"]}
+            )
+        elif entity == "trip":
+            full = {
+                "id": entity_id,
+                "name": f"Trip {entity_id}",
+                "destination": "Lisbon",
+                "start_date": "2024-09-01",
+                "end_date": "2024-09-08",
+                "notes": None,
+                "created_at": "2024-06-01T09:00:00",
+                "updated_at": "2024-06-01T09:00:00",
+            }
+            payload = (
+                full if op == "create" else {"id": entity_id, "notes": "window seat"}
+            )
+        else:
+            full = {
+                "id": entity_id,
+                "client_id": rng.randint(1, 500),
+                "trip_id": rng.randint(1, 50),
+                "status": "confirmed",
+                "notes": None,
+                "created_at": "2024-06-01T09:00:00",
+                "updated_at": "2024-06-01T09:00:00",
+            }
+            payload = (
+                full if op == "create" else {"id": entity_id, "status": "cancelled"}
+            )
+        changes.append(
+            {
+                "id": i,
+                "entity": entity,
+                "entity_id": entity_id,
+                "logical_clock": rng.randint(1, 20),
+                "op": op,
+                "payload": payload,
+                "updated_at": (start + timedelta(seconds=i * 7)).isoformat(),
+            }
+        )
+    return changes
+
+
+def bench(batches: list[list[dict]], media: str, encoding: str | None):
+    size = 0
+    start = time.perf_counter()
+    bodies = []
+    for batch in batches:
+        body = wire.compress(wire.encode({"changes": batch}, media), encoding)
+        size += len(body)
+        bodies.append(body)
+    encode_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for body in bodies:
+        wire.decode(wire.decompress(body, encoding), media)
+    decode_s = time.perf_counter() - start
+    return size, encode_s, decode_s
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--changes", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    changes = make_changes(args.changes)
+    batches = [changes[i : i + args.batch] for i in range(0, len(changes), args.batch)]
+    baseline = None
+    print(
+        f"{'format':<42} {'bytes':>10} {'ratio':>6} {'encode ms':>10} {'decode ms':>10}"
+    )
+    for media in [wire.JSON] + [m for m in wire.media_types() if m != wire.JSON]:
+        for encoding in [None] + wire.encodings():
+            size, enc, dec = bench(batches, media, encoding)
+            baseline = baseline or size
+            label = f"{media.split('/')[-1]} + {encoding or 'identity'}"
+            print(
+                f"{label:<42} {size:>10} {size / baseline:>6.2f} "
+                f"{enc * 1000:>10.1f} {dec * 1000:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
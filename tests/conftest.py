@@ -0,0 +1,19 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+_tmp_dir: str | None = None
+
+
+def pytest_configure(config):
+    # Engines are built lazily from DB_PATH; set it before any test module
+    # imports app.main, so the suite never touches data/astraion.db.
+    global _tmp_dir
+    _tmp_dir = tempfile.mkdtemp(prefix="astraion-tests-")
+    os.environ["DB_PATH"] = str(Path(_tmp_dir) / "test.db")
+
+
+def pytest_unconfigure(config):
+    if _tmp_dir:
+        shutil.rmtree(_tmp_dir, ignore_errors=True)
@@ -1,4 +1,5 @@
 import re
+import sqlite3
 
 from app.services import backups
 
@@ -7,11 +8,63 @@ def test_backup_db_creates_timestamped_file(tmp_path):
     data_dir = tmp_path / "data"
     data_dir.mkdir()
     db_file = data_dir / "astraion.db"
-    db_file.write_text("content")
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.execute("INSERT INTO t VALUES (42)")
+    conn.commit()
+    conn.close()
 
     backup_dir = data_dir / "backups"
-    result = backups.backup_db(db_path=db_file, backup_dir=backup_dir)
+    result = backups.backup_db(db_path=db_file, backup_dir=backup_dir, compress="none")
 
     assert result.exists()
     assert result.parent == backup_dir
     assert re.match(r"\d{8}-\d{4}\.db", result.name)
+    check = sqlite3.connect(result)
+    assert check.execute("SELECT x FROM t").fetchall() == [(42,)]
+    check.close()
+
+
+def test_online_backup_is_consistent_and_compressed(tmp_path):
+    import gzip
+
+    db_file = tmp_path / "live.db"
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(1000)])
+    conn.commit()  # rows are still in the -wal file, the connection stays open
+
+    result = backups.backup_db(
+        db_path=db_file, backup_dir=tmp_path / "b", compress="gzip", keep_daily=7, keep_weekly=4
+    )
+    conn.close()
+    assert result.name.endswith(".db.gz")
+    restored = tmp_path / "restored.db"
+    restored.write_bytes(gzip.decompress(result.read_bytes()))
+    check = sqlite3.connect(restored)
+    assert check.execute("SELECT count(*) FROM t").fetchone()[0] == 1000
+    check.close()
+    assert [p.name for p in (tmp_path / "b").iterdir()] == [result.name]
+
+
+def test_prune_keeps_daily_and_weekly(tmp_path):
+    from datetime import datetime, timedelta
+
+    start = datetime(2024, 1, 31, 2, 30)
+    for day in range(30):
+        for hour in (2, 14):
+            ts = (start - timedelta(days=day)).replace(hour=hour)
+            (tmp_path / f"{ts:%Y%m%d-%H%M}.db").write_text("x")
+    (tmp_path / "notes.txt").write_text("keep me")
+
+    backups.prune_backups(tmp_path, keep_daily=3, keep_weekly=2)
+    kept = sorted(p.name for p in tmp_path.iterdir())
+    # newest of Jan 31, 30, 29 plus newest of the previous ISO week (Sun Jan 28)
+    assert kept == [
+        "20240128-1430.db",
+        "20240129-1430.db",
+        "20240130-1430.db",
+        "20240131-1430.db",
+        "notes.txt",
+    ]
@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import db, models
+
+
+def test_engines_follow_db_path(tmp_path, monkeypatch):
+    path = tmp_path / "nested" / "usb.db"
+    monkeypatch.setenv("DB_PATH", str(path))
+
+    assert db.get_db_path() == path
+    assert db.DATABASE_URL == f"sqlite:///{path.as_posix()}"
+    models.Base.metadata.create_all(bind=db.engine)
+    assert path.exists()
+
+    with db.SessionLocal() as session:
+        session.add(models.Trip(name="T"))
+        session.commit()
+    with db.ReadSessionLocal() as session:
+        assert session.execute(text("SELECT count(*) FROM trips")).scalar() == 1
+        with pytest.raises(OperationalError):
+            session.execute(text("DELETE FROM trips"))
+
+    monkeypatch.delenv("DB_PATH")
+    assert db.get_db_path() == db.DATA_DIR / "astraion.db"
+    db.get_engine()  # default engine is unaffected
+    for key in [k for k in db._factories if k[0] == path]:
+        db._factories.pop(key)[0].dispose()
+
+
+def test_async_read_session_runs_sync_work_read_only(tmp_path, monkeypatch):
+    import asyncio
+
+    path = tmp_path / "async.db"
+    monkeypatch.setenv("DB_PATH", str(path))
+    models.Base.metadata.create_all(bind=db.engine)
+    with db.SessionLocal() as session:
+        session.add(models.Trip(name="T"))
+        session.commit()
+
+    def count(session):
+        return session.execute(text("SELECT count(*) FROM trips")).scalar()
+
+    def delete(session):
+        session.execute(text("DELETE FROM trips"))
+
+    async def scenario():
+        agen = db.get_async_read_db()
+        session = await agen.__anext__()
+        assert await session.run_sync(count) == 1
+        with pytest.raises(OperationalError):
+            await session.run_sync(delete)
+        await agen.aclose()
+
+    asyncio.run(scenario())
+    for key in [k for k in db._factories if k[0] == path]:
+        db._factories.pop(key)[0].dispose()
+    engine = db._async_factories.pop(path, (None,))[0]
+    if engine is not None:
+        asyncio.run(engine.dispose())
+
+
+def _pragmas(conn, *names):
+    return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
+
+
+def test_profile_pragmas_are_applied_on_connect(tmp_path):
+    names = ("journal_mode", "synchronous", "cache_size", "busy_timeout", "foreign_keys")
+    engine = db.create_sqlite_engine(f"sqlite:///{tmp_path / 'p.db'}", "safe")
+    with engine.connect() as conn:
+        # synchronous FULL is 2; foreign keys stay off for inbound sync
+        assert _pragmas(conn, *names) == {
+            "journal_mode": "wal", "synchronous": 2, "cache_size": -8000,
+            "busy_timeout": 5000, "foreign_keys": 0,
+        }
+    engine.dispose()
+
+    engine = db.create_sqlite_engine(f"sqlite:///{tmp_path / 'n.db'}", "none")
+    with engine.connect() as conn:
+        assert _pragmas(conn, "journal_mode", "query_only") == {"journal_mode": "delete", "query_only": 0}
+    engine.dispose()
+
+
+def test_read_engine_is_query_only(tmp_path, monkeypatch):
+    path = tmp_path / "ro.db"
+    monkeypatch.setenv("DB_PATH", str(path))
+    with db.get_read_engine().connect() as conn:
+        assert _pragmas(conn, "query_only")["query_only"] == 1
+    with db.get_engine().connect() as conn:
+        assert _pragmas(conn, "query_only")["query_only"] == 0
+    for key in [k for k in db._factories if k[0] == path]:
+        db._factories.pop(key)[0].dispose()
+
+
+def test_unknown_profile_is_rejected(monkeypatch):
+    monkeypatch.setenv("DB_PROFILE", "turbo")
+    with pytest.raises(ValueError, match="turbo"):
+        db.get_profile()
+    assert db.get_profile("SAFE") is db.DB_PROFILES["safe"]
@@ -119,3 +119,124 @@ def test_merge_creates_audit():
     logs = session.query(models.AuditLog).all()
     assert any(log.action == "merge" for log in logs)
     session.close()
+
+
+def _full_scan(session, candidate):
+    """Reference implementation: score every client in the table."""
+
+    from rapidfuzz.fuzz import token_sort_ratio
+
+    from app.services.phone import normalize_phone
+
+    cand_email = (candidate.email or "").lower()
+    cand_phone = normalize_phone(candidate.phone)
+    cand_name = f"{candidate.first_name} {candidate.last_name}".strip()
+    results = []
+    for c in session.query(models.Client).order_by(models.Client.id):
+        if c.email and cand_email and c.email.lower() == cand_email:
+            score = 1.0
+        else:
+            score = 0.9 if cand_phone and cand_phone == c.normalized_phone else 0.0
+            name = f"{c.first_name} {c.last_name}".strip()
+            score = max(score, token_sort_ratio(cand_name, name) / 100.0)
+        if score >= 0.85:
+            results.append((c.id, score))
+    return sorted(results, key=lambda x: x[1], reverse=True)
+
+
+def _mutate(rng, name):
+    chars = list(name)
+    for _ in range(rng.randint(0, 3)):
+        op = rng.choice("ids")
+        pos = rng.randrange(len(chars) + 1)
+        if op == "i":
+            chars.insert(pos, rng.choice("aeiouyrnst"))
+        elif chars and pos < len(chars):
+            if op == "d":
+                del chars[pos]
+            else:
+                chars[pos] = rng.choice("aeiouyrnst")
+    return "".join(chars) or "x"
+
+
+def test_blocking_index_matches_full_scan():
+    import random
+
+    rng = random.Random(1234)
+    firsts = ["Alice", "Alyce", "Bob", "Robert", "Ann", "Anna", "Jo", "Li", "Maria"]
+    lasts = ["Smith", "Smyth", "Lee", "Nguyen", "Ng", "Papadopoulos", "O", "Kim"]
+    session = db.SessionLocal()
+    try:
+        for i in range(150):
+            crud_clients.create_client(
+                session,
+                schemas.ClientCreate(
+                    first_name=_mutate(rng, rng.choice(firsts)),
+                    last_name=_mutate(rng, rng.choice(lasts)),
+                    email=f"user{i}@example.com" if i % 3 else None,
+                    phone=f"+30 69{i:08d}" if i % 4 else None,
+                ),
+            )
+        for i in range(120):
+            candidate = schemas.ClientCreate(
+                first_name=_mutate(rng, rng.choice(firsts)),
+                last_name=_mutate(rng, rng.choice(lasts)),
+                email=f"USER{rng.randrange(200)}@example.com",
+                phone=f"69{rng.randrange(200):08d}",
+            )
+            blocked = [
+                (c.id, score)
+                for c, score in dedupe.find_potential_duplicates(session, candidate)
+            ]
+            assert blocked == _full_scan(session, candidate)
+    finally:
+        session.close()
+
+
+def test_blocking_index_follows_client_changes():
+    session = db.SessionLocal()
+    try:
+        c = crud_clients.create_client(
+            session,
+            schemas.ClientCreate(first_name="Maria", last_name="Papas", email="m@x.com"),
+        )
+        keys = {(k.kind, k.key) for k in c.blocking_keys}
+        assert ("email", "m@x.com") in keys
+        session.query(models.ClientBlockingKey).delete()
+        session.commit()
+        assert dedupe.rebuild_blocking_index(session) == 1
+        session.expire_all()
+        assert {(k.kind, k.key) for k in c.blocking_keys} == keys
+    finally:
+        session.close()
+
+
+def test_batch_matches_single_candidate_results():
+    session = db.SessionLocal()
+    try:
+        for first, last, email, phone in [
+            ("Alice", "Smith", "alice@example.com", "+1 555 123 4567"),
+            ("Alyce", "Smyth", None, "555 000 1111"),
+            ("Bob", "Lee", "bob@example.com", None),
+        ]:
+            crud_clients.create_client(
+                session,
+                schemas.ClientCreate(
+                    first_name=first, last_name=last, email=email, phone=phone
+                ),
+            )
+        candidates = [
+            schemas.ClientCreate(first_name="Alice", last_name="Smyth"),
+            schemas.ClientCreate(first_name="Zed", last_name="Q", email="BOB@example.com"),
+            schemas.ClientCreate(first_name="Nobody", last_name="Here", phone="0001111"),
+            schemas.ClientCreate(first_name="Carol", last_name="King"),
+        ]
+        batch = dedupe.find_duplicates_batch(session, candidates)
+        single = [
+            [(c.id, score) for c, score in dedupe.find_potential_duplicates(session, cand)]
+            for cand in candidates
+        ]
+        assert batch == single
+        assert batch[-1] == []
+    finally:
+        session.close()
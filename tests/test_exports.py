@@ -0,0 +1,76 @@
+import csv
+import io
+import re
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app import db, models
+from app.main import app
+from app.services import exports
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    models.Base.metadata.drop_all(bind=db.engine)
+    models.Base.metadata.create_all(bind=db.engine)
+    yield
+    models.Base.metadata.drop_all(bind=db.engine)
+
+
+def _seed(n):
+    with db.SessionLocal() as session:
+        session.execute(
+            insert(models.Client),
+            [{"first_name": f"F{i}", "last_name": "L & <co>", "email": f"u{i}@x.io"} for i in range(n)],
+        )
+        session.commit()
+
+
+def test_csv_export_streams_in_bounded_chunks():
+    _seed(5000)
+    with db.get_read_engine().connect() as conn:
+        chunks = list(exports.export(conn, "clients", "csv", batch_size=500))
+    assert len(chunks) > 2
+    assert all(len(c) < exports.CHUNK_SIZE + 1024 for c in chunks)
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == ["id", "first_name", "last_name", "email", "phone", "dob", "created_at"]
+    assert len(rows) == 5001
+    assert rows[1][2] == "L & <co>"
+
+
+def test_xlsx_export_is_a_valid_workbook():
+    _seed(300)
+    resp = client.get("/clients/export", params={"format": "xlsx"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith(exports.FORMATS["xlsx"].media_type)
+    with zipfile.ZipFile(io.BytesIO(resp.content)) as zf:
+        assert zf.testzip() is None
+        sheet = zf.read("xl/worksheets/sheet1.xml").decode()
+    assert sheet.count("<row>") == 301
+    assert "L &amp; &lt;co&gt;" in sheet
+    assert re.search(r"<c><v>\d+</v></c>", sheet)
+
+
+def test_export_route_rejects_unknown_and_unavailable_formats():
+    assert client.get("/exports/trips", params={"format": "pdf"}).status_code == 400
+    assert client.get("/exports/nope").status_code == 400
+    resp = client.get("/exports/bookings")
+    assert resp.status_code == 200
+    assert resp.text.startswith("id,client_id,client_name")
+    if exports.pa is None:
+        assert client.get("/exports/trips", params={"format": "parquet"}).status_code == 400
+
+
+def test_parquet_export_round_trips():
+    pq = pytest.importorskip("pyarrow.parquet")
+    _seed(50)
+    with db.get_read_engine().connect() as conn:
+        body = b"".join(exports.export(conn, "clients", "parquet", batch_size=20))
+    table = pq.read_table(io.BytesIO(body))
+    assert table.num_rows == 50
+    assert table.column_names[:3] == ["id", "first_name", "last_name"]
@@ -0,0 +1,59 @@
+import io
+
+import pytest
+
+from app import db, models
+from app.services import imports
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    models.Base.metadata.drop_all(bind=db.engine)
+    models.Base.metadata.create_all(bind=db.engine)
+    yield
+    models.Base.metadata.drop_all(bind=db.engine)
+
+
+CSV = """first_name,last_name,email,phone,dob
+Alice,Smith,alice@example.com,+1 555 123 4567,1990-01-01
+Bob,Lee,not-an-email,,
+Carol,King,ALICE@example.com,,
+Dan,Brown,,+1-555-123-4567,
+Eve,Stone,eve@example.com,,
+"""
+
+
+def test_import_csv_rejects_bad_and_duplicate_rows(tmp_path):
+    report = tmp_path / "errors.csv"
+    with db.SessionLocal() as session:
+        result = imports.import_clients(
+            session, io.StringIO(CSV), report_path=report, chunk_size=2
+        )
+        assert (result.total, result.inserted, result.failed) == (5, 2, 3)
+        names = {c.first_name for c in session.query(models.Client)}
+        assert names == {"Alice", "Eve"}
+        assert session.query(models.ClientBlockingKey).count() > 0
+        ops = session.query(models.SyncOutbox.entity, models.SyncOutbox.op).all()
+        assert ops == [("client", "create")] * 2
+
+    lines = report.read_text().splitlines()
+    assert len(lines) == 4
+    assert lines[1].startswith("3,")
+    assert "duplicate email" in lines[2]
+    assert "duplicate phone" in lines[3]
+
+
+def test_import_jsonl_with_fuzzy_check(tmp_path):
+    row = '{"first_name": "Maria", "last_name": "Papas"}\n'
+    with db.SessionLocal() as session:
+        first = imports.import_clients(session, io.StringIO(row), fmt="jsonl")
+        assert first.inserted == 1
+        result = imports.import_clients(
+            session,
+            io.StringIO("not json\n" + row.replace("Papas", "Pappas")),
+            fmt="jsonl",
+            report_path=tmp_path / "r.csv",
+            fuzzy=True,
+        )
+        assert (result.total, result.inserted) == (2, 0)
+    assert "possible duplicate" in (tmp_path / "r.csv").read_text()
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.exc import MissingGreenlet
+from sqlalchemy.engine import Engine
+
+from app import db, models
+from app.main import app
+
+client = TestClient(app)
+
+# Statements per page, whatever the number of rows shown.
+BUDGETS = {
+    "/clients": 1,
+    "/clients/{client}": 4,  # client, its bookings + trips, trip options, audit timeline
+    "/clients/search?q=C1": 1,
+    "/trips/search?q=t": 1,
+    "/trips": 1,  # booking counts are a correlated subquery
+    "/trips/{trip}": 3,  # trip, its bookings + clients, client options
+    "/bookings": 1,
+    "/bookings/new": 2,
+}
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    models.Base.metadata.drop_all(bind=db.engine)
+    models.Base.metadata.create_all(bind=db.engine)
+    yield
+    models.Base.metadata.drop_all(bind=db.engine)
+
+
+@pytest.fixture
+def statements():
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(Engine, "before_cursor_execute", record)
+
+
+def _seed(n):
+    with db.SessionLocal() as session:
+        clients = [models.Client(first_name=f"C{i}", last_name="L") for i in range(n)]
+        trips = [models.Trip(name=f"T{i}") for i in range(n)]
+        session.add_all(clients + trips)
+        session.flush()
+        session.add_all(
+            models.Booking(client_id=c.id, trip_id=t.id)
+            for c in clients
+            for t in trips[:3]
+        )
+        session.commit()
+        return clients[0].id, trips[0].id
+
+
+@pytest.mark.parametrize("rows", [3, 20])
+def test_pages_stay_within_statement_budget(rows, statements):
+    client_id, trip_id = _seed(rows)
+    for template, budget in BUDGETS.items():
+        path = template.format(client=client_id, trip=trip_id)
+        statements.clear()
+        resp = client.get(path)
+        assert resp.status_code == 200, path
+        assert len(statements) <= budget, (path, statements)
+
+
+def test_async_routes_render_on_aiosqlite():
+    pytest.importorskip("aiosqlite")
+    client_id, trip_id = _seed(3)
+
+    async def lazy_load_fails():
+        # without the load plans, a template touching a relationship hits this
+        async with db.AsyncReadSessionLocal() as session:
+            loaded = await session.get(models.Client, client_id)
+            with pytest.raises(MissingGreenlet):
+                loaded.bookings
+
+    asyncio.run(lazy_load_fails())
+    on_aiosqlite = []
+
+    def record(conn, cursor, statement, *args):
+        on_aiosqlite.append(statement)
+
+    async_engine = db.get_async_read_engine().sync_engine
+    event.listen(async_engine, "before_cursor_execute", record)
+    try:
+        for template in BUDGETS:
+            path = template.format(client=client_id, trip=trip_id)
+            on_aiosqlite.clear()
+            resp = client.get(path)
+            assert resp.status_code == 200, path
+            assert on_aiosqlite, path  # served by the AsyncSession, not the fallback
+    finally:
+        event.remove(async_engine, "before_cursor_execute", record)
@@ -0,0 +1,100 @@
+import jinja2
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.templating import Jinja2Templates
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+
+from app import db, models
+from app.main import app
+from app.routes import admin
+from app.services import metrics
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    models.Base.metadata.drop_all(bind=db.engine)
+    models.Base.metadata.create_all(bind=db.engine)
+    metrics.reset()
+    yield
+    models.Base.metadata.drop_all(bind=db.engine)
+
+
+@pytest.fixture
+def profiled(monkeypatch):
+    monkeypatch.setenv("PERF_SLOW_MS", "0")
+    monkeypatch.setattr(metrics, "_installed", False)
+    templates = Jinja2Templates(
+        env=jinja2.Environment(
+            loader=jinja2.DictLoader({"trip.html": "<h1>{{ trip.name }}</h1>"})
+        )
+    )
+    bench = FastAPI()
+
+    @bench.get("/trips/{trip_id}")
+    def trip_page(request: Request, trip_id: int, s=Depends(db.get_read_db)):
+        trip = s.execute(
+            select(models.Trip).where(models.Trip.id == trip_id)
+        ).scalar_one()
+        return templates.TemplateResponse(request, "trip.html", {"trip": trip})
+
+    metrics.install(bench, [templates.env])
+    bench.include_router(admin.router)
+    yield TestClient(bench)
+    event.remove(Engine, "before_cursor_execute", metrics._before_cursor_execute)
+    event.remove(Engine, "after_cursor_execute", metrics._after_cursor_execute)
+
+
+def test_requests_queries_and_renders_are_recorded(profiled):
+    with db.SessionLocal() as session:
+        session.add(models.Trip(name="Lisbon"))
+        session.commit()
+
+    for _ in range(2):
+        assert profiled.get("/trips/1").text == "<h1>Lisbon</h1>"
+
+    snap = metrics.snapshot()
+    route = snap.routes[("GET", "/trips/{trip_id}")]
+    assert route.latency.count == 2
+    assert route.statuses == {200: 2}
+    assert route.queries == 2 and route.sql_seconds > 0
+    assert route.render_seconds > 0
+    assert snap.templates["trip.html"].count == 2
+    slow = [q for q in snap.slow if q.route == "/trips/{trip_id}"]
+    assert len(slow) == 2
+    assert any(
+        "trips" in step and ("SEARCH" in step or "SCAN" in step)
+        for step in slow[0].plan
+    )
+
+    body = profiled.get("/admin/metrics").text
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/trips/{trip_id}"} 2'
+        in body
+    )
+    assert (
+        'http_requests_total{method="GET",route="/trips/{trip_id}",status="200"} 2'
+        in body
+    )
+    assert 'db_queries_total{method="GET",route="/trips/{trip_id}"} 2' in body
+    assert (
+        'template_render_duration_seconds_bucket{template="trip.html",le="+Inf"} 2'
+        in body
+    )
+
+    page = profiled.get("/admin/perf")
+    assert page.status_code == 200
+    assert "GET /trips/{trip_id}" in page.text
+    assert "FROM trips" in page.text
+
+
+def test_unmatched_paths_share_one_label(profiled):
+    assert profiled.get("/nope/1").status_code == 404
+    assert profiled.get("/nope/2").status_code == 404
+    assert metrics.snapshot().routes[("GET", "<unmatched>")].statuses == {404: 2}
+
+
+def test_admin_pages_are_off_by_default():
+    assert not metrics.enabled()
+    assert TestClient(app).get("/admin/metrics").status_code == 404
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import db, models
+from app.crud import clients as crud_clients
+from app.crud import pagination
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    models.Base.metadata.drop_all(bind=db.engine)
+    models.Base.metadata.create_all(bind=db.engine)
+    yield
+    models.Base.metadata.drop_all(bind=db.engine)
+
+
+def test_keyset_pages_cover_every_row_once():
+    with db.SessionLocal() as session:
+        # Mix server-default timestamps (no fractional seconds) with explicit ones
+        for i in range(7):
+            session.add(models.Client(first_name=f"F{i}", last_name="L"))
+        session.add(
+            models.Client(first_name="Frac", last_name="L", created_at=datetime(2000, 1, 1, 0, 0, 0, 5))
+        )
+        session.add(
+            models.Client(first_name="Whole", last_name="L", created_at=datetime(2000, 1, 1))
+        )
+        session.commit()
+
+        seen, cursor = [], None
+        while True:
+            page = crud_clients.page_clients(session, cursor=cursor, limit=3)
+            seen.extend(c.id for c in page.items)
+            if not page.next_cursor:
+                break
+            cursor = page.next_cursor
+        expected = [
+            c.id
+            for c in session.query(models.Client).order_by(
+                models.Client.created_at.desc(), models.Client.id.desc()
+            )
+        ]
+        assert seen == expected
+        assert len(seen) == 9
+
+
+def test_rows_fragment_and_bad_cursor():
+    with db.SessionLocal() as session:
+        for i in range(3):
+            session.add(models.Client(first_name=f"F{i}", last_name="L"))
+        session.commit()
+        first = crud_clients.page_clients(session, limit=1)
+    r = client.get("/clients/rows", params={"cursor": first.next_cursor})
+    assert r.status_code == 200
+    assert "<html" not in r.text
+    assert r.text.count("/clients/") >= 2
+    assert client.get("/clients/rows", params={"cursor": "garbage"}).status_code == 400
+    with pytest.raises(ValueError):
+        pagination.decode_cursor("bm9wZQ")
+
+
+def test_list_pages_render():
+    for path in ("/clients", "/trips", "/trips?tab=past", "/bookings"):
+        assert client.get(path).status_code == 200
+
+
+def test_trip_tabs_split_in_sql_and_count_bookings():
+    from datetime import date, timedelta
+
+    from app.crud import trips as crud_trips
+
+    today = date.today()
+    with db.SessionLocal() as session:
+        people = [models.Client(first_name=f"P{i}", last_name="L") for i in range(3)]
+        soon = models.Trip(name="soon", start_date=today + timedelta(days=5))
+        undated = models.Trip(name="undated")
+        old = models.Trip(name="old", start_date=today - timedelta(days=400))
+        session.add_all(people + [soon, undated, old])
+        session.flush()
+        session.add_all(models.Booking(client_id=p.id, trip_id=soon.id) for p in people)
+        session.add(models.Booking(client_id=people[0].id, trip_id=old.id))
+        session.commit()
+
+        upcoming = crud_trips.page_trips(session, "upcoming").items
+        past = crud_trips.page_trips(session, "past").items
+        assert {t.name: t.booking_count for t in upcoming} == {"soon": 3, "undated": 0}
+        assert {t.name: t.booking_count for t in past} == {"old": 1}
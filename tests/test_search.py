@@ -0,0 +1,120 @@
+import pytest
+from sqlalchemy import text
+
+from app import db, models, schemas
+from app.crud import clients as crud_clients
+from app.services import search
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    models.Base.metadata.drop_all(bind=db.engine)
+    models.Base.metadata.create_all(bind=db.engine)
+    yield
+    models.Base.metadata.drop_all(bind=db.engine)
+
+
+def _seed(session):
+    for first, last, email, phone in [
+        ("Alice", "Smith", "alice@example.com", "+30 694 111 2222"),
+        ("Bob", "Smithers", "bob@example.org", None),
+        ("Carol", "King", None, "210 555 0000"),
+    ]:
+        crud_clients.create_client(
+            session,
+            schemas.ClientCreate(
+                first_name=first, last_name=last, email=email, phone=phone
+            ),
+        )
+
+
+def _names(rows):
+    return sorted(c.first_name for c in rows)
+
+
+def test_fts_matches_substrings_like_the_ilike_search():
+    with db.SessionLocal() as session:
+        _seed(session)
+        assert search.can_search(session, "smi")
+        assert _names(crud_clients.list_clients(session, "SMITH")) == ["Alice", "Bob"]
+        assert _names(crud_clients.list_clients(session, "example.org")) == ["Bob"]
+        assert _names(crud_clients.list_clients(session, "555")) == ["Carol"]
+        assert len(crud_clients.list_clients(session, "smith", limit=1)) == 1
+        # Too short for trigrams: falls back to LIKE
+        assert _names(crud_clients.list_clients(session, "ki")) == ["Carol"]
+
+
+def test_fts_follows_updates_deletes_and_rebuild():
+    with db.SessionLocal() as session:
+        _seed(session)
+        carol = session.query(models.Client).filter_by(first_name="Carol").one()
+        carol.last_name = "Queen"
+        session.commit()
+        assert crud_clients.list_clients(session, "king") == []
+        assert _names(crud_clients.list_clients(session, "queen")) == ["Carol"]
+
+        session.delete(carol)
+        session.commit()
+        assert crud_clients.list_clients(session, "queen") == []
+
+        session.execute(
+            text("INSERT INTO clients_fts(clients_fts) VALUES ('delete-all')")
+        )
+        session.commit()
+        assert crud_clients.list_clients(session, "alice") == []
+        search.rebuild_client_index(session)
+        assert _names(crud_clients.list_clients(session, "alice")) == ["Alice"]
+
+
+def test_typeahead_pickers_match_prefixes_and_dates_through_indexes():
+    from datetime import date
+
+    from app.crud import trips as crud_trips
+
+    with db.SessionLocal() as session:
+        _seed(session)
+        session.add_all(
+            [
+                models.Trip(
+                    name="Lisbon weekend",
+                    destination="Portugal",
+                    start_date=date(2024, 6, 7),
+                ),
+                models.Trip(
+                    name="Alps hike",
+                    destination="lisbon_airport",
+                    start_date=date(2024, 7, 1),
+                ),
+                models.Trip(name="100% Rome", destination="Italy"),
+            ]
+        )
+        session.commit()
+
+        def trip_names(q):
+            return [t.name for t in crud_trips.search_trips(session, q)]
+
+        assert trip_names("lis") == ["Lisbon weekend", "Alps hike"]
+        assert trip_names("2024-06") == ["Lisbon weekend"]
+        assert trip_names("2024") == ["Lisbon weekend", "Alps hike"]
+        assert trip_names("100%") == ["100% Rome"]
+        assert trip_names("_") == []
+        assert len(crud_trips.search_trips(session, "", limit=2)) == 2
+
+        assert _names(crud_clients.search_clients(session, "sm")) == ["Alice", "Bob"]
+        assert _names(crud_clients.search_clients(session, "example.org")) == ["Bob"]
+
+        stmt = text(
+            "EXPLAIN QUERY PLAN SELECT id FROM trips "
+            "WHERE name LIKE :p ESCAPE '\\' OR destination LIKE :p ESCAPE '\\' "
+            "OR (start_date >= :a AND start_date < :b)"
+        )
+        plan = " ".join(
+            row[-1]
+            for row in session.execute(stmt, {"p": "li%", "a": "2024", "b": "2025"})
+        )
+        for index in (
+            "ix_trips_name_nocase",
+            "ix_trips_destination_nocase",
+            "ix_trips_start_date",
+        ):
+            assert index in plan
@@ -0,0 +1,54 @@
+import sqlite3
+
+from app.services import snapshots
+
+
+def _make_db(path, rows=5000):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, payload TEXT)")
+    conn.executemany(
+        "INSERT INTO t (payload) VALUES (?)", [(f"row-{i:06d}" * 8,) for i in range(rows)]
+    )
+    conn.commit()
+    return conn
+
+
+def test_second_snapshot_stores_only_changed_chunks(tmp_path):
+    db_file = tmp_path / "live.db"
+    store = tmp_path / "store"
+    _make_db(db_file).close()
+
+    first = snapshots.create_snapshot(db_file, store, chunk_size=8192)
+    assert first.new_chunks == first.chunks > 10
+
+    conn = sqlite3.connect(db_file)
+    conn.execute("UPDATE t SET payload = 'changed' WHERE id = 42")
+    conn.commit()
+    # still open with rows in the -wal file: the snapshot must include them
+    second = snapshots.create_snapshot(db_file, store, chunk_size=8192)
+    conn.close()
+    assert 0 < second.new_chunks <= 3
+
+    assert snapshots.verify_snapshot(second.manifest) == []
+    restored = snapshots.restore_snapshot(second.manifest, tmp_path / "restored.db")
+    check = sqlite3.connect(restored)
+    assert check.execute("SELECT payload FROM t WHERE id = 42").fetchone() == ("changed",)
+    assert check.execute("SELECT count(*) FROM t").fetchone() == (5000,)
+    check.close()
+
+
+def test_verify_reports_corrupt_chunks_and_gc_drops_orphans(tmp_path):
+    db_file = tmp_path / "live.db"
+    store = tmp_path / "store"
+    _make_db(db_file, rows=500).close()
+    result = snapshots.create_snapshot(db_file, store)
+
+    manifest = snapshots.load_manifest(result.manifest)
+    victim = store / "chunks" / manifest["chunks"][0][:2] / manifest["chunks"][0]
+    victim.write_bytes(b"garbage")
+    assert "corrupt" in snapshots.verify_snapshot(result.manifest)[0]
+
+    result.manifest.unlink()
+    assert snapshots.collect_garbage(store) == len(set(manifest["chunks"]))
+    assert not list((store / "chunks").glob("*/*"))
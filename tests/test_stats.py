@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+
+from app import db, models
+from app.services import stats
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    models.Base.metadata.drop_all(bind=db.engine)
+    models.Base.metadata.create_all(bind=db.engine)
+    stats.invalidate()
+    yield
+    models.Base.metadata.drop_all(bind=db.engine)
+
+
+def test_dashboard_stats_are_cached_until_a_write_commits():
+    today = date(2024, 6, 1)
+    with db.SessionLocal() as session:
+        client = models.Client(first_name="Ann", last_name="Lee")
+        other = models.Client(first_name="Bo", last_name="Ng")
+        past = models.Trip(name="past", start_date=today - timedelta(days=3))
+        future = models.Trip(name="future", start_date=today + timedelta(days=3))
+        undated = models.Trip(name="undated")
+        session.add_all([client, other, past, future, undated])
+        session.flush()
+        session.add_all([
+            models.Booking(client_id=client.id, trip_id=future.id, status="confirmed"),
+            models.Booking(client_id=client.id, trip_id=past.id, status="confirmed"),
+            models.Booking(client_id=other.id, trip_id=past.id),
+            models.Reminder(scope="global", title="late", due_date=today - timedelta(days=1)),
+            models.Reminder(scope="global", title="soon", due_date=today + timedelta(days=1)),
+        ])
+        session.commit()
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        with db.SessionLocal() as session:
+            first = stats.get_stats(session, today)
+            assert (first.clients, first.trips, first.bookings) == (2, 3, 3)
+            # the Upcoming tab counts undated trips too
+            assert (first.upcoming_trips, first.overdue_reminders) == (2, 1)
+            assert first.bookings_by_status == {"confirmed": 2, "unknown": 1}
+            assert len(statements) == 2
+
+            assert stats.get_stats(session, today) is first
+            assert len(statements) == 2
+
+            # uncommitted writes keep the cache; a Core bulk insert drops it on commit
+            session.execute(insert(models.Trip), [{"name": "bulk", "start_date": today}])
+            assert stats.get_stats(session, today) is first
+            session.commit()
+            assert stats.get_stats(session, today).upcoming_trips == 3
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
@@ -0,0 +1,569 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, select
+
+from app import db, models
+from app.services import sync
+
+
+@pytest.fixture(autouse=True)
+def setup_db():
+    models.Base.metadata.drop_all(bind=db.engine)
+    models.Base.metadata.create_all(bind=db.engine)
+    yield
+    models.Base.metadata.drop_all(bind=db.engine)
+
+
+BASE = datetime(2024, 1, 1, 12, 0)
+
+
+def _change(entity_id, clock, op="update", name=None, seconds=0):
+    payload = None if op == "delete" else {"id": entity_id, "name": name or f"v{clock}"}
+    return {
+        "entity": "trip",
+        "entity_id": entity_id,
+        "logical_clock": clock,
+        "op": op,
+        "payload": payload,
+        "updated_at": (BASE + timedelta(seconds=seconds)).isoformat(),
+    }
+
+
+def test_batched_apply_keeps_sequential_lww():
+    changes = [
+        _change(1, 1, "create", "first"),
+        _change(1, 3, name="third"),
+        _change(1, 2, name="stale"),  # older clock than one applied earlier
+        _change(2, 1, "create", "doomed"),
+        _change(2, 2, "delete"),
+        _change(3, 1, "create", "a"),
+        _change(3, 1, name="same clock, newer", seconds=5),
+        _change(4, 1, "create", "gone"),
+        _change(4, 2, "delete"),
+        _change(4, 3, "create", "back"),
+    ]
+    with db.SessionLocal() as session:
+        applied = sync.apply_inbound_changes(session, changes, chunk_size=3)
+        assert applied == 9
+        names = dict(session.execute(select(models.Trip.id, models.Trip.name)).all())
+        assert names == {1: "third", 3: "same clock, newer", 4: "back"}
+
+        clocks = session.execute(
+            select(
+                models.SyncOutbox.entity_id, models.SyncOutbox.logical_clock
+            ).order_by(models.SyncOutbox.entity_id, models.SyncOutbox.logical_clock)
+        ).all()
+        assert clocks == [
+            (1, 1),
+            (1, 3),
+            (2, 1),
+            (2, 2),
+            (3, 1),
+            (4, 1),
+            (4, 2),
+            (4, 3),
+        ]
+
+        # replaying the same changes is a no-op
+        assert sync.apply_inbound_changes(session, changes) == 0
+
+
+def test_batched_apply_query_count_is_independent_of_batch_size():
+    def count_statements(n):
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        creates = [_change(i, 1, "create", f"trip {i}") for i in range(1, n + 1)]
+        updates = [_change(i, 2, name=f"renamed {i}") for i in range(1, n + 1)]
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            with db.SessionLocal() as session:
+                sync.apply_inbound_changes(session, creates + updates)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        models.Base.metadata.drop_all(bind=db.engine)
+        models.Base.metadata.create_all(bind=db.engine)
+        return len(statements)
+
+    assert count_statements(400) == count_statements(20)
+
+
+def _remote_pages(changes):
+    """A fake ``get_fn`` paging through ``changes`` like ``/sync/pull``."""
+
+    import httpx
+
+    calls = []
+
+    def get_fn(url, params, headers):
+        calls.append(params["after_clock"])
+        after = [c for c in changes if c["id"] > params["after_clock"]]
+        page = after[: params["limit"]]
+        has_more = len(after) > params["limit"]
+        return httpx.Response(
+            200,
+            json={
+                "changes": page,
+                "next_cursor": page[-1]["id"] if has_more else None,
+                "has_more": has_more,
+            },
+        )
+
+    return get_fn, calls
+
+
+def test_pull_pages_and_resumes_from_checkpoint():
+    changes = [dict(_change(i, 1, "create"), id=i * 10) for i in range(1, 8)]
+    get_fn, calls = _remote_pages(changes[:5])
+    with db.SessionLocal() as session:
+        assert sync.pull_updates(session, "http://remote/", get_fn, page_size=2) == 5
+        assert calls == [0, 20, 40]
+        assert sync.get_checkpoint(session, "http://remote", "pull") == 50
+
+        get_fn, calls = _remote_pages(changes)
+        assert sync.pull_updates(session, "http://remote", get_fn, page_size=2) == 2
+        assert calls == [50]
+        assert session.execute(select(models.Trip.id)).scalars().all() == list(
+            range(1, 8)
+        )
+
+
+def test_pull_route_pages_and_streams_ndjson():
+    import json
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.routes import sync as sync_routes
+
+    app = FastAPI()
+    app.include_router(sync_routes.router)
+    client = TestClient(app)
+    with db.SessionLocal() as session:
+        sync.apply_inbound_changes(
+            session, [_change(i, 1, "create") for i in range(1, 6)]
+        )
+
+    first = client.get("/sync/pull", params={"limit": 3}).json()
+    assert [c["entity_id"] for c in first["changes"]] == [1, 2, 3]
+    assert first["has_more"] is True
+    rest = client.get(
+        "/sync/pull", params={"after_clock": first["next_cursor"], "limit": 3}
+    ).json()
+    assert [c["entity_id"] for c in rest["changes"]] == [4, 5]
+    assert rest == dict(rest, has_more=False, next_cursor=None)
+
+    resp = client.get("/sync/pull", params={"after_clock": 2, "format": "ndjson"})
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [c["entity_id"] for c in lines] == [3, 4, 5]
+
+
+def test_push_sends_only_unacknowledged_batches():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.routes import sync as sync_routes
+
+    app = FastAPI()
+    app.include_router(sync_routes.router)
+    remote = TestClient(app)
+    sent, delays = [], []
+    failures = iter([True, False])
+
+    def post_fn(url, content, headers):
+        assert headers["Content-Encoding"] == "gzip"
+        if next(failures, False):
+            return type("Resp", (), {"status_code": 503})()
+        resp = remote.post("/sync/push", content=content, headers=headers)
+        sent.append(len(resp.request.content))
+        return resp
+
+    with db.SessionLocal() as session:
+        sync.apply_inbound_changes(
+            session, [_change(i, 1, "create") for i in range(1, 8)]
+        )
+        pushed = sync.push_outbox(
+            session,
+            "http://remote",
+            post_fn,
+            batch_size=4,
+            max_bytes=400,
+            sleep=delays.append,
+        )
+        assert pushed == 7
+        assert delays == [0.5]  # one retry after the 503
+        assert len(sent) > 2  # 4-entry pages split further by size
+        assert sync.get_checkpoint(session, "http://remote", "push") == 7
+
+        sync.apply_inbound_changes(session, [_change(8, 1, "create")])
+        assert sync.push_outbox(session, "http://remote", post_fn) == 1
+        assert sync.get_checkpoint(session, "http://remote", "push") == 8
+
+
+def test_push_attempt_policy():
+    batch = [{"id": 3}]
+
+    def resp(status, ack=None):
+        return type(
+            "Resp",
+            (),
+            {
+                "status_code": status,
+                "content": f'{{"ack": {ack}}}'.encode(),
+                "headers": {"content-type": "application/json"},
+            },
+        )()
+
+    attempt = sync.PushAttempt(
+        batch, ("application/msgpack", "zstd"), retries=2, backoff=0.5
+    )
+    assert attempt.outcome(resp(415)) == 0.0  # retried at once in the fallback format
+    assert attempt.fmt == sync.FALLBACK_FORMAT
+    assert attempt.outcome(resp(503)) == 0.5
+    assert attempt.outcome(exc=OSError("reset")) == 1.0
+    with pytest.raises(sync.PushError, match="after 3 attempts: HTTP 429"):
+        attempt.outcome(resp(429))
+
+    fresh = sync.PushAttempt(batch, sync.FALLBACK_FORMAT)
+    assert fresh.outcome(resp(200, ack=3)) is None
+    with pytest.raises(sync.PushError, match="rejected"):
+        fresh.outcome(resp(400))
+
+
+def test_compaction_folds_history_and_keeps_lww():
+    changes = [
+        _change(1, 1, "create", "first"),
+        dict(_change(1, 2), payload={"destination": "Rome"}),
+        _change(1, 3, name="third"),
+        _change(2, 1, "create", "doomed"),
+        _change(2, 2, "delete"),
+        _change(3, 1, "create", "single"),
+    ]
+    with db.SessionLocal() as session:
+        sync.apply_inbound_changes(session, changes)
+        # a remote has acknowledged everything up to trip 1's second entry
+        sync.set_checkpoint(session, "http://remote", "push", 2)
+        session.commit()
+
+        result = sync.compact_outbox(session)
+        assert (result.keys, result.removed) == (1, 2)
+        result = sync.compact_outbox(session, upto=100)
+        assert (result.keys, result.removed) == (1, 1)
+
+        rows = (
+            session.execute(
+                select(models.SyncOutbox).order_by(models.SyncOutbox.entity_id)
+            )
+            .scalars()
+            .all()
+        )
+        assert [(r.entity_id, r.logical_clock, r.op) for r in rows] == [
+            (1, 3, "create"),
+            (2, 2, "delete"),
+            (3, 1, "create"),
+        ]
+        assert rows[0].payload == {"id": 1, "name": "third", "destination": "Rome"}
+        assert rows[1].payload is None
+
+        stale = [
+            _change(1, 2, name="stale", seconds=60),
+            _change(2, 1, "create", "zombie"),
+        ]
+        assert sync.apply_inbound_changes(session, stale) == 0
+        assert sync.apply_inbound_changes(session, [_change(1, 4, name="fourth")]) == 1
+
+
+def test_reclaim_space_switches_to_incremental_vacuum_once(tmp_path):
+    engine = db.create_sqlite_engine(f"sqlite:///{tmp_path / 'v.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE t (x BLOB)")
+        conn.exec_driver_sql("INSERT INTO t VALUES (zeroblob(500000))")
+        conn.exec_driver_sql("DELETE FROM t")
+
+    def pragma(name):
+        with engine.connect() as conn:
+            return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+    assert pragma("auto_vacuum") == 0
+    sync.reclaim_space(engine)  # the first maintenance run converts the file
+    assert (pragma("auto_vacuum"), pragma("freelist_count")) == (2, 0)
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO t VALUES (zeroblob(500000))")
+        conn.exec_driver_sql("DELETE FROM t")
+    assert pragma("freelist_count") > 0
+    sync.reclaim_space(engine)
+    assert pragma("freelist_count") == 0
+    engine.dispose()
+
+
+def test_clock_counter_seeds_from_outbox_and_follows_inbound():
+    with db.SessionLocal() as session:
+        # history written before sync_clocks existed
+        session.add(
+            models.SyncOutbox(
+                entity="trip",
+                entity_id=1,
+                logical_clock=4,
+                op="create",
+                payload=None,
+            )
+        )
+        session.commit()
+
+        entry = sync.enqueue_outbox(
+            session, entity="trip", entity_id=1, op="update", payload={}
+        )
+        assert entry.logical_clock == 5
+        queued = sync.enqueue_many(
+            session,
+            [
+                {"entity": "trip", "entity_id": 1, "op": "update", "payload": {}},
+                {"entity": "trip", "entity_id": 2, "op": "create", "payload": {}},
+                {"entity": "trip", "entity_id": 1, "op": "delete", "payload": None},
+            ],
+        )
+        session.commit()
+        assert queued == 3
+        clocks = session.execute(
+            select(
+                models.SyncOutbox.entity_id,
+                models.SyncOutbox.logical_clock,
+                models.SyncOutbox.op,
+            ).order_by(models.SyncOutbox.entity_id, models.SyncOutbox.logical_clock)
+        ).all()
+        assert clocks == [
+            (1, 4, "create"),
+            (1, 5, "update"),
+            (1, 6, "update"),
+            (1, 7, "delete"),
+            (2, 1, "create"),
+        ]
+
+        sync.apply_inbound_changes(session, [_change(2, 9, "create", "remote")])
+        entry = sync.enqueue_outbox(
+            session, entity="trip", entity_id=2, op="update", payload={}
+        )
+        assert entry.logical_clock == 10
+
+
+def test_flushes_are_captured_as_outbox_diffs():
+    from datetime import date
+
+    with db.SessionLocal() as session:
+        trip = models.Trip(name="Alps", start_date=date(2025, 1, 2))
+        session.add(trip)
+        session.commit()
+        trip.destination = "Chamonix"
+        session.commit()
+        session.delete(trip)
+        session.commit()
+
+        rows = (
+            session.execute(
+                select(models.SyncOutbox).order_by(models.SyncOutbox.logical_clock)
+            )
+            .scalars()
+            .all()
+        )
+        assert [(r.entity, r.logical_clock, r.op) for r in rows] == [
+            ("trip", 1, "create"),
+            ("trip", 2, "update"),
+            ("trip", 3, "delete"),
+        ]
+        assert rows[0].payload["start_date"] == "2025-01-02"
+        assert rows[1].payload == {"id": trip.id, "destination": "Chamonix"}
+
+        # changes applied from a remote are not re-captured as local edits
+        sync.apply_inbound_changes(session, [_change(7, 1, "create")])
+        assert session.query(models.SyncOutbox).count() == 4
+
+
+def test_partial_update_after_local_delete_reissues_the_delete():
+    with db.SessionLocal() as session:
+        client = models.Client(first_name="Ann", last_name="Lee")
+        session.add(client)
+        session.commit()
+        session.delete(client)
+        session.commit()
+
+        change = {
+            "entity": "client",
+            "entity_id": 1,
+            "logical_clock": 10,
+            "op": "update",
+            "payload": {"id": 1, "email": "ann@example.com"},
+            "updated_at": BASE.isoformat(),
+        }
+        later = _change(5, 1, "create", "still applied")
+        assert sync.apply_inbound_changes(session, [change, later]) == 1
+        assert session.get(models.Client, 1) is None
+        assert session.get(models.Trip, 5).name == "still applied"
+
+        # the delete goes out again, newer than the remote's update
+        newest = sync.latest_clocks(session, {("client", 1)})[("client", 1)]
+        tombstone = session.get(models.SyncOutbox, newest[2])
+        assert (tombstone.op, tombstone.logical_clock) == ("delete", 11)
+        # replaying the update now loses to it
+        assert sync.apply_inbound_changes(session, [change]) == 0
+
+        # an update for a row never seen here queues nothing
+        outbox = session.query(models.SyncOutbox).count()
+        unseen = dict(change, entity_id=2, payload={"id": 2, "email": "x@example.com"})
+        assert sync.apply_inbound_changes(session, [unseen]) == 0
+        assert session.query(models.SyncOutbox).count() == outbox
+
+        # a full row is enough to bring the client back
+        row = dict.fromkeys(models.Client.__table__.columns.keys())
+        row.update(change["payload"], first_name="Ann", last_name="Lee")
+        full = dict(change, logical_clock=12, payload=row)
+        assert sync.apply_inbound_changes(session, [full]) == 1
+        assert session.get(models.Client, 1).email == "ann@example.com"
+
+
+def test_children_may_arrive_before_their_parents():
+    def change(entity, entity_id, payload):
+        return {
+            "entity": entity,
+            "entity_id": entity_id,
+            "logical_clock": 1,
+            "op": "create",
+            "payload": {"id": entity_id, **payload},
+            "updated_at": BASE.isoformat(),
+        }
+
+    changes = [
+        change("trip", 1, {"name": "Alps"}),
+        change("booking", 1, {"client_id": 1, "trip_id": 1}),
+        change("client", 1, {"first_name": "Ann", "last_name": "Lee"}),
+    ]
+    with db.SessionLocal() as session:
+        assert sync.apply_inbound_changes(session, changes, chunk_size=2) == 3
+        assert session.get(models.Booking, 1).client.first_name == "Ann"
+
+
+def test_autosync_worker_round_and_adaptive_interval():
+    import asyncio
+
+    import httpx
+
+    from app.services import autosync, wire
+
+    remote_changes = [dict(_change(50, 1, "create", "from remote"), id=1)]
+    pushed = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/sync/push":
+            body = wire.decompress(request.content, request.headers["content-encoding"])
+            batch = wire.decode(body, request.headers["content-type"])["changes"]
+            pushed.extend(batch)
+            return httpx.Response(200, json={"status": "ok", "ack": batch[-1]["id"]})
+        after = int(request.url.params["after_clock"])
+        page = [c for c in remote_changes if c["id"] > after]
+        return httpx.Response(200, json={"changes": page, "has_more": False})
+
+    with db.SessionLocal() as session:
+        session.add_all([models.Trip(name="a"), models.Trip(name="b")])
+        session.commit()
+
+    async def scenario():
+        client = httpx.AsyncClient(
+            base_url="http://remote", transport=httpx.MockTransport(handler)
+        )
+        worker = autosync.SyncWorker(
+            "http://remote", min_interval=1, max_interval=8, client=client
+        )
+        moved = await worker.run_once()
+        assert moved == 3  # two local creates pushed, one remote create pulled
+        assert worker._next_interval(moved) == 1
+        # the pulled entry is echoed once (the remote skips it: same clock)
+        assert await worker.run_once() == 1
+        assert await worker.run_once() == 0
+        worker.interval = 8
+        assert 7.2 <= worker._next_interval(0) <= 8.8
+        await worker.stop()
+
+    asyncio.run(scenario())
+    assert [c["entity_id"] for c in pushed] == [1, 2, 50]
+    with db.SessionLocal() as session:
+        assert session.get(models.Trip, 50).name == "from remote"
+
+
+def test_reconcile_transfers_only_divergent_records(tmp_path):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import sessionmaker
+
+    from app.routes import sync as sync_routes
+    from app.services import reconcile
+
+    remote_engine = db.create_sqlite_engine(f"sqlite:///{tmp_path / 'remote.db'}")
+    models.Base.metadata.create_all(bind=remote_engine)
+    RemoteSession = sessionmaker(bind=remote_engine, autoflush=False)
+
+    def remote_db():
+        with RemoteSession() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(sync_routes.router)
+    app.dependency_overrides[db.get_db] = remote_db
+    app.dependency_overrides[db.get_read_db] = remote_db
+    remote = TestClient(app)
+    sent = []
+
+    def post_fn(url, **kwargs):
+        resp = remote.post(url.removeprefix("http://remote"), **kwargs)
+        sent.append(len(resp.content))
+        return resp
+
+    shared = [_change(i, 1, "create") for i in range(1, 301)]
+    with db.SessionLocal() as local, RemoteSession() as other:
+        sync.apply_inbound_changes(local, shared)
+        sync.apply_inbound_changes(other, shared)
+        local.get(models.Trip, 5).name = "edited here"
+        local.get(models.Trip, 7).name = "edited here first"
+        local.commit()
+        other.delete(other.get(models.Trip, 9))
+        other.get(models.Trip, 7).name = "edited there later"
+        other.add(models.Trip(id=400, name="created there"))
+        other.commit()
+
+    with db.SessionLocal() as local:
+        result = reconcile.reconcile(local, "http://remote", post_fn)
+        assert result.pulled == 3  # 7 (newer timestamp), 9 (tombstone), 400
+        assert (
+            result.pushed == 1
+        )  # 5; 7 is sent back too, but the remote keeps its newer edit
+        assert result.buckets <= 4
+
+        with RemoteSession() as other:
+            assert reconcile.collect_leaves(local) == reconcile.collect_leaves(other)
+            for trip_id in (5, 7, 400):
+                assert (
+                    local.get(models.Trip, trip_id).name
+                    == other.get(models.Trip, trip_id).name
+                )
+            assert local.get(models.Trip, 7).name == "edited there later"
+            assert local.get(models.Trip, 9) is None
+
+        sent.clear()
+        again = reconcile.reconcile(local, "http://remote", post_fn)
+        assert (again.pulled, again.pushed, again.requests) == (0, 0, 2)
+
+        # the remote answers every round trip from one cached tree until a write lands
+        with RemoteSession() as other:
+            state = reconcile.tree_state(other)
+            assert reconcile.tree_state(other) is state
+            assert state.trees  # built while serving the walk
+            other.get(models.Trip, 5).name = "moved on"
+            other.commit()
+            assert reconcile.tree_state(other) is not state
+        assert set(sync.model_payload(local.get(models.Trip, 5))) == set(
+            models.Trip.__table__.columns.keys()
+        )
+    remote_engine.dispose()
@@ -0,0 +1,66 @@
+import httpx
+
+from app.services import sync, wire
+
+CHANGES = [
+    {
+        "id": 7,
+        "entity": "client",
+        "entity_id": 3,
+        "logical_clock": 2,
+        "op": "update",
+        "payload": {"id": 3, "email": "a@example.com"},
+        "updated_at": "2024-05-01T10:00:00.123456",
+    },
+    {
+        "id": 9,
+        "entity": "trip",
+        "entity_id": 1,
+        "logical_clock": 5,
+        "op": "delete",
+        "payload": None,
+        "updated_at": "2024-05-01T10:00:01",
+    },
+]
+
+
+def test_compact_formats_round_trip():
+    for media in wire.media_types():
+        for encoding in wire.encodings() + [None]:
+            body = wire.compress(
+                wire.encode({"changes": CHANGES, "ack": 9}, media), encoding
+            )
+            document = wire.decode(wire.decompress(body, encoding), media)
+            assert document == {"changes": CHANGES, "ack": 9}
+
+
+def test_negotiation_prefers_client_order_and_falls_back_to_json():
+    assert wire.negotiate(None, None) == (wire.JSON, None)
+    assert wire.negotiate("text/html, application/json;q=0.1", "br, gzip") == (
+        wire.JSON,
+        "gzip",
+    )
+    media, _ = wire.negotiate(f"{wire.COMPACT_JSON};q=0.9, application/xml", "identity")
+    assert media == wire.COMPACT_JSON
+
+
+def test_push_falls_back_to_json_when_remote_answers_415():
+    seen = []
+
+    def post_fn(url, content, headers):
+        seen.append(headers["Content-Type"])
+        if headers["Content-Type"] != wire.JSON:
+            return httpx.Response(415)
+        return httpx.Response(200, json={"ack": CHANGES[-1]["id"]})
+
+    fmt = sync._post_batch(
+        post_fn,
+        "http://remote/sync/push",
+        CHANGES,
+        fmt=(wire.COMPACT_JSON, "gzip"),
+        retries=0,
+        backoff=0,
+        sleep=None,
+    )
+    assert fmt == sync.FALLBACK_FORMAT
+    assert seen == [wire.COMPACT_JSON, wire.JSON]